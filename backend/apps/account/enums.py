@@ -8,3 +8,13 @@ class AccountUserAuthenticateCheckSectionEnum(Enum):
 
     OTP = "OTP"
     PASSWORD = "PASSWORD"
+
+
+class PasswordResetTokenStatusEnum(Enum):
+    """
+    Enum for password reset token check results.
+    """
+
+    VALID = "VALID"
+    INVALID = "INVALID"
+    EXPIRED = "EXPIRED"
@@ -0,0 +1,100 @@
+import os
+import time
+from datetime import timedelta
+from glob import glob
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils.timezone import now
+
+from apps.account.models import AuthAuditDailyCount, AuthAuditEvent
+from config.api.audit import audit_log
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the auth audit log retention: compact old events into daily "
+        "counts and delete expired counts and rotated audit files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=None,
+            help="Keep raw events this many days (AUTH_AUDIT_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        config = audit_log.config
+        retention_days = options["retention_days"]
+        if retention_days is None:
+            retention_days = config["RETENTION_DAYS"]
+        cutoff = now() - timedelta(days=retention_days)
+
+        compacted = self.compact_events(cutoff)
+        summaries = AuthAuditDailyCount.objects.filter(
+            day__lt=(now() - timedelta(days=config["SUMMARY_RETENTION_DAYS"])).date()
+        ).delete()[0]
+        files = self.delete_rotated_files(config["FILE"], retention_days)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"compacted events: {compacted}, deleted daily counts: {summaries}, "
+                f"deleted files: {files}"
+            )
+        )
+
+    def compact_events(self, cutoff) -> int:
+        expired = AuthAuditEvent.objects.filter(created_at__lt=cutoff).order_by("id")
+        compacted = 0
+        while True:
+            batch = self.compact_batch(expired)
+            if not batch:
+                return compacted
+            compacted += batch
+
+    def compact_batch(self, expired) -> int:
+        """
+        Counts a batch of expired events into the daily counts and deletes
+        it in the same transaction, so no event is counted twice.
+        """
+        with transaction.atomic():
+            # Rows locked by a concurrent run are left to that run
+            ids = list(
+                expired.select_for_update(skip_locked=True).values_list(
+                    "id", flat=True
+                )[:BATCH_SIZE]
+            )
+            if not ids:
+                return 0
+            events = AuthAuditEvent.objects.filter(id__in=ids)
+            groups = (
+                events.annotate(day=TruncDate("created_at"))
+                .values("day", "event", "method", "outcome")
+                .annotate(total=Count("id"))
+                .order_by()
+            )
+            for group in groups:
+                total = group.pop("total")
+                counted, _ = AuthAuditDailyCount.objects.get_or_create(
+                    **group, defaults={"count": 0}
+                )
+                AuthAuditDailyCount.objects.filter(pk=counted.pk).update(
+                    count=F("count") + total
+                )
+            events.delete()
+        return len(ids)
+
+    def delete_rotated_files(self, path: str, retention_days: int) -> int:
+        deadline = time.time() - retention_days * 86400
+        deleted = 0
+        for backup in glob(f"{path}.*.gz"):
+            if os.path.getmtime(backup) < deadline:
+                os.remove(backup)
+                deleted += 1
+        return deleted
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.account.utils.provisioning import (
+    DEFAULT_BATCH_SIZE,
+    iter_phones_from_csv,
+    provision_users,
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk create users from a CSV file of phone numbers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path to the CSV file.")
+        parser.add_argument(
+            "--column", default="phone", help="Name of the phone column."
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--referral-from", default=None, help="Referral code to attach to users."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            file = open(options["csv_path"], newline="", encoding="utf-8-sig")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with file:
+            result = provision_users(
+                iter_phones_from_csv(file, column=options["column"]),
+                batch_size=options["batch_size"],
+                referral_from=options["referral_from"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"created: {result.created}, existing: {result.existing}, "
+                f"invalid: {result.invalid}, failed: {result.failed}"
+            )
+        )
+        if result.failed_samples:
+            self.stderr.write("Not created: " + ", ".join(result.failed_samples))
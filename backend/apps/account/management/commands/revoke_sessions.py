@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.account.models import User
+
+
+class Command(BaseCommand):
+    help = "Log a user out of all devices by bumping their security stamp."
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--phone")
+        group.add_argument("--user-id", type=int)
+
+    def handle(self, *args, **options):
+        if options["phone"]:
+            lookup = {"phone": User.format_phone(options["phone"])}
+        else:
+            lookup = {"pk": options["user_id"]}
+
+        user = User.objects.locate("id", "phone", "security_stamp", **lookup)
+        if not user:
+            raise CommandError("User not found.")
+
+        user.revoke_all_sessions()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Revoked all sessions of {user.phone} (stamp {user.security_stamp})."
+            )
+        )
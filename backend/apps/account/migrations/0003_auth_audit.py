@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0002_user_security_stamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthAuditDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('event', models.CharField(max_length=32)),
+                ('method', models.CharField(blank=True, max_length=16)),
+                ('outcome', models.CharField(max_length=32)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'auth_audit_daily_counts',
+                'constraints': [models.UniqueConstraint(fields=('day', 'event', 'method', 'outcome'), name='auth_audit_daily_count_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AuthAuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('event', models.CharField(max_length=32)),
+                ('method', models.CharField(blank=True, max_length=16)),
+                ('outcome', models.CharField(max_length=32)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('phone', models.CharField(blank=True, max_length=15)),
+                ('ip', models.CharField(blank=True, max_length=45)),
+                ('user_agent', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'db_table': 'auth_audit_events',
+                'indexes': [models.Index(fields=['phone', 'created_at'], name='auth_audit__phone_158e36_idx'), models.Index(fields=['user_id', 'created_at'], name='auth_audit__user_id_7ff0e8_idx')],
+            },
+        ),
+    ]
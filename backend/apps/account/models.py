@@ -1,13 +1,26 @@
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, List, Set, TYPE_CHECKING
 from uuid import uuid4
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
 from django.utils.timezone import now
 from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from datetime import timedelta
 import random
 import string
 
+from config.api.bans import bump_banned_users_version
+from config.api.revocation import SECURITY_STAMP_CLAIM, set_cached_security_stamp
+from config.api.sharding import (
+    SHARD_KEY_CLAIM,
+    generate_id,
+    get_shard_aliases,
+    is_sharding_enabled,
+    shard_for_phone,
+    shard_key,
+    shard_of,
+    use_shard_of,
+)
+from config.api.timing import timed
 from config.libs.validators import validate_phone
 
 
@@ -16,6 +29,28 @@ class UserManager(BaseUserManager):
     Custom user manager for User model.
     """
 
+    def for_phone(self, phone):
+        """
+        Manager bound to the shard of `phone`, this manager when not sharded.
+        """
+        alias = shard_for_phone(phone)
+        return self.db_manager(alias) if alias else self
+
+    def locate(self, *fields, **lookups):
+        """
+        First user matching `lookups` on any shard, for lookups without a
+        phone (e.g. by pk in admin endpoints). `fields` limits the loaded
+        columns like `only()`.
+        """
+        for alias in get_shard_aliases() or [None]:
+            queryset = self.db_manager(alias).filter(**lookups)
+            if fields:
+                queryset = queryset.only(*fields)
+            user = queryset.first()
+            if user:
+                return user
+        return None
+
     def create_user(self, phone, **extra_fields):
         """
         Create and return a regular user with the given phone number.
@@ -57,6 +92,60 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def get_or_create_for_signup(self, phone, referral_from=None):
+        """
+        Returns `(user, created)` for an OTP login.
+
+        New users are written with a single INSERT: the unusable password and
+        a random referral code are set before saving and the unique index on
+        referral_code replaces the existence query of `generate_referral_code`.
+        """
+        user = self.filter(phone=phone).first()
+        if user:
+            return user, False
+
+        # self.db routes like a read, which may be a lagging replica
+        using = self._db or router.db_for_write(self.model)
+        for _ in range(5):
+            user = self.model(
+                phone=phone,
+                referral_code=self.model.random_referral_code(),
+                referral_from=referral_from,
+                is_active=True,
+            )
+            user.set_unusable_password()
+            try:
+                with transaction.atomic(using=using):
+                    user.save(using=using, force_insert=True)
+                return user, True
+            except IntegrityError:
+                # Either the phone was registered concurrently or the
+                # referral code collided, retry only in the latter case
+                existing = self.db_manager(using).filter(phone=phone).first()
+                if existing:
+                    return existing, False
+
+        raise IntegrityError("Could not allocate a unique referral code.")
+
+    def generate_referral_codes(self, count: int) -> List[str]:
+        """
+        Preallocates `count` unique referral codes using one existence
+        query per round instead of one query per code.
+        """
+        codes: Set[str] = set()
+        while len(codes) < count:
+            candidates = {
+                self.model.random_referral_code() for _ in range(count - len(codes))
+            }
+            candidates -= codes
+            taken = set(
+                self.filter(referral_code__in=candidates).values_list(
+                    "referral_code", flat=True
+                )
+            )
+            codes |= candidates - taken
+        return list(codes)
+
 
 class User(AbstractUser):
     phone = models.CharField(unique=True, max_length=11, db_index=True)
@@ -69,6 +158,8 @@ class User(AbstractUser):
     last_online = models.DateTimeField(null=True, blank=True)
     is_banned = models.BooleanField(default=False)
     banned_reason = models.CharField(max_length=255, null=True, blank=True)
+    # Embedded in every JWT, bumping it revokes all sessions of the user
+    security_stamp = models.PositiveIntegerField(default=0)
     USERNAME_FIELD = "phone"
     REQUIRED_FIELDS = []  # no extra fields required for createsuperuser
     username = None
@@ -77,39 +168,77 @@ class User(AbstractUser):
 
     class Meta:
         db_table = "users"
+        indexes = [
+            # Keeps the banned users reload of config.api.bans cheap
+            models.Index(
+                fields=["id"],
+                condition=models.Q(is_banned=True),
+                name="users_banned_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared in save() to tell whether the ban state changed
+        instance._loaded_is_banned = instance.__dict__.get("is_banned")
+        return instance
 
     def save(self, *args, **kwargs):
+        if self.pk is None and is_sharding_enabled():
+            # Ids must be unique across shards
+            self.pk = generate_id()
+            kwargs.setdefault("force_insert", True)
         # Generate referral code if it doesn't exist
         if not self.referral_code:
-            self.referral_code = self.generate_referral_code()
+            self.referral_code = self.generate_referral_code(
+                using=kwargs.get("using")
+                or router.db_for_write(type(self), instance=self)
+            )
         super().save(*args, **kwargs)
 
-    def handle_creation(self):
-        """
-        Handles additional actions after user creation.
-        This method is called after the user instance is created.
-        """
-        self.set_unusable_password()
-        self.save(update_fields=["password"])
+        update_fields = kwargs.get("update_fields")
+        if (update_fields is None or "is_banned" in update_fields) and (
+            getattr(self, "_loaded_is_banned", False) != self.is_banned
+        ):
+            self._loaded_is_banned = self.is_banned
+            transaction.on_commit(bump_banned_users_version, using=self._state.db)
 
-    def generate_referral_code(self) -> str:
+    def generate_referral_code(self, using: str | None = None) -> str:
         """
         Generates a unique 6-digit referral code using lowercase, uppercase letters and digits.
         """
-        characters = string.ascii_lowercase + string.ascii_uppercase + string.digits
         while True:
-            code = "".join(random.choices(characters, k=6))
+            code = self.random_referral_code()
             # Check if this code already exists
-            if not User.objects.filter(referral_code=code).exists():
+            if not User.objects.db_manager(using).filter(referral_code=code).exists():
                 return code
 
+    @staticmethod
+    def random_referral_code() -> str:
+        """
+        Returns a random 6-digit referral code without checking uniqueness.
+        """
+        characters = string.ascii_lowercase + string.ascii_uppercase + string.digits
+        return "".join(random.choices(characters, k=6))
+
+    @timed("mint")
     def generate_jwt_token(self) -> Dict[str, str | int]:
         """
         Generates JWT tokens (refresh and access) for the user.
         """
-        refresh = RefreshToken.for_user(self)
+        # The outstanding token row is written to the user's shard
+        with use_shard_of(self):
+            refresh = RefreshToken.for_user(self)
         # Create custom access token with 5-minute expiry
         access = AccessToken.for_user(self)
+        refresh[SECURITY_STAMP_CLAIM] = self.security_stamp
+        access[SECURITY_STAMP_CLAIM] = self.security_stamp
+        if is_sharding_enabled():
+            refresh[SHARD_KEY_CLAIM] = shard_key(self.phone)
+            access[SHARD_KEY_CLAIM] = shard_key(self.phone)
+        # Warm the stamp cache so the first refresh does not query it
+        set_cached_security_stamp(self.pk, self.security_stamp, overwrite=False)
 
         return {
             "refresh": str(refresh),
@@ -117,6 +246,31 @@ class User(AbstractUser):
             "access_exp": int(access.payload.get("exp") or 0),
         }
 
+    def revoke_all_sessions(self) -> None:
+        """
+        Invalidates every outstanding access and refresh token of the user
+        in constant time by bumping the security stamp.
+        """
+        using = router.db_for_write(User, instance=self)
+        User.objects.using(using).filter(pk=self.pk).update(
+            security_stamp=models.F("security_stamp") + 1
+        )
+        self.refresh_from_db(using=using, fields=["security_stamp"])
+        set_cached_security_stamp(self.pk, self.security_stamp)
+
+    def ban(self, reason: str | None = None) -> None:
+        """
+        Bans the user, enforced on every worker within USER_BAN_SYNC_INTERVAL.
+        """
+        self.is_banned = True
+        self.banned_reason = reason
+        self.save(update_fields=["is_banned", "banned_reason"])
+
+    def unban(self) -> None:
+        self.is_banned = False
+        self.banned_reason = None
+        self.save(update_fields=["is_banned", "banned_reason"])
+
     @staticmethod
     def format_phone(phone: str) -> str:
         """
@@ -135,6 +289,15 @@ class User(AbstractUser):
 
 
 
+class UserPasswordResetTokenManager(models.Manager):
+    def for_user(self, user):
+        """
+        Manager bound to the shard of `user`, this manager when not sharded.
+        """
+        alias = shard_of(user)
+        return self.db_manager(alias) if alias else self
+
+
 class UserPasswordResetToken(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="reset_password_tokens"
@@ -143,6 +306,8 @@ class UserPasswordResetToken(models.Model):
 
     expire_at = models.DateTimeField(blank=True, null=True)
 
+    objects = UserPasswordResetTokenManager()
+
     class Meta:
         db_table = "users_password_reset_tokens"
 
@@ -159,3 +324,55 @@ class UserPasswordResetToken(models.Model):
         if self.expire_at:
             return self.expire_at < now()
         return True
+
+
+class AuthAuditEvent(models.Model):
+    """
+    Append-only record of an authentication event, written in batches by
+    `config.api.audit`. Kept on "default" next to the other non-user tables,
+    `user_id` is a plain column since users may live on another shard.
+    """
+
+    created_at = models.DateTimeField(db_index=True)
+    event = models.CharField(max_length=32)
+    method = models.CharField(max_length=16, blank=True)
+    outcome = models.CharField(max_length=32)
+    user_id = models.BigIntegerField(blank=True, null=True)
+    phone = models.CharField(max_length=15, blank=True)
+    ip = models.CharField(max_length=45, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        db_table = "auth_audit_events"
+        indexes = [
+            models.Index(fields=["phone", "created_at"]),
+            models.Index(fields=["user_id", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event} ({self.outcome}) - {self.phone}"
+
+
+class AuthAuditDailyCount(models.Model):
+    """
+    Events past AUTH_AUDIT["RETENTION_DAYS"], compacted into daily counts
+    by `compact_audit_log`.
+    """
+
+    day = models.DateField()
+    event = models.CharField(max_length=32)
+    method = models.CharField(max_length=16, blank=True)
+    outcome = models.CharField(max_length=32)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "auth_audit_daily_counts"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "event", "method", "outcome"],
+                name="auth_audit_daily_count_unique",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.event} ({self.outcome}): {self.count}"
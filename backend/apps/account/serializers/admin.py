@@ -0,0 +1,38 @@
+from rest_framework import serializers
+
+from config.api.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, MAX_CHUNK_SIZE
+
+
+class AdminStreamingExportSerializer(serializers.Serializer):
+    """
+    Serializer for streaming export query parameters.
+    after_id is the last id the client received, used to resume an export.
+    """
+
+    file_format = serializers.ChoiceField(
+        choices=list(EXPORT_FORMATS.keys()), default="ndjson"
+    )
+    after_id = serializers.IntegerField(min_value=0, required=False)
+    chunk_size = serializers.IntegerField(
+        min_value=1, max_value=MAX_CHUNK_SIZE, default=DEFAULT_CHUNK_SIZE
+    )
+
+
+class AdminUserBulkProvisionSerializer(serializers.Serializer):
+    """
+    Serializer for bulk user provisioning from an uploaded CSV file.
+    """
+
+    file = serializers.FileField()
+    column = serializers.CharField(default="phone")
+    referral_from = serializers.CharField(
+        max_length=6, min_length=6, required=False, allow_blank=True
+    )
+
+
+class AdminUserBanSerializer(serializers.Serializer):
+    """
+    Serializer for banning a user.
+    """
+
+    reason = serializers.CharField(max_length=255, required=False, allow_blank=True)
@@ -1,6 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from apps.account.models import User
+from config.api.timing import TimedValidationMixin
 from config.libs.validators import validate_phone
 import uuid
 
@@ -22,7 +24,7 @@ class AcountCurrentUserDetailSerializer(serializers.ModelSerializer):
         )
 
 
-class AccountUserLogoutSerializer(serializers.Serializer):
+class AccountUserLogoutSerializer(TimedValidationMixin, serializers.Serializer):
     """
     Serializer for logging out the user.
     """
@@ -30,7 +32,7 @@ class AccountUserLogoutSerializer(serializers.Serializer):
     refresh = serializers.CharField()
 
 
-class BasePhoneValidationSerializer(serializers.Serializer):
+class BasePhoneValidationSerializer(TimedValidationMixin, serializers.Serializer):
     """
     Base serializer for phone validation.
     """
@@ -146,7 +148,10 @@ class AuthenticateUserForgotPasswordResetSerializer(BasePhoneValidationSerialize
     def validate_token(self, value):
         """
         Validate that the token is in UUID4 format.
+        Signed tokens (PASSWORD_RESET_TOKEN_MODE="signed") are checked by the view.
         """
+        if getattr(settings, "PASSWORD_RESET_TOKEN_MODE", "database") == "signed":
+            return value
         try:
             uuid_obj = uuid.UUID(value, version=4)
             if str(uuid_obj) != value:
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils.timezone import now
+
+from apps.account.models import AuthAuditDailyCount, AuthAuditEvent
+
+
+class CompactAuditLogTest(TestCase):
+    def setUp(self):
+        old = now() - timedelta(days=100)
+        AuthAuditEvent.objects.bulk_create(
+            [
+                AuthAuditEvent(
+                    created_at=old, event="login", method="otp", outcome=outcome
+                )
+                for outcome in ("success", "success", "success", "wrong_otp")
+            ]
+            # Within the retention, kept
+            + [
+                AuthAuditEvent(
+                    created_at=now(), event="login", method="otp", outcome="success"
+                )
+            ]
+        )
+
+    def compact(self):
+        call_command("compact_audit_log", stdout=StringIO())
+
+    def counts(self):
+        # Summed over days, the events may span midnight
+        return dict(
+            AuthAuditDailyCount.objects.values("outcome")
+            .annotate(total=Sum("count"))
+            .values_list("outcome", "total")
+        )
+
+    @mock.patch("apps.account.management.commands.compact_audit_log.BATCH_SIZE", 2)
+    def test_batches_count_and_delete_expired_events(self):
+        self.compact()
+
+        self.assertEqual(self.counts(), {"success": 3, "wrong_otp": 1})
+        self.assertEqual(AuthAuditEvent.objects.count(), 1)
+
+    def test_repeated_run_counts_nothing_twice(self):
+        self.compact()
+        self.compact()
+
+        self.assertEqual(self.counts(), {"success": 3, "wrong_otp": 1})
+
+    def test_zero_retention_days_compacts_everything(self):
+        call_command("compact_audit_log", retention_days=0, stdout=StringIO())
+
+        self.assertEqual(self.counts(), {"success": 4, "wrong_otp": 1})
+        self.assertFalse(AuthAuditEvent.objects.exists())
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.account.models import User, UserManager
+from apps.account.utils.provisioning import provision_users
+
+PHONES = ["09120000011", "09120000012", "09120000013"]
+
+
+class ProvisionUsersTest(TestCase):
+    def setUp(self):
+        self.taken = User.objects.create_user(phone="09120000010")
+        self.taken.referral_code = "TAKEN1"
+        self.taken.save(update_fields=["referral_code"])
+
+    def test_skips_existing_phones(self):
+        User.objects.create_user(phone=PHONES[0])
+
+        result = provision_users(PHONES)
+
+        self.assertEqual((result.created, result.existing, result.failed), (2, 1, 0))
+        self.assertEqual(User.objects.filter(phone__in=PHONES).count(), 3)
+
+    def test_retries_rows_dropped_for_a_taken_referral_code(self):
+        generate = UserManager.generate_referral_codes
+        rounds = []
+
+        def generate_with_collision(manager, count):
+            codes = generate(manager, count)
+            rounds.append(count)
+            # As if another request took the code after it was allocated
+            return ["TAKEN1", *codes[1:]] if len(rounds) == 1 else codes
+
+        with mock.patch.object(
+            UserManager, "generate_referral_codes", generate_with_collision
+        ):
+            result = provision_users(PHONES)
+
+        self.assertEqual(rounds, [3, 1])
+        self.assertEqual((result.created, result.existing, result.failed), (3, 0, 0))
+        self.assertEqual(User.objects.filter(phone__in=PHONES).count(), 3)
+
+    def test_reports_phones_that_could_not_be_created(self):
+        def always_taken(manager, count):
+            return ["TAKEN1"] * count
+
+        with mock.patch.object(UserManager, "generate_referral_codes", always_taken):
+            result = provision_users(PHONES[:1])
+
+        self.assertEqual((result.created, result.failed), (0, 1))
+        self.assertEqual(result.failed_samples, [PHONES[0]])
+        self.assertFalse(User.objects.filter(phone=PHONES[0]).exists())
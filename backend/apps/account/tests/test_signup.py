@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.db import connection, router
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.account.models import User
+from apps.sms_service.models import VerifyOTPService
+from apps.sms_service.utils.backends import get_otp_backend
+from config.api.bans import banned_users
+from config.api.perf import STUB_SMS_SENDER
+
+SIGNUP_PATH = "/api/account/authenticate/otp/"
+
+# OTP lookup and consume, user lookup and INSERT, OutstandingToken INSERT,
+# plus SAVEPOINT/RELEASE of the two atomic blocks (the outer one is a plain
+# transaction outside of TestCase, see the perf_budget scenario)
+SIGNUP_QUERIES = 9
+
+
+@override_settings(SMS_SERVICE_SENDER=STUB_SMS_SENDER)
+class OTPSignupQueriesTest(TestCase):
+    phone = "09120000001"
+
+    def setUp(self):
+        banned_users.sync(force=True)
+        self.client = APIClient()
+        self.otp = get_otp_backend().issue(self.phone, "AUTHENTICATE")
+
+    def signup(self):
+        return self.client.post(
+            SIGNUP_PATH, {"phone": self.phone, "otp": self.otp}, format="json"
+        )
+
+    def test_signup_query_count(self):
+        with self.assertNumQueries(SIGNUP_QUERIES):
+            response = self.signup()
+
+        self.assertEqual(response.json()["status"], 200)
+        self.assertTrue(User.objects.filter(phone=self.phone).exists())
+
+    def test_signup_inserts_user_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.signup()
+
+        user_writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT INTO \"users\"", "UPDATE \"users\""))
+        ]
+        self.assertEqual(len(user_writes), 1)
+        self.assertTrue(user_writes[0].startswith("INSERT"))
+        user = User.objects.get(phone=self.phone)
+        self.assertFalse(user.has_usable_password())
+        self.assertTrue(user.referral_code)
+
+    def test_otp_is_consumed(self):
+        self.signup()
+
+        self.assertEqual(self.signup().json()["status"], 400)
+        self.assertFalse(
+            VerifyOTPService.objects.filter(to=self.phone, is_used=False).exists()
+        )
+
+    def test_concurrent_signup_found_on_the_write_database(self):
+        existing = User.objects.create_user(phone=self.phone)
+        first = QuerySet.first
+        lookups = []
+
+        def lagging_first(queryset):
+            lookups.append(queryset.db)
+            # The first lookup misses, as on a replica behind the primary
+            return None if len(lookups) == 1 else first(queryset)
+
+        # Reads are routed to a replica, as by ReplicaRouter in a request
+        with mock.patch.object(QuerySet, "first", lagging_first), mock.patch.object(
+            router, "db_for_read", return_value="replica_0"
+        ):
+            user, created = User.objects.get_or_create_for_signup(self.phone)
+
+        self.assertFalse(created)
+        self.assertEqual(user.pk, existing.pk)
+        self.assertEqual(lookups, ["replica_0", "default"])
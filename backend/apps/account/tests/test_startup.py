@@ -0,0 +1,18 @@
+from django.test import SimpleTestCase
+
+from config.api.perf import load_budgets
+from config.api.startup import LEAN_BOOT_ENV, profile_startup_median
+
+
+class ColdStartTest(SimpleTestCase):
+    """
+    Boots the serverless profile in fresh interpreters, like a cold start.
+    """
+
+    def test_lean_boot_within_budget(self):
+        budget = load_budgets()["cold_start_lean"]["boot_ms"]
+
+        profile = profile_startup_median(5, env=LEAN_BOOT_ENV)
+
+        self.assertLessEqual(profile.boot_ms, budget)
+
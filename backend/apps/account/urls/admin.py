@@ -0,0 +1,28 @@
+from django.urls import path
+
+from apps.account.views import admin
+
+app_name = "account_admin"
+
+urlpatterns = [
+    path(
+        "export/users/",
+        admin.AdminUserExportView.as_view(),
+        name="account_admin_export_users",
+    ),
+    path(
+        "users/bulk-provision/",
+        admin.AdminUserBulkProvisionView.as_view(),
+        name="account_admin_users_bulk_provision",
+    ),
+    path(
+        "users/<int:user_id>/revoke-sessions/",
+        admin.AdminUserRevokeSessionsView.as_view(),
+        name="account_admin_users_revoke_sessions",
+    ),
+    path(
+        "users/<int:user_id>/ban/",
+        admin.AdminUserBanView.as_view(),
+        name="account_admin_users_ban",
+    ),
+]
@@ -39,6 +39,11 @@ urlpatterns = [
         frontend.AccountUserLogoutView.as_view(),
         name="account_user_logout",
     ),
+    path(
+        "authenticate/logout-all/",
+        frontend.AccountUserLogoutAllView.as_view(),
+        name="account_user_logout_all",
+    ),
     # Endpoints for user forget password flow
     path(
         "authenticate/forget-password/check/",
@@ -0,0 +1,91 @@
+"""
+Password Reset Tokens
+
+The forgot-password flow hands out a reset token after the OTP step and
+accepts it once in the reset step. settings.PASSWORD_RESET_TOKEN_MODE selects
+how tokens are kept:
+
+- "database": a UserPasswordResetToken row per token (UUID4).
+- "signed": a stateless token signed with SECRET_KEY, bound to the user id
+  and an HMAC of the current password hash. It expires after
+  PASSWORD_RESET_TOKEN_MAX_AGE seconds and invalidates itself as soon as the
+  password changes, so no token table is written or read.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from apps.account.enums import PasswordResetTokenStatusEnum
+from apps.account.models import User, UserPasswordResetToken
+
+SIGNING_SALT = "apps.account.password_reset"
+
+
+@dataclass
+class ResetTokenCheck:
+    status: PasswordResetTokenStatusEnum
+    # The matching row in "database" mode, deleted by consume_reset_token
+    reset_token: Optional[UserPasswordResetToken] = None
+
+
+def is_signed_mode() -> bool:
+    return getattr(settings, "PASSWORD_RESET_TOKEN_MODE", "database") == "signed"
+
+
+def _password_fingerprint(user: User) -> str:
+    return salted_hmac(SIGNING_SALT, user.password).hexdigest()[:32]
+
+
+def make_reset_token(user: User) -> str:
+    if is_signed_mode():
+        return signing.dumps(
+            {"uid": user.pk, "pwd": _password_fingerprint(user)},
+            salt=SIGNING_SALT,
+            compress=True,
+        )
+    return str(UserPasswordResetToken.objects.for_user(user).create(user=user).token)
+
+
+def check_reset_token(user: User, token: str) -> ResetTokenCheck:
+    if is_signed_mode():
+        try:
+            payload = signing.loads(
+                token,
+                salt=SIGNING_SALT,
+                max_age=getattr(settings, "PASSWORD_RESET_TOKEN_MAX_AGE", 300),
+            )
+        except signing.SignatureExpired:
+            return ResetTokenCheck(PasswordResetTokenStatusEnum.EXPIRED)
+        except signing.BadSignature:
+            return ResetTokenCheck(PasswordResetTokenStatusEnum.INVALID)
+
+        if payload.get("uid") != user.pk or not constant_time_compare(
+            payload.get("pwd", ""), _password_fingerprint(user)
+        ):
+            return ResetTokenCheck(PasswordResetTokenStatusEnum.INVALID)
+        return ResetTokenCheck(PasswordResetTokenStatusEnum.VALID)
+
+    reset_token = (
+        UserPasswordResetToken.objects.for_user(user)
+        .filter(user=user, token=token)
+        .first()
+    )
+    if not reset_token:
+        return ResetTokenCheck(PasswordResetTokenStatusEnum.INVALID)
+    if reset_token.is_expired():
+        reset_token.delete()
+        return ResetTokenCheck(PasswordResetTokenStatusEnum.EXPIRED)
+    return ResetTokenCheck(PasswordResetTokenStatusEnum.VALID, reset_token)
+
+
+def consume_reset_token(check: ResetTokenCheck) -> None:
+    """
+    Invalidates the token after a successful reset. Signed tokens need no
+    work, the password change already invalidated them.
+    """
+    if check.reset_token:
+        check.reset_token.delete()
@@ -0,0 +1,181 @@
+"""
+Bulk User Provisioning
+
+Imports large phone lists (e.g. a partner's customer list) with a constant
+number of queries per batch instead of several queries per user:
+
+- phones are validated with `validate_phone` and normalized with
+  `User.format_phone`, exactly like BasePhoneValidationSerializer
+- existing phones are skipped with one lookup per batch, phones created
+  concurrently are skipped by the insert and counted as existing
+- referral codes are preallocated with `UserManager.generate_referral_codes`.
+  Rows whose code was taken concurrently are skipped by the insert too; one
+  lookup per batch tells them apart from existing phones and they are
+  retried with fresh codes, phones still missing are reported as failed
+- users are inserted with `bulk_create` and an unusable password, so no
+  per-user `save()` round trips are needed
+- with DB_SHARD_URLS every batch is split by shard, costing the queries
+  above once per shard
+
+Input is consumed lazily, only one batch is kept in memory at a time.
+"""
+
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from apps.account.models import User
+from config.api.sharding import generate_id, group_by_shard
+from config.libs.validators import validate_phone
+
+DEFAULT_BATCH_SIZE = 1000
+# Inserts of one batch, retries included, before its missing phones fail
+MAX_INSERT_ROUNDS = 3
+SAMPLE_SIZE = 20
+
+
+@dataclass
+class ProvisioningResult:
+    created: int = 0
+    existing: int = 0
+    invalid: int = 0
+    invalid_samples: List[str] = field(default_factory=list)
+    failed: int = 0
+    failed_samples: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, int | List[str]]:
+        return {
+            "created": self.created,
+            "existing": self.existing,
+            "invalid": self.invalid,
+            "invalid_samples": self.invalid_samples,
+            "failed": self.failed,
+            "failed_samples": self.failed_samples,
+        }
+
+
+def iter_phones_from_csv(file: TextIO, column: str = "phone") -> Iterator[str]:
+    """
+    Yields phone values from a CSV file.
+    If the file has no `column` header the first column of every row is used.
+    """
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    normalized = [value.strip().lower() for value in header]
+    if column in normalized:
+        index = normalized.index(column)
+    else:
+        # No header row, the first row is data
+        index = 0
+        if header:
+            yield header[0].strip()
+
+    for row in reader:
+        if len(row) > index:
+            yield row[index].strip()
+
+
+def _normalize_phone(phone: str) -> Optional[str]:
+    if not phone or not 10 <= len(phone) <= 11 or not validate_phone(phone):
+        return None
+    return User.format_phone(phone)
+
+
+def _create_users(
+    alias: Optional[str],
+    phones: List[str],
+    referral_from: Optional[str],
+    result: ProvisioningResult,
+) -> None:
+    """
+    Inserts the new `phones` of one batch on shard `alias` ("default" for None).
+    """
+    manager = User.objects.db_manager(alias)
+    existing = set(manager.filter(phone__in=phones).values_list("phone", flat=True))
+    result.existing += len(existing)
+    new_phones = [phone for phone in phones if phone not in existing]
+    if not new_phones:
+        return
+
+    unusable_password = make_password(None)
+    for _ in range(MAX_INSERT_ROUNDS):
+        referral_codes = dict(
+            zip(new_phones, manager.generate_referral_codes(len(new_phones)))
+        )
+        users = [
+            User(
+                # bulk_create skips save(), shard ids are assigned here
+                id=generate_id() if alias else None,
+                phone=phone,
+                referral_code=code,
+                referral_from=referral_from,
+                password=unusable_password,
+                is_active=True,
+            )
+            for phone, code in referral_codes.items()
+        ]
+        with transaction.atomic(using=alias):
+            # ignore_conflicts skips phones created concurrently since the
+            # lookup and rows whose referral code was taken meanwhile
+            manager.bulk_create(users, ignore_conflicts=True)
+            stored = dict(
+                manager.filter(phone__in=new_phones).values_list(
+                    "phone", "referral_code"
+                )
+            )
+
+        for phone, code in stored.items():
+            if code == referral_codes[phone]:
+                result.created += 1
+            else:
+                result.existing += 1
+        # Only skipped for their referral code, retried with new ones
+        new_phones = [phone for phone in new_phones if phone not in stored]
+        if not new_phones:
+            return
+
+    result.failed += len(new_phones)
+    missing = SAMPLE_SIZE - len(result.failed_samples)
+    result.failed_samples.extend(new_phones[:missing])
+
+
+def provision_users(
+    phones: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    referral_from: Optional[str] = None,
+) -> ProvisioningResult:
+    """
+    Creates users for every valid phone in `phones` that does not exist yet.
+    """
+    result = ProvisioningResult()
+    iterator = iter(phones)
+
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            break
+
+        batch: Dict[str, None] = {}
+        for raw in chunk:
+            phone = _normalize_phone(raw)
+            if phone is None:
+                result.invalid += 1
+                if len(result.invalid_samples) < SAMPLE_SIZE:
+                    result.invalid_samples.append(raw)
+                continue
+            if phone in batch:
+                result.existing += 1
+                continue
+            batch[phone] = None
+
+        for alias, shard_phones in group_by_shard(batch).items():
+            _create_users(alias, shard_phones, referral_from, result)
+
+    return result
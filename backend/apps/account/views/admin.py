@@ -0,0 +1,159 @@
+import io
+
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from apps.account.models import User
+from apps.account.serializers.admin import (
+    AdminStreamingExportSerializer,
+    AdminUserBanSerializer,
+    AdminUserBulkProvisionSerializer,
+)
+from apps.account.utils.provisioning import iter_phones_from_csv, provision_users
+from config.api.enums import ResponseMessage
+from config.api.export import streaming_export_response
+from config.api.response import BaseResponse
+from config.api.sharding import get_shard_aliases
+
+
+class AdminUserExportView(APIView):
+    """
+    Staff-only endpoint streaming the users table as NDJSON or CSV, merged
+    from every shard when sharding is enabled (user ids are unique across
+    shards, so `after_id` resumes work there too).
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = AdminStreamingExportSerializer
+    export_fields = (
+        "id",
+        "phone",
+        "first_name",
+        "last_name",
+        "referral_code",
+        "referral_from",
+        "is_active",
+        "is_staff",
+        "is_banned",
+        "banned_reason",
+        "last_online",
+        "date_joined",
+    )
+
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+        if not serializer.is_valid():
+            return BaseResponse(
+                status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
+            )
+
+        return streaming_export_response(
+            User.objects.all(),
+            fields=self.export_fields,
+            filename="users",
+            export_format=serializer.validated_data["file_format"],  # type: ignore
+            after_id=serializer.validated_data.get("after_id"),  # type: ignore
+            chunk_size=serializer.validated_data["chunk_size"],  # type: ignore
+            using=get_shard_aliases() or None,
+        )
+
+
+class AdminUserBulkProvisionView(APIView):
+    """
+    Staff-only endpoint creating users in bulk from an uploaded CSV of phones.
+    """
+
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    serializer_class = AdminUserBulkProvisionSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return BaseResponse(
+                status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
+            )
+
+        upload = serializer.validated_data["file"]  # type: ignore
+        # Decode the upload lazily so large files are never fully loaded
+        file = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        result = provision_users(
+            iter_phones_from_csv(file, column=serializer.validated_data["column"]),  # type: ignore
+            referral_from=serializer.validated_data.get("referral_from") or None,  # type: ignore
+        )
+
+        return BaseResponse(
+            data=result.as_dict(),
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
+
+
+class AdminUserRevokeSessionsView(APIView):
+    """
+    Staff-only endpoint revoking every session of a user (e.g. compromised account).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, user_id):
+        user = User.objects.locate("id", "security_stamp", pk=user_id)
+        if not user:
+            return BaseResponse(
+                status=status.HTTP_404_NOT_FOUND,
+                message=ResponseMessage.NOT_FOUND.value,
+            )
+
+        user.revoke_all_sessions()
+        return BaseResponse(
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
+
+
+class AdminUserBanView(APIView):
+    """
+    Staff-only endpoint banning (POST) or unbanning (DELETE) a user.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = AdminUserBanSerializer
+
+    def get_user(self, user_id):
+        return User.objects.locate("id", "is_banned", "banned_reason", pk=user_id)
+
+    def post(self, request, user_id):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return BaseResponse(
+                status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
+            )
+
+        user = self.get_user(user_id)
+        if not user:
+            return BaseResponse(
+                status=status.HTTP_404_NOT_FOUND,
+                message=ResponseMessage.NOT_FOUND.value,
+            )
+
+        user.ban(reason=serializer.validated_data.get("reason") or None)  # type: ignore
+        return BaseResponse(
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
+
+    def delete(self, request, user_id):
+        user = self.get_user(user_id)
+        if not user:
+            return BaseResponse(
+                status=status.HTTP_404_NOT_FOUND,
+                message=ResponseMessage.NOT_FOUND.value,
+            )
+
+        user.unban()
+        return BaseResponse(
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
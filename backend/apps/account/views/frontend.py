@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
@@ -14,14 +15,44 @@ from apps.account.serializers.front import (
     AuthenticateUserForgotPasswordOTPSerializer,
     AuthenticateUserForgotPasswordResetSerializer,
 )
-from apps.account.enums import AccountUserAuthenticateCheckSectionEnum
+from apps.account.enums import (
+    AccountUserAuthenticateCheckSectionEnum,
+    PasswordResetTokenStatusEnum,
+)
+from apps.account.utils.password_reset import (
+    check_reset_token,
+    consume_reset_token,
+    make_reset_token,
+)
 from config.api.enums import ResponseMessage
 from config.api.response import BaseResponse, JWTCookieResponse, clear_jwt_cookies
+from config.api.audit import audited
 from config.api.authentication import JWTCookieAuthentication
+from config.api.bans import is_user_banned
+from config.api.hashing import (
+    HashingPoolSaturated,
+    check_user_password,
+    set_user_password,
+)
+from config.api.jwt import CachedRefreshToken
+from config.api.metrics import (
+    LOGIN_OUTCOMES,
+    instrument,
+    login_attempts,
+    login_duration,
+)
+from config.api.lockout import (
+    get_client_ip,
+    lockout_response,
+    otp_attempts,
+    password_attempts,
+)
+from config.api.revocation import mark_refresh_token_revoked
+from config.api.sharding import db_for_phone
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from apps.sms_service.models import VerifyOTPService
+from apps.sms_service.utils.backends import get_otp_backend
 
 
 class AccountUserCurrentDetailView(RetrieveAPIView):
@@ -52,6 +83,7 @@ class AccountUserLogoutView(APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = AccountUserLogoutSerializer
 
+    @audited("logout")
     def post(self, request):
         """
         Handle user logout by deleting the refresh token.
@@ -72,8 +104,9 @@ class AccountUserLogoutView(APIView):
             # Blacklist the refresh token using Django Rest Framework SimpleJWT
             if refresh_token:
                 try:
-                    token = RefreshToken(refresh_token)
+                    token = CachedRefreshToken(refresh_token)
                     token.blacklist()
+                    mark_refresh_token_revoked(token["jti"], token["exp"])
                 except Exception as _:
                     pass
 
@@ -93,6 +126,28 @@ class AccountUserLogoutView(APIView):
             )
 
 
+class AccountUserLogoutAllView(APIView):
+    """
+    API endpoint for logging out the current user from all devices.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @audited("logout_all")
+    def post(self, request):
+        """
+        Revoke every outstanding token of the user by bumping the security stamp.
+        """
+        request.user.revoke_all_sessions()
+
+        response = BaseResponse(
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.AUTH_LOGOUT_SUCCESSFULLY.value,
+        )
+        clear_jwt_cookies(response)
+        return response
+
+
 class AccountUserAuthenticationCheckView(APIView):
     """
     API endpoint to check if a user exists based on their phone number.
@@ -110,7 +165,8 @@ class AccountUserAuthenticationCheckView(APIView):
             )
         phone = serializer.validated_data.get("phone")  # type: ignore
         user = (
-            User.objects.only(
+            User.objects.for_phone(phone)
+            .only(
                 "id",
                 "phone",
                 "password",
@@ -119,62 +175,38 @@ class AccountUserAuthenticationCheckView(APIView):
             .first()
         )
 
-        # Check for the latest OTP service record for phone authentication
-        otp_service = (
-            VerifyOTPService.objects.only(
-                "id", "usage", "to", "code", "expire_at", "is_used"
-            )
-            .filter(
-                to=phone,
-                usage=VerifyOTPService.VerifyOTPServiceUsageChoice.AUTHENTICATE,
-                is_used=False,
-            )
-            .order_by("-id")
-            .first()
-        )
-
-        # If user doesn't exist, send OTP for registration
-        if not user:
-            # Send OTP using SMS service
-            if not otp_service or otp_service.is_expired():
-                otp_service = VerifyOTPService.objects.create(
-                    to=phone,
-                    usage=VerifyOTPService.VerifyOTPServiceUsageChoice.AUTHENTICATE,
-                )
-                otp_service.send_otp()
-
+        # If user exists and has a usable password, use password authentication
+        if user and user.has_usable_password():
             return BaseResponse(
                 data={
-                    "section": AccountUserAuthenticateCheckSectionEnum.OTP.value,
+                    "section": AccountUserAuthenticateCheckSectionEnum.PASSWORD.value
                 },
                 status=status.HTTP_200_OK,
-                message=ResponseMessage.PHONE_OTP_SENT.value.format(phone=phone)
-                + f" - کد: {otp_service.code}",
+                message=ResponseMessage.SUCCESS.value,
             )
 
-        # If user exists and has a usable password, use password authentication
-        if user.has_usable_password():
+        # Otherwise make sure a valid OTP was sent (registration or OTP login)
+        code = get_otp_backend().issue(
+            phone, VerifyOTPService.VerifyOTPServiceUsageChoice.AUTHENTICATE
+        )
+
+        # If user doesn't exist, the OTP is used for registration
+        if not user:
             return BaseResponse(
                 data={
-                    "section": AccountUserAuthenticateCheckSectionEnum.PASSWORD.value
+                    "section": AccountUserAuthenticateCheckSectionEnum.OTP.value,
                 },
                 status=status.HTTP_200_OK,
-                message=ResponseMessage.SUCCESS.value,
-            )
-        if not otp_service or otp_service.is_expired():
-            # If user exists but no password, send OTP
-            otp_service = VerifyOTPService.objects.create(
-                to=phone,
-                usage=VerifyOTPService.VerifyOTPServiceUsageChoice.AUTHENTICATE,
+                message=ResponseMessage.PHONE_OTP_SENT.value.format(phone=phone)
+                + f" - کد: {code}",
             )
-            otp_service.send_otp()
 
         return BaseResponse(
             data={
                 "section": AccountUserAuthenticateCheckSectionEnum.OTP.value,
             },
             status=status.HTTP_200_OK,
-            message=ResponseMessage.SUCCESS.value + f" - کد: {otp_service.code}",
+            message=ResponseMessage.SUCCESS.value + f" - کد: {code}",
         )
 
 
@@ -187,6 +219,8 @@ class AccountUserAuthenticateOTPView(APIView):
     permission_classes = [AllowAny]
     serializer_class = AccountUserAuthenticateOTPSerialzer
 
+    @audited("login", method="otp")
+    @instrument(login_attempts, LOGIN_OUTCOMES, login_duration, method="otp")
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
@@ -198,40 +232,39 @@ class AccountUserAuthenticateOTPView(APIView):
         otp = serializer.validated_data.get("otp")  # type: ignore
         referral_code = serializer.validated_data.get("referral_code")  # type: ignore
 
-        # Verify OTP
-        otp_service = (
-            VerifyOTPService.objects.filter(
-                to=phone,
-                usage=VerifyOTPService.VerifyOTPServiceUsageChoice.AUTHENTICATE,
-                code=otp,
-            )
-            .order_by("-id")
-            .first()
-        )
+        ip = get_client_ip(request)
+        locked_for = otp_attempts.check(phone, ip)
+        if locked_for:
+            return lockout_response(locked_for)
+
+        with transaction.atomic(using=db_for_phone(phone)):
+            # Verify and consume the OTP. Only the database backend's UPDATE
+            # is rolled back if signup fails, cache writes (HMAC backend) are
+            # not transactional and the code stays spent
+            if not get_otp_backend().verify(
+                phone, VerifyOTPService.VerifyOTPServiceUsageChoice.AUTHENTICATE, otp
+            ):
+                otp_attempts.register_failure(phone, ip)
+                return BaseResponse(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    message=ResponseMessage.AUTH_WRONG_OTP.value,
+                )
 
-        if not otp_service or otp_service.is_expired():
-            return BaseResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message=ResponseMessage.AUTH_WRONG_OTP.value,
+            # Get or create user (single INSERT for new users)
+            user, _ = User.objects.for_phone(phone).get_or_create_for_signup(
+                phone=phone,
+                referral_from=referral_code if referral_code else None,
             )
+            request.audit_user_id = user.pk
+            if is_user_banned(user.pk):
+                return BaseResponse(
+                    status=status.HTTP_403_FORBIDDEN,
+                    message=ResponseMessage.AUTH_USER_BANNED.value,
+                )
 
-        # Get or create user
-        user, created = User.objects.get_or_create(
-            phone=phone,
-            defaults={
-                "is_active": True,
-                "referral_from": referral_code if referral_code else None,
-            },
-        )
-        if created:
-            user.handle_creation()
-
-        # Mark OTP as used
-        otp_service.is_used = True
-        otp_service.save(update_fields=["is_used"])
-
-        # Generate JWT tokens
-        tokens = user.generate_jwt_token()
+            otp_attempts.register_success(phone)
+            # Generate JWT tokens
+            tokens = user.generate_jwt_token()
 
         return JWTCookieResponse(
             data=None,  # No tokens in response body
@@ -249,6 +282,8 @@ class AccountUserAuthenticatePasswordView(APIView):
     permission_classes = [AllowAny]
     serializer_class = AccountUserAuthenticatePasswordSerialzer
 
+    @audited("login", method="password")
+    @instrument(login_attempts, LOGIN_OUTCOMES, login_duration, method="password")
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
@@ -259,21 +294,44 @@ class AccountUserAuthenticatePasswordView(APIView):
         phone = serializer.validated_data.get("phone")  # type: ignore
         password = serializer.validated_data.get("password")  # type: ignore
 
+        # Rejected before the user query and the password hash
+        ip = get_client_ip(request)
+        locked_for = password_attempts.check(phone, ip)
+        if locked_for:
+            return lockout_response(locked_for)
+
         # Get user
-        user = User.objects.filter(phone=phone).first()
+        user = User.objects.for_phone(phone).filter(phone=phone).first()
+        request.audit_user_id = user.pk if user else None
         if not user or not password:
+            password_attempts.register_failure(phone, ip)
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST,
                 message=ResponseMessage.AUTH_WRONG_PASSWORD.value,
             )
 
-        # Check password
-        if not user.check_password(password):
+        # Check password on the hashing pool
+        try:
+            is_correct = check_user_password(user, password)
+        except HashingPoolSaturated:
+            return BaseResponse(
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                message=ResponseMessage.SERVICE_UNAVAILABLE.value,
+            )
+        if not is_correct:
+            password_attempts.register_failure(phone, ip)
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST,
                 message=ResponseMessage.AUTH_WRONG_PASSWORD.value,
             )
 
+        password_attempts.register_success(phone)
+        if is_user_banned(user.pk):
+            return BaseResponse(
+                status=status.HTTP_403_FORBIDDEN,
+                message=ResponseMessage.AUTH_USER_BANNED.value,
+            )
+
         # Generate JWT tokens
         tokens = user.generate_jwt_token()
 
@@ -294,6 +352,7 @@ class AccountUserForgotPasswordCheckView(APIView):
     permission_classes = [AllowAny]
     serializer_class = AuthenticateUserForgotPasswordCheckSerializer
 
+    @audited("password_reset_request")
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
@@ -301,27 +360,22 @@ class AccountUserForgotPasswordCheckView(APIView):
                 status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
             )
         phone = serializer.validated_data.get("phone")  # type: ignore
-        user = User.objects.filter(phone=phone).first()
+        user = User.objects.for_phone(phone).filter(phone=phone).first()
         if not user:
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST,
                 message="کاربری با این شماره پیدا نشد.",
             )
-        otp_service, _ = VerifyOTPService.objects.get_or_create(
-            to=phone,
-            usage=VerifyOTPService.VerifyOTPServiceUsageChoice.RESET_PASSWORD,
+        request.audit_user_id = user.pk
+        code = get_otp_backend().issue(
+            phone,
+            VerifyOTPService.VerifyOTPServiceUsageChoice.RESET_PASSWORD,
+            resend=True,
         )
-        if otp_service.is_expired():
-            otp_service.delete()
-            otp_service = VerifyOTPService.objects.create(
-                to=phone,
-                usage=VerifyOTPService.VerifyOTPServiceUsageChoice.RESET_PASSWORD,
-            )
-        otp_service.send_otp()
         return BaseResponse(
             status=status.HTTP_200_OK,
             message=ResponseMessage.PHONE_OTP_SENT.value.format(phone=phone)
-            + f" - کد: {otp_service.code}",
+            + f" - کد: {code}",
         )
 
 
@@ -334,6 +388,7 @@ class AccountUserForgetPasswordOTPView(APIView):
     permission_classes = [AllowAny]
     serializer_class = AuthenticateUserForgotPasswordOTPSerializer
 
+    @audited("password_reset_verify")
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
@@ -342,34 +397,31 @@ class AccountUserForgetPasswordOTPView(APIView):
             )
         phone = serializer.validated_data.get("phone")  # type: ignore
         otp = serializer.validated_data.get("otp")  # type: ignore
-        user = User.objects.filter(phone=phone).first()
+        ip = get_client_ip(request)
+        locked_for = otp_attempts.check(phone, ip)
+        if locked_for:
+            return lockout_response(locked_for)
+
+        user = User.objects.for_phone(phone).filter(phone=phone).first()
         if not user:
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST,
                 message="کاربری با این شماره پیدا نشد.",
             )
-        otp_service = (
-            VerifyOTPService.objects.filter(
-                to=phone,
-                usage=VerifyOTPService.VerifyOTPServiceUsageChoice.RESET_PASSWORD,
-                code=otp,
-            )
-            .order_by("-id")
-            .first()
-        )
-        if not otp_service or otp_service.is_expired():
+        request.audit_user_id = user.pk
+        # OTP بعد از استفاده مصرف می‌شود
+        if not get_otp_backend().verify(
+            phone, VerifyOTPService.VerifyOTPServiceUsageChoice.RESET_PASSWORD, otp
+        ):
+            otp_attempts.register_failure(phone, ip)
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST,
                 message=ResponseMessage.AUTH_WRONG_OTP.value,
             )
-        # حذف OTP بعد از استفاده
-        otp_service.delete()
+        otp_attempts.register_success(phone)
         # ساخت توکن ریست پسورد
-        from apps.account.models import UserPasswordResetToken
-
-        reset_token = UserPasswordResetToken.objects.create(user=user)
         return BaseResponse(
-            data={"token": str(reset_token.token)},
+            data={"token": make_reset_token(user)},
             status=status.HTTP_200_OK,
         )
 
@@ -383,6 +435,7 @@ class AccountUserForgetPasswordResetView(APIView):
     permission_classes = [AllowAny]
     serializer_class = AuthenticateUserForgotPasswordResetSerializer
 
+    @audited("password_reset")
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if not serializer.is_valid():
@@ -393,21 +446,18 @@ class AccountUserForgetPasswordResetView(APIView):
         token = serializer.validated_data.get("token")  # type: ignore
         password = serializer.validated_data.get("password")  # type: ignore
         confirm_password = serializer.validated_data.get("confirm_password")  # type: ignore
-        user = User.objects.filter(phone=phone).first()
+        user = User.objects.for_phone(phone).filter(phone=phone).first()
         if not user:
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
             )
-        from apps.account.models import UserPasswordResetToken
-
-        try:
-            reset_token = UserPasswordResetToken.objects.get(user=user, token=token)
-        except UserPasswordResetToken.DoesNotExist:
+        request.audit_user_id = user.pk
+        token_check = check_reset_token(user, token)
+        if token_check.status == PasswordResetTokenStatusEnum.INVALID:
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
             )
-        if reset_token.is_expired():
-            reset_token.delete()
+        if token_check.status == PasswordResetTokenStatusEnum.EXPIRED:
             return BaseResponse(
                 status=status.HTTP_400_BAD_REQUEST, message="توکن منقضی شده است."
             )
@@ -422,9 +472,15 @@ class AccountUserForgetPasswordResetView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
                 message=ResponseMessage.PASSWORDS_DO_NOT_MATCH.value,
             )
-        user.set_password(password)
+        try:
+            set_user_password(user, password)
+        except HashingPoolSaturated:
+            return BaseResponse(
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                message=ResponseMessage.SERVICE_UNAVAILABLE.value,
+            )
         user.save()
-        reset_token.delete()
+        consume_reset_token(token_check)
         return BaseResponse(
             status=status.HTTP_200_OK,
             message="رمز عبور با موفقیت تغییر کرد.",
@@ -1,8 +1,19 @@
 from datetime import timedelta
 from random import randint
-from django.db import models
+from django.db import models, router
 from django.utils.timezone import now
 
+from config.api.sharding import shard_for_phone
+
+
+class VerifyOTPServiceManager(models.Manager):
+    def for_phone(self, phone):
+        """
+        Manager bound to the shard of `phone`, this manager when not sharded.
+        """
+        alias = shard_for_phone(phone)
+        return self.db_manager(alias) if alias else self
+
 
 class VerifyOTPService(models.Model):
     """
@@ -52,6 +63,8 @@ class VerifyOTPService(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     sent_at = models.DateTimeField(null=True, blank=True)
 
+    objects = VerifyOTPServiceManager()
+
     class Meta:
         db_table = "sms_service_verify_otp"
 
@@ -71,6 +84,21 @@ class VerifyOTPService(models.Model):
     def is_expired(self):
         return self.expire_at < now()
 
+    def consume(self) -> bool:
+        """
+        Marks the OTP as used with a single conditional UPDATE.
+        Returns False if it was already used by a concurrent request.
+        """
+        updated = (
+            VerifyOTPService.objects.using(
+                router.db_for_write(VerifyOTPService, instance=self)
+            )
+            .filter(pk=self.pk, is_used=False)
+            .update(is_used=True)
+        )
+        self.is_used = True
+        return bool(updated)
+
     def mark_as_sent_success(self, result_data=None):
         """Mark OTP as successfully sent."""
         self.is_sent = True
@@ -89,18 +117,21 @@ class VerifyOTPService(models.Model):
         self.save(update_fields=["is_sent", "send_status", "error_message"])
 
     def send_otp(self):
-        """Send OTP if not expired."""
+        """
+        Send OTP if not expired.
+        settings.SMS_SERVICE_SENDER (dotted path) overrides the sender,
+        e.g. with the local stub used by the performance harness.
+        """
         if not self.is_expired():
-            from apps.sms_service.utils.otp import sms_service_send_otp
-            print(f"One Time Code: {self.code}")
-            # Todo uncomment
-            # return sms_service_send_otp(self.to, self.code)
+            from apps.sms_service.utils.otp import dispatch_otp
+
+            return dispatch_otp(self.to, self.code)
         return False
 
     @classmethod
     def get_by_phone_and_code(cls, phone, code):
         """Get OTP record by phone and code."""
         try:
-            return cls.objects.get(to=phone, code=code, is_used=False)
+            return cls.objects.for_phone(phone).get(to=phone, code=code, is_used=False)
         except cls.DoesNotExist:
             return None
@@ -0,0 +1,183 @@
+"""
+OTP Backends
+
+Views issue and verify OTP codes through `get_otp_backend()` so the engine
+can be switched with settings.OTP_BACKEND:
+
+- DatabaseOTPBackend (default): stores every code as a VerifyOTPService row.
+- HMACOTPBackend: stateless TOTP-style codes derived from
+  HMAC(secret, phone, usage, time step). Verification is a pure computation
+  plus a small cache-based attempt / replay guard, no database row is
+  written or read. The guard only holds across workers with a shared
+  cache, so this backend refuses to start without CACHE_URL.
+"""
+
+import hashlib
+import hmac
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from apps.sms_service.models import VerifyOTPService
+from apps.sms_service.utils.otp import dispatch_otp
+from config.api.cache import require_shared_cache
+
+
+class BaseOTPBackend(ABC):
+    @abstractmethod
+    def issue(self, phone: str, usage: str, resend: bool = False) -> str:
+        """
+        Makes sure `phone` has a valid code for `usage` and returns it.
+        A new code is sent when there is none; `resend` sends it again
+        even if a valid code was already sent.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def verify(self, phone: str, usage: str, code: str) -> bool:
+        """
+        Checks `code` and consumes it, a code can only be verified once.
+        """
+        raise NotImplementedError
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    def issue(self, phone: str, usage: str, resend: bool = False) -> str:
+        otp_service = (
+            VerifyOTPService.objects.for_phone(phone)
+            .only("id", "usage", "to", "code", "expire_at")
+            .filter(to=phone, usage=usage, is_used=False)
+            .order_by("-id")
+            .first()
+        )
+        if otp_service and not otp_service.is_expired():
+            if resend:
+                otp_service.send_otp()
+            return otp_service.code
+
+        # Expired codes are removed before a new one is created
+        if otp_service:
+            otp_service.delete()
+        otp_service = VerifyOTPService.objects.for_phone(phone).create(
+            to=phone, usage=usage
+        )
+        otp_service.send_otp()
+        return otp_service.code
+
+    def verify(self, phone: str, usage: str, code: str) -> bool:
+        otp_service = (
+            VerifyOTPService.objects.for_phone(phone)
+            .only("id", "expire_at", "is_used")
+            .filter(to=phone, usage=usage, code=code)
+            .order_by("-id")
+            .first()
+        )
+        if not otp_service or otp_service.is_expired():
+            return False
+        # Conditional UPDATE, fails if a concurrent request consumed it
+        return otp_service.consume()
+
+
+class HMACOTPBackend(BaseOTPBackend):
+    """
+    Settings:
+        OTP_HMAC_SECRET: server secret, defaults to SECRET_KEY
+        OTP_HMAC_STEP: seconds per time step (code lifetime)
+        OTP_HMAC_WINDOW: number of previous steps still accepted
+        OTP_HMAC_MAX_ATTEMPTS: wrong guesses allowed per phone and usage
+    """
+
+    def __init__(self):
+        # Per-process attempt counters and replay markers would let every
+        # worker accept the same code and allow max_attempts guesses each
+        require_shared_cache("HMACOTPBackend")
+        secret = getattr(settings, "OTP_HMAC_SECRET", None) or settings.SECRET_KEY
+        self.secret = secret.encode("utf-8")
+        self.step = getattr(settings, "OTP_HMAC_STEP", 240)
+        self.window = getattr(settings, "OTP_HMAC_WINDOW", 1)
+        self.max_attempts = getattr(settings, "OTP_HMAC_MAX_ATTEMPTS", 5)
+
+    def current_step(self) -> int:
+        return int(time.time() // self.step)
+
+    def generation(self, phone: str, usage: str) -> int:
+        """
+        Bumped after every successful verification so the next code for the
+        same phone differs even within the same time step.
+        """
+        return cache.get(f"otp:generation:{usage}:{phone}", 0)
+
+    def generate(self, phone: str, usage: str, step: int, generation: int) -> str:
+        """
+        RFC 4226 style dynamic truncation, mapped to a 4-digit code.
+        """
+        message = f"{phone}:{usage}:{step}:{generation}".encode("utf-8")
+        digest = hmac.new(self.secret, message, hashlib.sha256).digest()
+        offset = digest[-1] & 0x0F
+        value = int.from_bytes(digest[offset : offset + 4], "big") & 0x7FFFFFFF
+        return str(1000 + value % 9000)
+
+    def issue(self, phone: str, usage: str, resend: bool = False) -> str:
+        step = self.current_step()
+        generation = self.generation(phone, usage)
+        code = self.generate(phone, usage, step, generation)
+        # Send once per code unless a resend is requested
+        sent_key = f"otp:sent:{usage}:{phone}:{step}:{generation}"
+        if cache.add(sent_key, 1, self.step) or resend:
+            dispatch_otp(phone, code)
+        return code
+
+    def matching_step(
+        self, phone: str, usage: str, code: str, generation: int
+    ) -> Optional[int]:
+        current = self.current_step()
+        for step in range(current, current - self.window - 1, -1):
+            expected = self.generate(phone, usage, step, generation)
+            if hmac.compare_digest(expected, code):
+                return step
+        return None
+
+    def verify(self, phone: str, usage: str, code: str) -> bool:
+        attempts_key = f"otp:attempts:{usage}:{phone}"
+        ttl = self.step * (self.window + 1)
+        cache.add(attempts_key, 0, ttl)
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            # Expired between add and incr
+            cache.set(attempts_key, 1, ttl)
+            attempts = 1
+        if attempts > self.max_attempts:
+            return False
+
+        generation = self.generation(phone, usage)
+        step = self.matching_step(phone, usage, code, generation)
+        if step is None:
+            return False
+
+        # Replay guard, only the first verification of a code succeeds
+        if not cache.add(f"otp:used:{usage}:{phone}:{step}:{generation}", 1, ttl):
+            return False
+        cache.set(f"otp:generation:{usage}:{phone}", generation + 1, ttl)
+        cache.delete(attempts_key)
+        return True
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path: str) -> BaseOTPBackend:
+    return import_string(path)()
+
+
+def get_otp_backend() -> BaseOTPBackend:
+    return _load_backend(
+        getattr(
+            settings,
+            "OTP_BACKEND",
+            "apps.sms_service.utils.backends.DatabaseOTPBackend",
+        )
+    )
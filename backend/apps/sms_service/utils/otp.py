@@ -1,7 +1,18 @@
 from django.conf import settings
+from django.utils.module_loading import import_string
 import json
+import logging
+from urllib.error import URLError
+from urllib.request import Request, urlopen
 
-import requests
+from apps.sms_service.models import VerifyOTPService
+from config.api.audit import audit_log
+from config.api.metrics import otp_send_results
+
+logger = logging.getLogger("django")
+
+# otp_send_results status when no sender is configured
+NOT_SENT = "NOT_SENT"
 
 
 def sms_service_send_otp(phone: str, otp: str) -> bool:
@@ -18,13 +29,37 @@ def sms_service_send_otp(phone: str, otp: str) -> bool:
             "pattern": pattern,
             "callback_url": f"{site_url}/api/admin/sms-service/result/otp/",
         }
-    )
+    ).encode("utf-8")
     headers = {"Content-Type": "application/json", "Authorization": secret_key}
 
+    # urllib instead of requests keeps the HTTP client stack out of cold starts
     try:
-        response = requests.post(f"{url}/api/", data=data, headers=headers)
-        response.raise_for_status()
-        return True
-    except requests.RequestException as e:
-        print(f"Error sending OTP: {e}")
+        with urlopen(Request(f"{url}/api/", data=data, headers=headers), timeout=10):
+            return True
+    except (URLError, TimeoutError) as e:
+        logger.warning("Error sending OTP: %s", e)
         return False
+
+
+def dispatch_otp(phone: str, otp: str) -> bool:
+    """
+    Sends an OTP code through settings.SMS_SERVICE_SENDER when configured
+    (e.g. the local stub), otherwise only logs it at debug level.
+    """
+    sender = getattr(settings, "SMS_SERVICE_SENDER", None)
+    if sender:
+        sent = import_string(sender)(phone, otp)
+        audit_log.record("otp_send", "sent" if sent else "failed", phone=phone)
+        otp_send_results.inc(
+            status=VerifyOTPService.SendStatus.SUCCESS
+            if sent
+            else VerifyOTPService.SendStatus.FAILED
+        )
+        return sent
+
+    logger.debug("One Time Code for %s: %s", phone, otp)
+    audit_log.record("otp_send", "not_sent", phone=phone)
+    otp_send_results.inc(status=NOT_SENT)
+    # Todo uncomment
+    # return sms_service_send_otp(phone, otp)
+    return False
@@ -0,0 +1,57 @@
+"""
+Local SMS sender stub.
+
+Records sent OTP codes instead of calling the SMS provider. Enable it with:
+
+    SMS_SERVICE_SENDER = "apps.sms_service.utils.stub.stub_send_otp"
+
+Codes are kept in memory for in-process callers (the perf_budget harness).
+If SMS_SERVICE_STUB_OUTBOX points to a directory, every code is also written
+to ``<outbox>/<phone>`` so that other processes, like the loadtest command,
+can read it while the server runs.
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+from django.conf import settings
+
+_lock = threading.Lock()
+outbox: Dict[str, str] = {}
+
+
+def stub_send_otp(phone: str, otp: str) -> bool:
+    with _lock:
+        outbox[phone] = otp
+
+    directory = getattr(settings, "SMS_SERVICE_STUB_OUTBOX", None)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        path = os.path.join(directory, phone)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            file.write(otp)
+        os.replace(f"{path}.tmp", path)
+    return True
+
+
+def get_last_otp(phone: str) -> Optional[str]:
+    with _lock:
+        return outbox.get(phone)
+
+
+def read_outbox_otp(directory: str, phone: str) -> Optional[str]:
+    """
+    Reads the last code written for `phone` by another process.
+    """
+    try:
+        with open(os.path.join(directory, phone), encoding="utf-8") as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def clear_outbox() -> None:
+    with _lock:
+        outbox.clear()
@@ -6,6 +6,7 @@ from apps.telegram_service.utils.messages.main import (
     TGServiceAdminTOPICS,
 )
 from apps.sms_service.models import VerifyOTPService
+from config.api.metrics import otp_delivery_reports
 
 
 class OTPResultView(APIView):
@@ -44,6 +45,9 @@ class OTPResultView(APIView):
             # Find the OTP record
             otp_record = VerifyOTPService.get_by_phone_and_code(phone, code)
 
+            if result_status in ("success", "failed"):
+                otp_delivery_reports.inc(status=result_status)
+
             if result_status == "success":
                 # Update OTP record if found
                 if otp_record:
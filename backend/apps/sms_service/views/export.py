@@ -0,0 +1,58 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from apps.account.serializers.admin import AdminStreamingExportSerializer
+from apps.sms_service.models import VerifyOTPService
+from config.api.enums import ResponseMessage
+from config.api.export import streaming_export_response
+from config.api.response import BaseResponse
+from config.api.sharding import is_sharding_enabled
+
+
+class OTPExportView(APIView):
+    """
+    Staff-only endpoint streaming the OTP audit history as NDJSON or CSV.
+
+    Kept out of `views.admin`, whose Telegram alerts are not part of this
+    tree. The codes themselves are never exported. OTP ids are only unique
+    per shard, so the export can't be merged or resumed across shards and
+    is refused when sharding is enabled.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = AdminStreamingExportSerializer
+    export_fields = (
+        "id",
+        "to",
+        "usage",
+        "is_sent",
+        "send_status",
+        "is_used",
+        "error_message",
+        "expire_at",
+        "created_at",
+        "sent_at",
+    )
+
+    def get(self, request):
+        if is_sharding_enabled():
+            return BaseResponse(
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+                message=ResponseMessage.ACTION_NOT_ALLOWED.value,
+            )
+
+        serializer = self.serializer_class(data=request.query_params)
+        if not serializer.is_valid():
+            return BaseResponse(
+                status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
+            )
+
+        return streaming_export_response(
+            VerifyOTPService.objects.all(),
+            fields=self.export_fields,
+            filename="sms_service_verify_otp",
+            export_format=serializer.validated_data["file_format"],  # type: ignore
+            after_id=serializer.validated_data.get("after_id"),  # type: ignore
+            chunk_size=serializer.validated_data["chunk_size"],  # type: ignore
+        )
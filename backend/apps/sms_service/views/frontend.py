@@ -5,8 +5,9 @@ from rest_framework.views import APIView
 
 from apps.account.models import User
 from config.api.enums import ResponseMessage
+from config.api.metrics import OTP_REQUEST_OUTCOMES, instrument, otp_requests
 from config.api.response import BaseResponse
-from apps.sms_service.models import VerifyOTPService
+from apps.sms_service.utils.backends import get_otp_backend
 from apps.sms_service.serializers.front import VerificationRequestOTPSerializer
 
 
@@ -22,6 +23,7 @@ class VerificationRequestOTPView(APIView):
     permission_classes = [AllowAny]
     serializer_class = VerificationRequestOTPSerializer
 
+    @instrument(otp_requests, OTP_REQUEST_OUTCOMES)
     def post(self, request, _=None):
         serializer = self.serializer_class(data=request.data)
 
@@ -34,36 +36,11 @@ class VerificationRequestOTPView(APIView):
         phone = serializer.validated_data.get("phone")  # type: ignore
         otp_usage = serializer.validated_data.get("otp_usage")  # type: ignore
 
-        # Check for existing OTP service record
-        otp_service = (
-            VerifyOTPService.objects.only(
-                "id",
-                "to",
-                "usage",
-                "code",
-            )
-            .filter(to=phone, usage=otp_usage, is_used=False)
-            .order_by("-id")
-            .first()
-        )
-        # If OTP service exists and is not expired, return success
-        if otp_service and not otp_service.is_expired():
-            return BaseResponse(
-                status=status.HTTP_200_OK,
-                message=ResponseMessage.PHONE_OTP_SENT.value.format(phone=phone)
-                + f" - کد: {otp_service.code}",
-            )
-
-        # If OTP service exists but is expired, delete it
-        if otp_service and otp_service.is_expired():
-            otp_service.delete()
-
-        # Create a new OTP service and send the OTP
-        new_otp_service = VerifyOTPService.objects.create(to=phone, usage=otp_usage)
-        new_otp_service.send_otp()
+        # Reuses a valid code or creates and sends a new one
+        code = get_otp_backend().issue(phone, otp_usage)
 
         return BaseResponse(
             status=status.HTTP_200_OK,
             message=ResponseMessage.PHONE_OTP_SENT.value.format(phone=phone)
-            + f" - کد: {new_otp_service.code}",
+            + f" - کد: {code}",
         )
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "config.api"
+
+    def ready(self):
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+
+        from config.api.database import on_connection_created, on_request_started
+        from config.api.lockout import check_lockout_cache
+
+        request_started.connect(on_request_started)
+        connection_created.connect(on_connection_created)
+        check_lockout_cache()
@@ -0,0 +1,283 @@
+"""
+Auth Audit Log
+
+Append-only log of logins, failed attempts, logouts, password resets and
+OTP sends (user id, phone, method, outcome, IP and user agent).
+
+`audit_log.record()` only appends a dict to an in-memory buffer; a
+background thread per worker writes the buffer in batches of BATCH_SIZE
+every FLUSH_INTERVAL seconds (sooner once a batch is full) to the
+configured SINK:
+
+- "database": bulk inserts into AuthAuditEvent on "default".
+  `compact_audit_log` rolls events older than RETENTION_DAYS into
+  AuthAuditDailyCount and drops counts older than SUMMARY_RETENTION_DAYS.
+- "file": NDJSON lines in ``FILE.<pid>``, one file per process since a
+  rotating file can't be shared. It is rotated every FILE_MAX_BYTES into
+  FILE_BACKUP_COUNT gzipped backups and once more when the process exits;
+  `compact_audit_log` also deletes backups older than RETENTION_DAYS.
+
+When the buffer holds BUFFER_SIZE events (the sink is down or too slow)
+the oldest ones are dropped and counted in `audit_log.dropped`, requests
+never wait for the audit log. What is left in the buffer is written when
+the process (or gunicorn worker) exits. Configured with AUTH_AUDIT in
+settings.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from config.api.enums import ResponseMessage
+from config.api.lockout import get_client_ip
+from config.api.metrics import response_outcome
+
+logger = logging.getLogger("django")
+
+# Field sizes of AuthAuditEvent
+PHONE_MAX_LENGTH = 15
+USER_AGENT_MAX_LENGTH = 255
+
+# Audit outcome of a BaseResponse, by message
+AUDIT_OUTCOMES = {
+    ResponseMessage.AUTH_LOGIN_SUCCESSFULLY.value: "success",
+    ResponseMessage.AUTH_LOGOUT_SUCCESSFULLY.value: "success",
+    ResponseMessage.AUTH_WRONG_OTP.value: "wrong_otp",
+    ResponseMessage.AUTH_WRONG_PASSWORD.value: "wrong_password",
+    ResponseMessage.PASSWORDS_DO_NOT_MATCH.value: "passwords_do_not_match",
+    ResponseMessage.AUTH_USER_BANNED.value: "banned",
+    ResponseMessage.SERVICE_UNAVAILABLE.value: "saturated",
+    ResponseMessage.FAILED.value: "invalid",
+}
+
+
+class DatabaseAuditSink:
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        from apps.account.models import AuthAuditEvent
+
+        try:
+            AuthAuditEvent.objects.bulk_create(
+                [AuthAuditEvent(**event) for event in events]
+            )
+        finally:
+            # The flush thread does not go through request_finished
+            connections.close_all()
+
+    def close(self) -> None:
+        pass
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class FileAuditSink:
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Workers rotating one shared file would rename it under each other
+        path = f"{path}.{os.getpid()}"
+        self.handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        # Compacts every rotated file
+        self.handler.namer = lambda name: name + ".gz"
+        self.handler.rotator = _gzip_rotator
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        for event in events:
+            line = json.dumps({**event, "created_at": event["created_at"].isoformat()})
+            self.handler.emit(logging.makeLogRecord({"msg": line}))
+
+    def close(self) -> None:
+        # Only gzipped backups of an exited process are left behind
+        path = self.handler.baseFilename
+        if self.handler.backupCount and os.path.getsize(path):
+            self.handler.doRollover()
+        self.handler.close()
+        if self.handler.backupCount:
+            os.remove(path)
+
+
+class AuditLog:
+    def __init__(self):
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+        # Buffered events of runserver and management commands
+        atexit.register(self.close)
+
+    def _reset(self) -> None:
+        # A forked worker starts with an empty buffer and its own thread
+        self._lock = threading.Lock()
+        self._buffer: deque = deque()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._sink = None
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {
+            "ENABLED": True,
+            "SINK": "database",
+            "FILE": "auth-audit.ndjson",
+            "FILE_MAX_BYTES": 50 * 1024 * 1024,
+            "FILE_BACKUP_COUNT": 10,
+            "BUFFER_SIZE": 10000,
+            "BATCH_SIZE": 500,
+            "FLUSH_INTERVAL": 2.0,
+            "RETENTION_DAYS": 90,
+            "SUMMARY_RETENTION_DAYS": 730,
+            **getattr(settings, "AUTH_AUDIT", {}),
+        }
+
+    def get_sink(self):
+        if self._sink is None:
+            config = self.config
+            if config["SINK"] == "file":
+                self._sink = FileAuditSink(
+                    config["FILE"],
+                    config["FILE_MAX_BYTES"],
+                    config["FILE_BACKUP_COUNT"],
+                )
+            else:
+                self._sink = DatabaseAuditSink()
+        return self._sink
+
+    def record(
+        self,
+        event: str,
+        outcome: str,
+        *,
+        request=None,
+        phone: Optional[str] = None,
+        user_id: Optional[int] = None,
+        method: str = "",
+    ) -> None:
+        config = self.config
+        if not config["ENABLED"]:
+            return
+
+        ip = user_agent = ""
+        if request is not None:
+            ip = get_client_ip(request) or ""
+            user_agent = request.META.get("HTTP_USER_AGENT", "")
+        if len(self._buffer) >= config["BUFFER_SIZE"]:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append(
+            {
+                "created_at": datetime.now(timezone.utc),
+                "event": event,
+                "method": method,
+                "outcome": outcome,
+                "user_id": user_id,
+                "phone": str(phone or "")[:PHONE_MAX_LENGTH],
+                "ip": ip,
+                "user_agent": user_agent[:USER_AGENT_MAX_LENGTH],
+            }
+        )
+
+        if self._flusher is None:
+            self._start_flusher()
+        elif len(self._buffer) >= config["BATCH_SIZE"]:
+            self._wakeup.set()
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._run, name="auth-audit-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.config["FLUSH_INTERVAL"])
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Writes every buffered event, returns how many were written.
+        """
+        written = 0
+        batch_size = self.config["BATCH_SIZE"]
+        # One writer at a time, e.g. the flush thread and worker exit
+        with self._lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < batch_size:
+                    batch.append(self._buffer.popleft())
+                try:
+                    self.get_sink().write(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.warning(
+                        "Auth audit flush failed, %s events lost: %s", len(batch), e
+                    )
+                    continue
+                written += len(batch)
+        return written
+
+    def close(self) -> None:
+        """
+        Writes the buffered events and closes the sink, run when the
+        process exits.
+        """
+        self.flush()
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+
+audit_log = AuditLog()
+
+
+def audited(event: str, method: str = "", outcomes: Dict[str, str] = AUDIT_OUTCOMES):
+    """
+    View method decorator recording the response as an `event` audit entry.
+
+    The phone comes from the request data, the user from `request.user`
+    when authenticated, or from `request.audit_user_id` set by the view.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            response = view_method(view, request, *args, **kwargs)
+            user_id = getattr(request, "audit_user_id", None)
+            user = getattr(request, "user", None)
+            if user_id is None and user is not None and user.is_authenticated:
+                user_id = user.pk
+            data = request.data if hasattr(request.data, "get") else {}
+            phone = data.get("phone") or getattr(user, "phone", None)
+            audit_log.record(
+                event,
+                response_outcome(response, outcomes),
+                request=request,
+                phone=phone,
+                user_id=user_id,
+                method=method,
+            )
+            return response
+
+        return wrapper
+
+    return decorator
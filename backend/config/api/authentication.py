@@ -1,5 +1,15 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from config.api.bans import is_user_banned
+from config.api.revocation import is_security_stamp_valid
+from config.api.sharding import shard_for_token, use_shard
+from config.api.timing import timed
 
 
 class JWTCookieAuthentication(JWTAuthentication):
@@ -7,6 +17,7 @@ class JWTCookieAuthentication(JWTAuthentication):
     Custom JWT authentication that reads tokens from cookies instead of headers.
     """
 
+    @timed("auth")
     def authenticate(self, request):
         """
         Returns a two-tuple of `User` and token if a valid signature has been
@@ -26,3 +37,17 @@ class JWTCookieAuthentication(JWTAuthentication):
         except TokenError:
             # If cookie token is invalid, try header-based authentication
             return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        """
+        Rejects tokens minted before the user's security stamp was bumped and
+        tokens of banned users. Neither check costs an extra query.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if is_user_banned(user_id):
+            raise AuthenticationFailed("User is banned", code="user_banned")
+        with use_shard(shard_for_token(validated_token)):
+            user = super().get_user(validated_token)
+        if not is_security_stamp_valid(validated_token, user.security_stamp):
+            raise InvalidToken("Token is revoked")
+        return user
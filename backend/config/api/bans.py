@@ -0,0 +1,138 @@
+"""
+Banned Users Registry
+
+Keeps the ids of users with `is_banned=True` in a per-process frozenset so
+token refreshes, sliding renewals and logins can reject banned users without
+touching the database.
+
+Workers stay in sync through the shared cache:
+
+- BANNED_VERSION_KEY holds a counter that is bumped after every committed
+  `is_banned` change (`bump_banned_users_version`, called by `User.save`).
+- BANNED_USERS_KEY holds the latest `(version, ids)` snapshot.
+
+Every worker compares its version with the cached one at most once per
+USER_BAN_SYNC_INTERVAL seconds (a single cache read). On a new version the
+snapshot is taken from the cache, or rebuilt with one query when it is
+missing or older than the version. Bans therefore reach every worker within
+USER_BAN_SYNC_INTERVAL seconds.
+
+Changes that skip `save()` (`queryset.update()`, raw SQL) are caught by one
+worker re-reading the ids every USER_BAN_RELOAD_INTERVAL seconds and bumping
+the version when they differ from the snapshot.
+
+Without a shared cache (no CACHE_URL) versions can't reach the other
+workers, so every worker re-reads the ids from the database once per
+USER_BAN_SYNC_INTERVAL instead (one query on the `users_banned_idx` partial
+index).
+"""
+
+import threading
+import time
+from typing import FrozenSet, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from config.api.cache import is_shared_cache
+from config.api.sharding import get_shard_aliases
+
+BANNED_USERS_KEY = "user:banned:ids"
+BANNED_VERSION_KEY = "user:banned:version"
+BANNED_RELOAD_KEY = "user:banned:reload"
+
+
+def _load_banned_ids() -> FrozenSet[int]:
+    from django.contrib.auth import get_user_model
+
+    # Banned users of every shard
+    return frozenset(
+        user_id
+        for alias in get_shard_aliases() or [None]
+        for user_id in get_user_model()
+        .objects.db_manager(alias)
+        .filter(is_banned=True)
+        .values_list("id", flat=True)
+        .iterator()
+    )
+
+
+def _current_version() -> int:
+    # Starting from the clock keeps versions increasing if the cache drops
+    # the counter, so an old snapshot is never mistaken for a current one
+    cache.add(BANNED_VERSION_KEY, int(time.time()), None)
+    return cache.get(BANNED_VERSION_KEY) or 0
+
+
+def _next_version() -> int:
+    try:
+        return cache.incr(BANNED_VERSION_KEY)
+    except ValueError:
+        return _current_version()
+
+
+def bump_banned_users_version() -> None:
+    """
+    Signals every worker to reload the banned users, call after the
+    `is_banned` change is committed.
+    """
+    _next_version()
+    banned_users.sync(force=True)
+
+
+class BannedUserRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: FrozenSet[int] = frozenset()
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def sync(self, force: bool = False) -> None:
+        now = time.monotonic()
+        interval = getattr(settings, "USER_BAN_SYNC_INTERVAL", 5)
+        if not force and self._version is not None:
+            if now - self._checked_at < interval:
+                return
+
+        with self._lock:
+            self._checked_at = now
+            if not is_shared_cache():
+                self._ids, self._version = _load_banned_ids(), 0
+                return
+
+            version = _current_version()
+            reload_interval = getattr(settings, "USER_BAN_RELOAD_INTERVAL", 60)
+            if cache.add(BANNED_RELOAD_KEY, 1, reload_interval):
+                ids = _load_banned_ids()
+                snapshot = cache.get(BANNED_USERS_KEY)
+                if not snapshot or snapshot[1] != ids:
+                    version = _next_version()
+                    cache.set(BANNED_USERS_KEY, (version, ids), None)
+                self._ids, self._version = ids, version
+                return
+
+            if version == self._version:
+                return
+
+            snapshot = cache.get(BANNED_USERS_KEY)
+            if snapshot and snapshot[0] >= version:
+                ids = snapshot[1]
+            else:
+                # Read after the version, so the ids are at least that recent
+                ids = _load_banned_ids()
+                cache.set(BANNED_USERS_KEY, (version, ids), None)
+            self._ids, self._version = ids, version
+
+    def __contains__(self, user_id) -> bool:
+        self.sync()
+        try:
+            return int(user_id) in self._ids
+        except (TypeError, ValueError):
+            return False
+
+
+banned_users = BannedUserRegistry()
+
+
+def is_user_banned(user_id) -> bool:
+    return user_id in banned_users
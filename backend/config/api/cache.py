@@ -0,0 +1,29 @@
+"""
+Shared Cache
+
+Lockout counters, ban and revocation versions and the HMAC OTP replay guard
+must be seen by every process. The default LocMemCache (no CACHE_URL) lives
+inside one process, so each gunicorn worker or serverless instance would
+keep its own copy; these helpers let features detect and refuse that.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias: str = "default") -> bool:
+    """
+    False when the cache only lives in the current process.
+    """
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def require_shared_cache(feature: str, alias: str = "default") -> None:
+    if not is_shared_cache(alias):
+        raise ImproperlyConfigured(
+            f"{feature} needs a cache shared by every process, set CACHE_URL."
+        )
@@ -0,0 +1,157 @@
+"""
+Row Count Helpers
+
+Helpers used by the paginators to size a result set without paying for an
+exact ``COUNT(*)`` on large tables.
+
+Count strategies can be selected per view through the
+``pagination_count_strategy`` attribute:
+
+    class UserListView(ListAPIView):
+        pagination_count_strategy = CachedCount(ttl=60)
+
+- ExactCount: plain ``COUNT(*)``, always exact.
+- CachedCount: exact count cached per queryset fingerprint for `ttl` seconds,
+  reported as not exact since it may be stale.
+- EstimatedCount: table statistics for unfiltered querysets on PostgreSQL,
+  falls back to an exact count otherwise.
+"""
+
+import hashlib
+import json
+from typing import Optional, Tuple
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """
+    Returns the planner's row estimate for the given queryset.
+
+    On PostgreSQL the estimate is read from ``EXPLAIN (FORMAT JSON)`` which
+    uses table statistics and never scans the table. Other database backends
+    have no cheap equivalent, so `None` is returned and the caller decides
+    whether to fall back to an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    # Ordering and slicing do not change the row estimate
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        # `.none()` or an empty `__in`, no query is needed
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+    plan = row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_table_count(queryset) -> Optional[int]:
+    """
+    Returns the row count PostgreSQL keeps in ``pg_class.reltuples`` for the
+    queryset's table. Only meaningful for unfiltered querysets, returns `None`
+    on other backends or when the table has never been analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class ExactCount:
+    """
+    Exact ``COUNT(*)`` on every call.
+    """
+
+    def count(self, queryset) -> Tuple[int, bool]:
+        return queryset.count(), True
+
+
+class CachedCount(ExactCount):
+    """
+    Exact count cached in the shared cache per queryset fingerprint.
+    The result may be up to `ttl` seconds old, so it is reported as not exact.
+    """
+
+    def __init__(self, ttl: int = 60, key_prefix: str = "pagination:count"):
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+
+    def get_cache_key(self, queryset) -> Optional[str]:
+        """
+        Returns `None` for querysets that can never match a row.
+        """
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        fingerprint = hashlib.sha1(
+            f"{queryset.db}:{sql}:{params!r}".encode("utf-8")
+        ).hexdigest()
+        return f"{self.key_prefix}:{fingerprint}"
+
+    def count(self, queryset) -> Tuple[int, bool]:
+        key = self.get_cache_key(queryset)
+        if key is None:
+            return 0, True
+        value = cache.get(key)
+        if value is None:
+            value, _ = super().count(queryset)
+            cache.set(key, value, self.ttl)
+        return value, False
+
+
+class EstimatedCount(ExactCount):
+    """
+    Approximate count from table statistics for unfiltered querysets.
+    Filtered querysets and backends without statistics get an exact count.
+    """
+
+    def count(self, queryset) -> Tuple[int, bool]:
+        if not queryset.query.where:
+            value = estimate_table_count(queryset)
+            if value is not None:
+                return value, False
+        return super().count(queryset)
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Django paginator that delegates `count` to a count strategy and records
+    whether the value is exact.
+    """
+
+    def __init__(self, *args, count_strategy=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+        self.count_is_exact = True
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        value, self.count_is_exact = self.count_strategy.count(self.object_list)
+        return value
@@ -0,0 +1,70 @@
+"""
+Database Connection Stats
+
+Counts, per worker process, how many requests were served and how many
+database connections had to be opened for them, so the effect of
+DB_CONN_MODE (persistent connections, pool, serverless reuse) is visible in
+production. With the "pool" mode the psycopg pool statistics are included.
+
+The counters are connected to Django's request_started and connection_created
+signals in `ApiConfig.ready()`.
+"""
+
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+from django.conf import settings
+from django.db import connections
+
+from config.api.routers import replica_selector
+
+_lock = threading.Lock()
+_requests = 0
+_connections_created: Dict[str, int] = defaultdict(int)
+
+
+def on_request_started(sender, **kwargs) -> None:
+    global _requests
+    with _lock:
+        _requests += 1
+
+
+def on_connection_created(sender, connection, **kwargs) -> None:
+    with _lock:
+        _connections_created[connection.alias] += 1
+
+
+def get_connection_stats() -> Dict[str, Any]:
+    """
+    Connection stats of the current worker process.
+    """
+    with _lock:
+        requests = _requests
+        created = dict(_connections_created)
+
+    databases = {}
+    for alias in connections:
+        connection = connections[alias]
+        pool_options = connection.settings_dict.get("OPTIONS", {}).get("pool")
+        stats = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+            "connections_created": created.get(alias, 0),
+            "connections_per_request": (
+                round(created.get(alias, 0) / requests, 4) if requests else None
+            ),
+        }
+        if pool_options:
+            # psycopg_pool.ConnectionPool.get_stats()
+            stats["pool"] = connection.pool.get_stats()
+        databases[alias] = stats
+
+    return {
+        "pid": os.getpid(),
+        "mode": getattr(settings, "DB_CONN_MODE", "persistent"),
+        "requests": requests,
+        "databases": databases,
+        "replica_in_flight": replica_selector.in_flight(),
+    }
@@ -14,6 +14,8 @@ class ResponseMessage(Enum):
     AUTH_LOGIN_SUCCESSFULLY = "با موفقیت وارد شدید"
     AUTH_LOGOUT_SUCCESSFULLY = "با موفقیت خارج شدید"
     AUTH_WRONG_PASSWORD = "کلمه عبور اشتباه است"
+    AUTH_USER_BANNED = "حساب کاربری شما مسدود شده است"
+    TOO_MANY_ATTEMPTS = "تلاش‌های ناموفق بیش از حد مجاز، {seconds} ثانیه دیگر تلاش کنید"
     AUTH_WRONG_OTP = "کد تایید اشتباه یا منقضی شده است"
     NOT_VALID_PHONE = "شماره تلفن نامعتبر است"
     PHONE_OTP_SENT = "کد تایید به شماره {phone} ارسال شد"
@@ -0,0 +1,98 @@
+"""
+Streaming Export Module
+
+Builds NDJSON / CSV streaming responses from a queryset so that admin exports
+keep a flat memory profile regardless of table size. Rows are read with
+``values_list(...).iterator(chunk_size=...)`` which uses a server-side cursor
+on PostgreSQL, and each row is encoded and sent as soon as it is fetched.
+
+Exports are ordered by primary key and can be resumed from the last id the
+client received with the ``after_id`` query parameter. Tables split over
+several databases (e.g. the users of every shard) are streamed from all of
+them at once and merged by id, which requires ids unique across databases.
+"""
+
+import csv
+import heapq
+import json
+from operator import itemgetter
+from typing import Iterable, Iterator, Optional, Sequence
+
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+DEFAULT_CHUNK_SIZE = 2000
+MAX_CHUNK_SIZE = 10000
+
+
+class _EchoBuffer:
+    """
+    File-like object for csv.writer that returns the written line
+    instead of buffering it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _iter_ndjson(rows: Iterable, fields: Sequence[str]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), default=str, ensure_ascii=False)
+        yield "\n"
+
+
+def _iter_csv(rows: Iterable, fields: Sequence[str]) -> Iterator[str]:
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def streaming_export_response(
+    queryset,
+    fields: Sequence[str],
+    filename: str,
+    export_format: str = "ndjson",
+    after_id: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    using: Optional[Sequence[str]] = None,
+) -> StreamingHttpResponse:
+    """
+    Returns a StreamingHttpResponse that writes `fields` of every row in
+    `queryset` with an id greater than `after_id`, read from each database
+    alias in `using` when given.
+
+    `fields` must start with "id" so the client can resume the export.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    if after_id:
+        queryset = queryset.filter(id__gt=after_id)
+    chunk_size = min(max(chunk_size, 1), MAX_CHUNK_SIZE)
+
+    def iter_values(source) -> Iterator[tuple]:
+        return (
+            source.order_by("id").values_list(*fields).iterator(chunk_size=chunk_size)
+        )
+
+    if using:
+        rows = heapq.merge(
+            *(iter_values(queryset.using(alias)) for alias in using),
+            key=itemgetter(0),
+        )
+    else:
+        rows = iter_values(queryset)
+
+    iter_rows = _iter_csv if export_format == "csv" else _iter_ndjson
+    response = StreamingHttpResponse(
+        iter_rows(rows, fields), content_type=EXPORT_FORMATS[export_format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,171 @@
+"""
+Password Hashing Executor
+
+Password checks and hashing are CPU-heavy key derivations. They run on a
+dedicated, bounded thread pool instead of inline on the request worker:
+
+- at most WORKERS hashes run at the same time and at most QUEUE_SIZE more
+  wait for a worker. When the pool is full a request waits ACQUIRE_TIMEOUT
+  seconds for a slot and then fails fast with `HashingPoolSaturated`, which
+  views turn into a 503 instead of piling up requests.
+- hashes made with an outdated hasher or iteration count are upgraded in the
+  background after a successful login, the login itself never waits for it.
+- every hash records its queue wait and hashing time, and every refused one
+  is counted, in the auth metrics (`password_hash_*`, config.api.metrics).
+
+Configured with PASSWORD_HASHING in settings, WORKERS=0 hashes inline.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connections
+
+from config.api.metrics import (
+    password_hash_duration,
+    password_hash_rejected,
+    password_hash_wait,
+)
+from config.api.profiling import profiler
+from config.api.timing import timed
+
+
+class HashingPoolSaturated(Exception):
+    """
+    Raised when every worker is busy and the queue is full.
+    """
+
+
+class PasswordHashingExecutor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: threading.BoundedSemaphore | None = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {
+            "WORKERS": 2,
+            "QUEUE_SIZE": 32,
+            "ACQUIRE_TIMEOUT": 0.05,
+            **getattr(settings, "PASSWORD_HASHING", {}),
+        }
+
+    def _start(self) -> None:
+        # Started lazily so management commands never spawn the pool
+        with self._lock:
+            if self._executor is None:
+                config = self.config
+                self._slots = threading.BoundedSemaphore(
+                    config["WORKERS"] + config["QUEUE_SIZE"]
+                )
+                self._executor = ThreadPoolExecutor(
+                    max_workers=config["WORKERS"],
+                    thread_name_prefix="password-hashing",
+                )
+
+    def submit(self, operation: str, fn: Callable, *args) -> Future:
+        """
+        Schedules `fn(*args)` on the pool, raises HashingPoolSaturated when
+        no slot frees up within ACQUIRE_TIMEOUT.
+        """
+        if self._executor is None:
+            self._start()
+        if not self._slots.acquire(timeout=self.config["ACQUIRE_TIMEOUT"]):
+            password_hash_rejected.inc(operation=operation)
+            raise HashingPoolSaturated()
+
+        queued_at = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                # Pool threads are sampled while they hash
+                with profiler.profiled_thread():
+                    return fn(*args)
+            finally:
+                password_hash_wait.observe(started - queued_at, operation=operation)
+                password_hash_duration.observe(
+                    time.perf_counter() - started, operation=operation
+                )
+
+        try:
+            future = self._executor.submit(task)
+        except RuntimeError:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    @timed("hash")
+    def run(self, operation: str, fn: Callable, *args) -> Any:
+        """
+        Runs `fn(*args)` on the pool and waits for the result.
+        """
+        if not self.config["WORKERS"]:
+            with password_hash_duration.time(operation=operation):
+                return fn(*args)
+        return self.submit(operation, fn, *args).result()
+
+
+hashing_executor = PasswordHashingExecutor()
+
+
+def _upgrade_password_hash(
+    user_model, using: str, user_id, encoded: str, raw_password: str
+):
+    # On the user's own database (shard), conditional so a password changed
+    # meanwhile is never overwritten
+    user_model.objects.db_manager(using).filter(pk=user_id, password=encoded).update(
+        password=make_password(raw_password)
+    )
+
+
+def _upgrade_password_hash_in_pool(*args) -> None:
+    try:
+        _upgrade_password_hash(*args)
+    finally:
+        # Pool threads do not go through request_finished
+        connections.close_all()
+
+
+def check_user_password(user, raw_password: str) -> bool:
+    """
+    Pool-backed `user.check_password`. Outdated hashes are upgraded in the
+    background instead of before the response.
+    """
+    encoded = user.password
+    must_update = []
+    is_correct = hashing_executor.run(
+        "check",
+        check_password,
+        raw_password,
+        encoded,
+        lambda raw: must_update.append(True),
+    )
+    if not (is_correct and must_update):
+        return is_correct
+
+    args = (type(user), user._state.db, user.pk, encoded, raw_password)
+    if not hashing_executor.config["WORKERS"]:
+        hashing_executor.run("upgrade", _upgrade_password_hash, *args)
+        return is_correct
+    try:
+        hashing_executor.submit("upgrade", _upgrade_password_hash_in_pool, *args)
+    except HashingPoolSaturated:
+        # Upgraded on one of the next logins
+        pass
+    return is_correct
+
+
+def set_user_password(user, raw_password: str) -> None:
+    """
+    Pool-backed `user.set_password`, the user still has to be saved.
+    """
+    user.password = hashing_executor.run("make", make_password, raw_password)
+    # Same as AbstractBaseUser.set_password, feeds password_changed()
+    user._password = raw_password
@@ -1,24 +1,109 @@
+import time
 from typing import Any, Dict
 
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import serializers, status
-from rest_framework_simplejwt.exceptions import ExpiredTokenError
+from rest_framework_simplejwt.exceptions import ExpiredTokenError, TokenError
 from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenViewBase
 
+from config.api.bans import is_user_banned
+from config.api.metrics import (
+    REFRESH_OUTCOMES,
+    instrument,
+    token_refresh_duration,
+    token_refreshes,
+)
+from config.api.revocation import is_refresh_token_revoked, is_security_stamp_valid
+from config.api.sharding import shard_for_token, use_shard
+from config.api.timing import TimedValidationMixin, timed
 
-class CustomTokenRefreshSerializer(serializers.Serializer):
+
+class CachedRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist, security stamp and ban checks are served
+    from caches instead of querying the database on every refresh.
+    """
+
+    def blacklist(self):
+        with use_shard(shard_for_token(self.payload)):
+            return super().blacklist()
+
+    def check_blacklist(self) -> None:
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # Cache misses are looked up on the user's shard
+        with use_shard(shard_for_token(self.payload)):
+            if is_refresh_token_revoked(jti, self.payload.get("exp")):
+                raise TokenError("Token is blacklisted")
+            if not is_security_stamp_valid(self.payload):
+                raise TokenError("Token is revoked")
+        if is_user_banned(self.payload.get(api_settings.USER_ID_CLAIM)):
+            raise TokenError("User is banned")
+
+
+REFRESH_RESULT_KEY = "jwt:refresh:{jti}"
+REFRESH_LOCK_KEY = "jwt:refresh:lock:{jti}"
+
+
+def mint_access_token(refresh: RefreshToken) -> Dict[str, str | int]:
+    with timed("mint"):
+        access = refresh.access_token
+    return {
+        "access": str(access),
+        "access_exp": int(access.payload.get("exp", 0)),
+    }
+
+
+def get_or_mint_access_token(refresh: RefreshToken) -> Dict[str, str | int]:
+    """
+    Single-flight access token minting per refresh token.
+
+    Concurrent refreshes of the same refresh token (several open tabs hitting
+    token-refresh when access_exp lapses) share one access token for
+    JWT_REFRESH_COALESCE_WINDOW seconds: the first request takes a short
+    cache lock and mints, the others wait briefly for its result. Keeps their
+    cookies consistent and turns N refreshes into one unit of work.
+    """
+    window = getattr(settings, "JWT_REFRESH_COALESCE_WINDOW", 0)
+    if not window:
+        return mint_access_token(refresh)
+
+    jti = refresh.payload[api_settings.JTI_CLAIM]
+    result_key = REFRESH_RESULT_KEY.format(jti=jti)
+    tokens = cache.get(result_key)
+    if tokens:
+        return tokens
+
+    lock_key = REFRESH_LOCK_KEY.format(jti=jti)
+    if cache.add(lock_key, 1, window):
+        try:
+            tokens = mint_access_token(refresh)
+            cache.set(result_key, tokens, window)
+        finally:
+            cache.delete(lock_key)
+        return tokens
+
+    # Another request is minting, wait for it for a short while
+    deadline = time.monotonic() + 0.25
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        tokens = cache.get(result_key)
+        if tokens:
+            return tokens
+    return mint_access_token(refresh)
+
+
+class CustomTokenRefreshSerializer(TimedValidationMixin, serializers.Serializer):
     refresh = serializers.CharField()
     access = serializers.CharField(read_only=True)
-    token_class = RefreshToken
+    token_class = CachedRefreshToken
 
     def validate(self, attrs: Dict[str, Any]) -> Dict[str, str]:
         refresh = self.token_class(attrs["refresh"])
 
-        data = {
-            "access": str(refresh.access_token),
-            "access_exp": int(refresh.access_token.payload.get("exp", 0)),
-        }
+        data = dict(get_or_mint_access_token(refresh))
 
         # Don't rotate refresh tokens - keep the existing one
         # if api_settings.ROTATE_REFRESH_TOKENS:
@@ -48,6 +133,7 @@ class CustomTokenRefreshView(TokenViewBase):
 
     serializer_class = CustomTokenRefreshSerializer
 
+    @instrument(token_refreshes, REFRESH_OUTCOMES, token_refresh_duration)
     def post(self, request, *args, **kwargs):
         try:
             # Get refresh token from request data or cookies
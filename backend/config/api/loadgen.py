@@ -0,0 +1,224 @@
+"""
+Synthetic Load Generator
+
+Replays realistic user journeys against a locally running server (WSGI or
+ASGI) with many concurrent virtual users and reports latency percentiles and
+throughput per endpoint. Used through the ``loadtest`` management command.
+
+The server must run with the stub SMS sender writing to a shared outbox so
+the virtual users can read their OTP codes:
+
+    SMS_SERVICE_SENDER=apps.sms_service.utils.stub.stub_send_otp \\
+    SMS_SERVICE_STUB_OUTBOX=/tmp/otp-outbox python manage.py runserver
+
+Journeys:
+
+- login: check -> request OTP -> verify OTP -> refreshes -> current -> logout,
+  with a brand new phone each time (signup traffic)
+- returning: the same flow for a phone that already logged in before
+- session: one login, then only refreshes and current-user calls, the steady
+  state of an open tab (one refresh per ACCESS_TOKEN_LIFETIME)
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from apps.sms_service.utils.stub import read_outbox_otp
+from config.api.response import CSRF_COOKIE
+
+JOURNEYS = ("login", "returning", "session")
+
+ENDPOINTS = {
+    "check": "/api/account/authenticate/check/",
+    "request_otp": "/api/sms-service/request/otp/",
+    "otp": "/api/account/authenticate/otp/",
+    "refresh": "/api/account/authenticate/token-refresh/",
+    "current": "/api/account/authenticate/current/",
+    "logout": "/api/account/authenticate/logout/",
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Parses a journey mix like "login:1,returning:3,session:6".
+    """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition(":")
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise ValueError(f"Unknown journey: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an unsorted list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+@dataclass
+class LoadTestConfig:
+    base_url: str
+    outbox: str
+    users: int = 10
+    duration: float = 30.0
+    mix: Dict[str, float] = field(default_factory=lambda: {"login": 1})
+    refreshes: int = 5
+    refresh_interval: float = 0.0
+    timeout: float = 10.0
+
+
+class Stats:
+    """
+    Thread-safe latency recorder per endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> List[Dict[str, float | str | int]]:
+        rows = []
+        for endpoint in ENDPOINTS:
+            values = self.latencies.get(endpoint)
+            if not values:
+                continue
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "requests": len(values),
+                    "errors": self.errors.get(endpoint, 0),
+                    "rps": round(len(values) / elapsed, 2),
+                    "p50_ms": round(percentile(values, 50) * 1000, 2),
+                    "p95_ms": round(percentile(values, 95) * 1000, 2),
+                    "p99_ms": round(percentile(values, 99) * 1000, 2),
+                }
+            )
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, index: int, config: LoadTestConfig, stats: Stats):
+        self.index = index
+        self.config = config
+        self.stats = stats
+        self.session = requests.Session()
+        self.counter = 0
+        self.known_phone: Optional[str] = None
+
+    def call(self, endpoint: str, method: str = "post", **kwargs) -> Dict:
+        start = time.perf_counter()
+        ok = False
+        body: Dict = {}
+        # Double-submit CSRF header of the lean middleware profile
+        csrf_token = self.session.cookies.get(CSRF_COOKIE)
+        if csrf_token:
+            kwargs.setdefault("headers", {})["X-CSRFToken"] = csrf_token
+        try:
+            response = self.session.request(
+                method,
+                self.config.base_url + ENDPOINTS[endpoint],
+                timeout=self.config.timeout,
+                **kwargs,
+            )
+            body = response.json()
+            # BaseResponse carries the real status in its body
+            ok = response.ok and bool(body.get("success", True))
+        except (requests.RequestException, ValueError):
+            pass
+        self.stats.record(endpoint, time.perf_counter() - start, ok)
+        return body
+
+    def new_phone(self) -> str:
+        self.counter += 1
+        # 0990 prefix keeps load test users apart from real ones
+        return f"0990{self.index % 1000:03d}{self.counter % 10000:04d}"
+
+    def login(self, phone: str) -> bool:
+        self.session.cookies.clear()
+        self.call("check", json={"phone": phone})
+        self.call("request_otp", json={"phone": phone, "otp_usage": "AUTHENTICATE"})
+        code = read_outbox_otp(self.config.outbox, phone)
+        if not code:
+            self.stats.record("otp", 0.0, False)
+            return False
+        body = self.call("otp", json={"phone": phone, "otp": code})
+        return bool(body.get("success"))
+
+    def browse(self) -> None:
+        for _ in range(self.config.refreshes):
+            if self.config.refresh_interval:
+                time.sleep(self.config.refresh_interval)
+            self.call("refresh")
+            self.call("current", method="get")
+
+    def run_journey(self, journey: str) -> None:
+        if journey == "login":
+            phone = self.new_phone()
+        elif journey == "returning":
+            phone = self.known_phone or self.new_phone()
+        else:
+            if self.known_phone and self.session.cookies.get("refresh_token"):
+                self.browse()
+                return
+            phone = self.known_phone or self.new_phone()
+
+        if not self.login(phone):
+            return
+        self.known_phone = phone
+        self.browse()
+        if journey != "session":
+            self.call(
+                "logout",
+                json={"refresh": self.session.cookies.get("refresh_token", "")},
+            )
+
+    def run(self, deadline: float, rng: random.Random) -> None:
+        journeys = list(self.config.mix.keys())
+        weights = list(self.config.mix.values())
+        while time.monotonic() < deadline:
+            self.run_journey(rng.choices(journeys, weights)[0])
+
+
+def run_load_test(config: LoadTestConfig, seed: Optional[int] = None):
+    """
+    Runs the configured load and returns `(summary rows, elapsed seconds)`.
+    """
+    stats = Stats()
+    deadline = time.monotonic() + config.duration
+    threads = [
+        threading.Thread(
+            target=VirtualUser(i, config, stats).run,
+            args=(deadline, random.Random(None if seed is None else seed + i)),
+            daemon=True,
+        )
+        for i in range(config.users)
+    ]
+
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    return stats.summary(elapsed), elapsed
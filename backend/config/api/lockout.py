@@ -0,0 +1,142 @@
+"""
+Brute-Force Lockout
+
+Tracks failed verification attempts (OTP codes, passwords) per phone and per
+client IP in the shared cache and locks the key out with an exponential
+back-off once a threshold is reached:
+
+    lock = BASE_SECONDS * 2 ** (failures - threshold), capped at MAX_SECONDS
+
+Views call `check()` first, which is a single cache read and happens before
+any database query or password hash, then `register_failure()` or
+`register_success()` with the outcome. Counters use atomic cache increments
+so concurrent attempts cannot slip past the threshold. Configured with
+AUTH_LOCKOUT in settings.
+
+Counters in a per-process cache (no CACHE_URL) would give every worker its
+own threshold. With REQUIRE_SHARED_CACHE (the default for LEAN_BOOT, where
+every serverless instance is a process of its own) the app refuses to load
+on such a cache (`check_lockout_cache`, run by ApiConfig.ready), so the
+deploy fails instead of every login; `serve` refuses to start several
+workers without one.
+"""
+
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.throttling import BaseThrottle
+
+from config.api.cache import require_shared_cache
+from config.api.enums import ResponseMessage
+from config.api.response import BaseResponse
+
+FAILURES_KEY = "lockout:{scope}:{kind}:{ident}:failures"
+LOCKED_KEY = "lockout:{scope}:{kind}:{ident}:locked"
+
+
+def get_client_ip(request) -> str:
+    """
+    Client address, honouring NUM_PROXIES like DRF throttling does.
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def lockout_response(seconds: int) -> BaseResponse:
+    return BaseResponse(
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        message=ResponseMessage.TOO_MANY_ATTEMPTS.value.format(seconds=seconds),
+        data={"retry_after": seconds},
+    )
+
+
+def check_lockout_cache() -> None:
+    """
+    Raises ImproperlyConfigured when REQUIRE_SHARED_CACHE is set and the
+    cache lives in one process, run once when the app loads.
+    """
+    if getattr(settings, "AUTH_LOCKOUT", {}).get("REQUIRE_SHARED_CACHE", False):
+        require_shared_cache("AUTH_LOCKOUT")
+
+
+class AttemptTracker:
+    def __init__(self, scope: str):
+        self.scope = scope
+
+    @property
+    def config(self) -> Dict[str, int]:
+        return {
+            "PHONE_THRESHOLD": 5,
+            "IP_THRESHOLD": 20,
+            "BASE_SECONDS": 30,
+            "MAX_SECONDS": 3600,
+            "WINDOW": 3600,
+            **getattr(settings, "AUTH_LOCKOUT", {}),
+        }
+
+    def _idents(self, phone: str, ip: Optional[str]) -> Dict[str, str]:
+        idents = {"phone": phone}
+        if ip:
+            idents["ip"] = ip
+        return idents
+
+    def _key(self, template: str, kind: str, ident: str) -> str:
+        return template.format(scope=self.scope, kind=kind, ident=ident)
+
+    def check(self, phone: str, ip: Optional[str] = None) -> int:
+        """
+        Returns the number of seconds the phone or IP is still locked out,
+        0 when attempts are allowed.
+        """
+        keys = [
+            self._key(LOCKED_KEY, kind, ident)
+            for kind, ident in self._idents(phone, ip).items()
+        ]
+        locked = cache.get_many(keys)
+        if not locked:
+            return 0
+        return max(int(max(locked.values()) - time.time()), 1)
+
+    def register_failure(self, phone: str, ip: Optional[str] = None) -> int:
+        """
+        Counts a failed attempt, returns the lockout seconds it triggered.
+        """
+        config = self.config
+        lockout = 0
+        for kind, ident in self._idents(phone, ip).items():
+            key = self._key(FAILURES_KEY, kind, ident)
+            cache.add(key, 0, config["WINDOW"])
+            try:
+                failures = cache.incr(key)
+            except ValueError:
+                # Expired between add and incr
+                cache.set(key, 1, config["WINDOW"])
+                failures = 1
+
+            over = failures - config[f"{kind.upper()}_THRESHOLD"]
+            if over < 0:
+                continue
+            seconds = min(config["BASE_SECONDS"] * 2**over, config["MAX_SECONDS"])
+            cache.set(
+                self._key(LOCKED_KEY, kind, ident), time.time() + seconds, seconds
+            )
+            lockout = max(lockout, seconds)
+        return lockout
+
+    def register_success(self, phone: str) -> None:
+        """
+        Resets the phone's counters. IP counters are kept, otherwise an
+        attacker could reset them by logging into an account of their own.
+        """
+        cache.delete_many(
+            [
+                self._key(FAILURES_KEY, "phone", phone),
+                self._key(LOCKED_KEY, "phone", phone),
+            ]
+        )
+
+
+otp_attempts = AttemptTracker("otp")
+password_attempts = AttemptTracker("password")
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.api.loadgen import LoadTestConfig, parse_mix, run_load_test
+
+
+class Command(BaseCommand):
+    help = "Replay login/refresh user journeys against a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--outbox",
+            default=None,
+            help="Stub SMS outbox directory (defaults to SMS_SERVICE_STUB_OUTBOX).",
+        )
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--duration", type=float, default=30.0)
+        parser.add_argument(
+            "--mix",
+            default="login:1,returning:2,session:7",
+            help="Weighted journeys, e.g. login:1,returning:2,session:7",
+        )
+        parser.add_argument(
+            "--refreshes", type=int, default=5, help="Refreshes per journey."
+        )
+        parser.add_argument(
+            "--refresh-interval",
+            type=float,
+            default=0.0,
+            help="Seconds between refreshes, 60 matches ACCESS_TOKEN_LIFETIME.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        outbox = options["outbox"] or getattr(settings, "SMS_SERVICE_STUB_OUTBOX", None)
+        if not outbox:
+            raise CommandError(
+                "An OTP outbox is required, pass --outbox or set SMS_SERVICE_STUB_OUTBOX."
+            )
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        config = LoadTestConfig(
+            base_url=options["base_url"].rstrip("/"),
+            outbox=outbox,
+            users=options["users"],
+            duration=options["duration"],
+            mix=mix,
+            refreshes=options["refreshes"],
+            refresh_interval=options["refresh_interval"],
+        )
+        rows, elapsed = run_load_test(config, seed=options["seed"])
+
+        self.stdout.write(
+            f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'rps':>9} "
+            f"{'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<12} {row['requests']:>9} {row['errors']:>7} "
+                f"{row['rps']:>9} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+                f"{row['p99_ms']:>9}"
+            )
+        total = sum(row["requests"] for row in rows)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)"
+            )
+        )
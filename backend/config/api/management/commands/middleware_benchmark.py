@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.api.perf import MIDDLEWARE_BENCHMARK_REQUESTS, benchmark_middleware
+
+
+class Command(BaseCommand):
+    help = "Compare the per-request cost of the full and lean middleware profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(self, *args, **options):
+        profiles = {
+            "full": settings.FULL_MIDDLEWARE,
+            "lean": settings.LEAN_MIDDLEWARE,
+        }
+        self.stdout.write(
+            f"{'request':<48} {'full_us':>9} {'lean_us':>9} {'saved':>7}"
+        )
+        for method, path in MIDDLEWARE_BENCHMARK_REQUESTS:
+            timings = {
+                name: benchmark_middleware(
+                    middleware,
+                    method,
+                    path,
+                    requests=options["requests"],
+                    rounds=options["rounds"],
+                )
+                for name, middleware in profiles.items()
+            }
+            saved = (timings["full"] - timings["lean"]) / timings["full"]
+            self.stdout.write(
+                f"{method.upper() + ' ' + path:<48} "
+                f"{timings['full']:>9} {timings['lean']:>9} {saved:>7.1%}"
+            )
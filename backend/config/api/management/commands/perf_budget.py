@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from config.api.bans import banned_users
+from config.api.perf import (
+    STUB_SMS_SENDER,
+    check_budgets,
+    get_scenarios,
+    load_budgets,
+    run_scenario,
+    save_budgets,
+)
+
+
+class Command(BaseCommand):
+    help = "Measure API endpoints against the checked-in performance budgets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Write the measured values as the new budgets.",
+        )
+        parser.add_argument(
+            "--timings",
+            action="store_true",
+            help="Also check db_ms and latency_ms, they depend on the machine.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs per endpoint, timings are the median.",
+        )
+        parser.add_argument(
+            "--only", default=None, help="Only run scenarios containing this text."
+        )
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError(
+                "perf_budget runs on SQLite only, unset DB_URL to run it offline."
+            )
+
+        scenarios = [
+            s for s in get_scenarios() if not options["only"] or options["only"] in s.name
+        ]
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            # Budgets measure the steady state, the banned users registry
+            # is loaded once per process and its periodic reload (a query
+            # every USER_BAN_SYNC_INTERVAL without CACHE_URL) is left out
+            banned_users.sync(force=True)
+            with override_settings(
+                SMS_SERVICE_SENDER=STUB_SMS_SENDER, USER_BAN_SYNC_INTERVAL=3600
+            ):
+                results = [run_scenario(s, repeat=options["repeat"]) for s in scenarios]
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        for result in results:
+            self.stdout.write(
+                f"{result.name:<36} status={result.status:<4} "
+                f"queries={result.queries:<3} db_ms={result.db_ms:<9} "
+                f"latency_ms={result.latency_ms}"
+            )
+
+        if options["update"]:
+            unexpected = [r.name for r in results if r.status != r.expected_status]
+            if unexpected:
+                raise CommandError(
+                    "Unexpected status, budgets not updated: " + ", ".join(unexpected)
+                )
+            budgets = load_budgets()
+            budgets.update({r.name: r.as_budget() for r in results})
+            save_budgets(budgets)
+            self.stdout.write(self.style.SUCCESS("Budgets updated."))
+            return
+
+        failures = check_budgets(results, load_budgets(), timings=options["timings"])
+        if failures:
+            raise CommandError("Budget exceeded:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All endpoints within budget."))
@@ -0,0 +1,123 @@
+from collections import Counter
+from typing import List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from apps.account.models import User, UserPasswordResetToken
+from apps.sms_service.models import VerifyOTPService
+from config.api.sharding import get_shard_aliases, shard_for_phone
+
+
+def move_otps(phone: str, source: str, target: str) -> None:
+    otps = list(VerifyOTPService.objects.using(source).filter(to=phone))
+    for otp in otps:
+        otp.pk = None
+    VerifyOTPService.objects.using(target).bulk_create(otps)
+    VerifyOTPService.objects.using(source).filter(to=phone).delete()
+
+
+def move_user(user_id: int, source: str, target: str) -> None:
+    """
+    Copies a user with their reset tokens, JWTs and OTPs to `target`, then
+    deletes them from `source`. The source transaction commits last, so a
+    failure leaves a copy on both shards rather than on neither.
+    """
+    with transaction.atomic(using=source), transaction.atomic(using=target):
+        user = User.objects.using(source).get(pk=user_id)
+        # A previous run may have committed the copy but not the delete
+        if not User.objects.using(target).filter(pk=user_id).exists():
+            User.objects.using(target).bulk_create([user])
+
+            reset_tokens = list(
+                UserPasswordResetToken.objects.using(source).filter(user_id=user_id)
+            )
+            for reset_token in reset_tokens:
+                reset_token.pk = None
+            UserPasswordResetToken.objects.using(target).bulk_create(reset_tokens)
+
+            blacklisted = set(
+                BlacklistedToken.objects.using(source)
+                .filter(token__user_id=user_id)
+                .values_list("token_id", flat=True)
+            )
+            for token in OutstandingToken.objects.using(source).filter(user_id=user_id):
+                is_blacklisted = token.pk in blacklisted
+                # Outstanding token ids are per shard, take a new one
+                token.pk = None
+                token.save(using=target, force_insert=True)
+                if is_blacklisted:
+                    BlacklistedToken.objects.using(target).create(token=token)
+
+        move_otps(user.phone, source, target)
+        # Blacklisted tokens and reset tokens are removed by cascade
+        OutstandingToken.objects.using(source).filter(user_id=user_id).delete()
+        User.objects.using(source).filter(pk=user_id).delete()
+
+
+class Command(BaseCommand):
+    help = (
+        "Move users, their tokens and OTPs to the shard their phone maps to, "
+        "run after adding or removing a DB_SHARD_URLS entry."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the users and OTP phones that would move.",
+        )
+
+    def handle(self, *args, **options):
+        aliases = get_shard_aliases()
+        if not aliases:
+            raise CommandError("Sharding is not enabled, set DB_SHARD_URLS.")
+
+        moves: Counter = Counter()
+        otp_moves: Counter = Counter()
+        for source in aliases:
+            misplaced: List[Tuple[int, str, str]] = []
+            users = User.objects.using(source).values_list("id", "phone")
+            for user_id, phone in users.iterator(chunk_size=2000):
+                target = shard_for_phone(phone)
+                if target != source:
+                    misplaced.append((user_id, phone, target))
+
+            for user_id, _, target in misplaced:
+                moves[(source, target)] += 1
+                if not options["dry_run"]:
+                    move_user(user_id, source, target)
+
+            # OTPs of phones without a user (pending signups)
+            user_phones = {phone for _, phone, _ in misplaced}
+            phones = (
+                VerifyOTPService.objects.using(source)
+                .values_list("to", flat=True)
+                .distinct()
+            )
+            for phone in list(phones):
+                target = shard_for_phone(phone)
+                if target == source or phone in user_phones:
+                    continue
+                otp_moves[(source, target)] += 1
+                if not options["dry_run"]:
+                    with transaction.atomic(using=source), transaction.atomic(
+                        using=target
+                    ):
+                        move_otps(phone, source, target)
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        for (source, target), count in sorted(moves.items()):
+            self.stdout.write(f"{verb} {count} users from {source} to {target}")
+        for (source, target), count in sorted(otp_moves.items()):
+            self.stdout.write(f"{verb} OTPs of {count} phones from {source} to {target}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {sum(moves.values())} users, "
+                f"{sum(otp_moves.values())} OTP phones."
+            )
+        )
@@ -0,0 +1,46 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from config.server import WORKER_CLASSES, serve
+
+
+class Command(BaseCommand):
+    help = "Run the production server (preforking gunicorn master, WSGI or ASGI)."
+
+    # The server manages its own workers, skip the system checks on boot
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default=None)
+        parser.add_argument(
+            "--interface", choices=list(WORKER_CLASSES.keys()), default=None
+        )
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--threads", type=int, default=None)
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=None,
+            help="Recycle a worker after this many requests, 0 disables.",
+        )
+        parser.add_argument(
+            "--no-preload",
+            action="store_const",
+            const=False,
+            dest="preload",
+            default=None,
+            help="Load the app in every worker, lets SIGHUP reload code.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            serve(
+                BIND=options["bind"],
+                INTERFACE=options["interface"],
+                WORKERS=options["workers"],
+                THREADS=options["threads"],
+                MAX_REQUESTS=options["max_requests"],
+                PRELOAD=options["preload"],
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
@@ -0,0 +1,74 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.api.perf import load_budgets, save_budgets
+from config.api.startup import (
+    LEAN_BOOT_ENV,
+    STARTUP_HEADROOM,
+    profile_startup_median,
+)
+
+
+class Command(BaseCommand):
+    help = "Profile a cold boot of the WSGI app and check it against its budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--top", type=int, default=20, help="Number of slowest modules to show."
+        )
+        parser.add_argument(
+            "--lean",
+            action="store_true",
+            help=(
+                "Profile the serverless profile (LEAN_BOOT=True, without the "
+                "packages missing from requirements-serverless.txt)."
+            ),
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if the boot time exceeds the cold_start(_lean) budget.",
+        )
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Write the measured boot time (with headroom) as the new budget.",
+        )
+
+    def handle(self, *args, **options):
+        env = LEAN_BOOT_ENV if options["lean"] else None
+        budget_name = "cold_start_lean" if options["lean"] else "cold_start"
+        try:
+            profile = profile_startup_median(options["repeat"], env=env)
+        except RuntimeError as e:
+            raise CommandError(f"Boot failed: {e}")
+
+        self.stdout.write(f"{'module':<56} {'self_ms':>9} {'cumulative_ms':>14}")
+        for module, self_ms, cumulative_ms in profile.slowest(options["top"]):
+            self.stdout.write(f"{module:<56} {self_ms:>9.2f} {cumulative_ms:>14.2f}")
+
+        self.stdout.write("\nImport time per package (ms):")
+        for package, self_ms in list(profile.by_package().items())[: options["top"]]:
+            self.stdout.write(f"  {package:<40} {self_ms:>9.2f}")
+        self.stdout.write(f"\nboot_ms={profile.boot_ms}")
+
+        budgets = load_budgets()
+        if options["update"]:
+            budgets[budget_name] = {
+                "boot_ms": math.ceil(profile.boot_ms * STARTUP_HEADROOM)
+            }
+            save_budgets(budgets)
+            self.stdout.write(self.style.SUCCESS("Budget updated."))
+            return
+
+        if options["check"]:
+            budget = budgets.get(budget_name, {}).get("boot_ms")
+            if budget is None:
+                raise CommandError(f"No {budget_name} budget defined, run with --update.")
+            if profile.boot_ms > budget:
+                raise CommandError(
+                    f"Cold start exceeded: boot_ms={profile.boot_ms} (budget {budget})"
+                )
+            self.stdout.write(self.style.SUCCESS("Cold start within budget."))
@@ -0,0 +1,401 @@
+"""
+Auth Metrics
+
+Counters and histograms for the login, token refresh, OTP and password hashing
+paths, exported in the Prometheus text format by `MetricsView`
+(``api/admin/metrics/``).
+
+Recording takes no lock: every thread updates its own dict of samples and
+only registers it once, reads merge all of them. Workers of a preforking
+server share their numbers through METRICS_DIR: each worker writes its
+snapshot to ``<METRICS_DIR>/metrics-<pid>-<start ms>.json`` every
+METRICS_FLUSH_INTERVAL seconds (and when it serves the metrics endpoint),
+the endpoint sums the snapshots of every worker. A worker folds its
+snapshot into ``metrics-exited.json`` when it exits, so counters never go
+backwards and the directory holds one file per live worker; the ``serve``
+master clears the directory when it starts. Without METRICS_DIR only the
+serving worker's numbers are exported.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from config.api.enums import ResponseMessage
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+EXITED_SNAPSHOT = "metrics-exited.json"
+LOCK_FILE = "metrics.lock"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, "Metric"] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_values: List[Dict] = []
+        self._flusher: Optional[threading.Thread] = None
+        self._set_worker_id()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _set_worker_id(self) -> None:
+        # Pids are reused, the start time keeps a new worker from
+        # overwriting the snapshot of an exited one
+        self.worker_id = f"{os.getpid()}-{int(time.time() * 1000)}"
+        self._retired = False
+
+    def _reset(self) -> None:
+        # A forked worker starts from zero, the master's snapshot is its own
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._thread_values = []
+        self._flusher = None
+        self._set_worker_id()
+
+    def register(self, metric: "Metric") -> "Metric":
+        self.metrics[metric.name] = metric
+        return metric
+
+    def values(self) -> Dict:
+        """
+        Sample dict of the current thread.
+        """
+        values = getattr(self._local, "values", None)
+        if values is None:
+            values = self._local.values = {}
+            with self._lock:
+                self._thread_values.append(values)
+            self._start_flusher()
+        return values
+
+    def snapshot(self) -> Dict[Tuple[str, LabelKey], float | List[float]]:
+        """
+        Samples of this process, summed over its threads.
+        """
+        with self._lock:
+            thread_values = list(self._thread_values)
+        merged: Dict = {}
+        for values in thread_values:
+            for key, value in values.copy().items():
+                _merge(merged, key, value)
+        return merged
+
+    # Cross-worker aggregation
+
+    def directory(self) -> Optional[Path]:
+        path = getattr(settings, "METRICS_DIR", None)
+        return Path(path) if path else None
+
+    @contextmanager
+    def _directory_lock(self, directory: Path, exclusive: bool = False):
+        """
+        Keeps readers from seeing a snapshot both folded and still on disk.
+        """
+        with open(directory / LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _snapshot_path(self, directory: Path) -> Path:
+        return directory / f"metrics-{self.worker_id}.json"
+
+    def _write(self, path: Path, snapshot: Dict) -> None:
+        samples = [
+            [name, list(labels), value] for (name, labels), value in snapshot.items()
+        ]
+        # Written to a temporary file first, readers never see a partial one
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(samples, file)
+        os.replace(tmp_path, path)
+
+    def flush(self) -> None:
+        directory = self.directory()
+        if directory is None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._directory_lock(directory):
+            if not self._retired:
+                self._write(self._snapshot_path(directory), self.snapshot())
+
+    def retire(self) -> None:
+        """
+        Folds this worker's samples into the exited workers' snapshot and
+        removes its own, run when the worker exits.
+        """
+        directory = self.directory()
+        if directory is None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._directory_lock(directory, exclusive=True):
+            self._retired = True
+            merged = _read_snapshot(directory / EXITED_SNAPSHOT)
+            for key, value in self.snapshot().items():
+                _merge(merged, key, value)
+            self._write(directory / EXITED_SNAPSHOT, merged)
+            self._snapshot_path(directory).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """
+        Removes the snapshots of every worker, run when the server starts.
+        """
+        directory = self.directory()
+        if directory is None or not directory.exists():
+            return
+        for path in directory.glob("metrics-*.json"):
+            path.unlink(missing_ok=True)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None or self.directory() is None:
+            return
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+        self._flusher = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def collect(self) -> Dict[Tuple[str, LabelKey], float | List[float]]:
+        """
+        Samples of every worker sharing METRICS_DIR, this process otherwise.
+        """
+        directory = self.directory()
+        if directory is None:
+            return self.snapshot()
+
+        self.flush()
+        merged: Dict = {}
+        with self._directory_lock(directory):
+            for path in directory.glob("metrics-*.json"):
+                for key, value in _read_snapshot(path).items():
+                    _merge(merged, key, value)
+        return merged
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format.
+        """
+        samples = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for (sample_name, labels), value in sorted(samples.items()):
+                if sample_name == name:
+                    lines.extend(metric.exposition(labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def _read_snapshot(path: Path) -> Dict:
+    try:
+        with open(path, encoding="utf-8") as file:
+            samples = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return {
+        (name, tuple(tuple(pair) for pair in labels)): value
+        for name, labels, value in samples
+    }
+
+
+def _merge(merged: Dict, key, value) -> None:
+    current = merged.get(key)
+    if current is None:
+        merged[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(current, list):
+        for index, item in enumerate(value):
+            current[index] += item
+    else:
+        merged[key] = current + value
+
+
+def _format_labels(labels: LabelKey, extra: str = "") -> str:
+    pairs = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, registry: MetricsRegistry):
+        self.name = name
+        self.documentation = documentation
+        self.registry = registry
+        registry.register(self)
+
+    def key(self, labels: Dict[str, str]) -> Tuple[str, LabelKey]:
+        return (self.name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        values = self.registry.values()
+        key = self.key(labels)
+        values[key] = values.get(key, 0) + amount
+
+    def exposition(self, labels: LabelKey, value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {value}"]
+
+
+class Histogram(Metric):
+    """
+    Samples are stored as `[count per bucket..., sum, count]`.
+    """
+
+    type = "histogram"
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        values = self.registry.values()
+        key = self.key(labels)
+        sample = values.get(key)
+        if sample is None:
+            sample = values[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                sample[index] += 1
+                break
+        sample[-2] += value
+        sample[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def exposition(self, labels: LabelKey, value) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, value):
+            cumulative += count
+            le = _format_labels(labels, f'le="{bound}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        le = _format_labels(labels, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{le} {value[-1]}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {round(value[-2], 6)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {value[-1]}")
+        return lines
+
+
+registry = MetricsRegistry()
+
+login_attempts = Counter(
+    "auth_login_total", "Login attempts by method and outcome.", registry
+)
+login_duration = Histogram(
+    "auth_login_duration_seconds", "Login request duration by method.", registry
+)
+token_refreshes = Counter(
+    "auth_token_refresh_total", "Access token refreshes by outcome.", registry
+)
+token_refresh_duration = Histogram(
+    "auth_token_refresh_duration_seconds", "Token refresh request duration.", registry
+)
+otp_requests = Counter("otp_request_total", "OTP requests by outcome.", registry)
+otp_send_results = Counter(
+    "otp_send_result_total",
+    "OTP sends by VerifyOTPService.SendStatus, NOT_SENT without SMS_SERVICE_SENDER.",
+    registry,
+)
+otp_delivery_reports = Counter(
+    "otp_delivery_report_total",
+    "SMS provider delivery reports (OTPResultView) by status.",
+    registry,
+)
+password_hash_wait = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time password hashes waited for a hashing pool thread, by operation.",
+    registry,
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "Password hashing time by operation.", registry
+)
+password_hash_rejected = Counter(
+    "password_hash_rejected_total",
+    "Password hashes refused by a saturated hashing pool, by operation.",
+    registry,
+)
+
+# Outcome label of a BaseResponse, by message
+LOGIN_OUTCOMES = {
+    ResponseMessage.AUTH_LOGIN_SUCCESSFULLY.value: "success",
+    ResponseMessage.AUTH_WRONG_OTP.value: "wrong_otp",
+    ResponseMessage.AUTH_WRONG_PASSWORD.value: "wrong_password",
+    ResponseMessage.AUTH_USER_BANNED.value: "banned",
+    ResponseMessage.SERVICE_UNAVAILABLE.value: "saturated",
+    ResponseMessage.FAILED.value: "invalid",
+}
+REFRESH_OUTCOMES = {
+    "Token refreshed successfully": "success",
+    "Token expired": "expired",
+    "Refresh token not provided": "missing",
+    "Token is blacklisted": "blacklisted",
+    "Token is revoked": "revoked",
+    "User is banned": "banned",
+}
+OTP_REQUEST_OUTCOMES = {
+    ResponseMessage.FAILED.value: "invalid",
+}
+
+
+def response_outcome(response, outcomes: Dict[str, str]) -> str:
+    data = getattr(response, "data", None) or {}
+    # BaseResponse carries the real status in its body
+    api_status = data.get("status", response.status_code)
+    if api_status == 429:
+        return "locked"
+    outcome = outcomes.get(data.get("message"))
+    if outcome:
+        return outcome
+    return "success" if 200 <= api_status < 300 else "error"
+
+
+def instrument(counter: Counter, outcomes: Dict[str, str], histogram=None, **labels):
+    """
+    View method decorator counting responses by outcome and, with
+    `histogram`, observing their duration.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            response = method(*args, **kwargs)
+            counter.inc(outcome=response_outcome(response, outcomes), **labels)
+            if histogram is not None:
+                histogram.observe(time.perf_counter() - start, **labels)
+            return response
+
+        return wrapper
+
+    return decorator
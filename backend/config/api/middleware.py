@@ -0,0 +1,203 @@
+"""
+API Middlewares
+"""
+
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.state import token_backend
+
+from config.api.enums import ResponseMessage
+from config.api.jwt import CachedRefreshToken, get_or_mint_access_token
+from config.api.response import CSRF_COOKIE, CSRF_HEADER, set_jwt_cookies
+from config.api.routers import begin_request, end_request
+
+
+class JWTSlidingRenewalMiddleware:
+    """
+    Transparently renews the access token cookie so the frontend does not
+    have to call `authenticate/token-refresh/` every ACCESS_TOKEN_LIFETIME.
+
+    When a request carries an access token that expires within RENEW_BEFORE
+    (or expired less than GRACE ago) and a valid refresh_token cookie, a new
+    access token is minted, injected into the request so
+    JWTCookieAuthentication accepts it, and set as access_token / access_exp
+    cookies on the response.
+
+    The refresh token's revocation check is served from the revocation cache
+    (config.api.revocation), so renewals normally cost no query.
+
+    Enabled with JWT_SLIDING_RENEWAL_ENABLED, thresholds live in
+    JWT_SLIDING_RENEWAL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, "JWT_SLIDING_RENEWAL", {})
+        self.renew_before = int(config.get("RENEW_BEFORE").total_seconds())
+        self.grace = int(config.get("GRACE").total_seconds())
+        self.exclude_paths = tuple(config.get("EXCLUDE_PATHS", ()))
+
+    def __call__(self, request):
+        tokens = self.renew(request)
+        response = self.get_response(request)
+        # Never override cookies set by the view itself (login, refresh, logout)
+        if tokens and "access_token" not in response.cookies:
+            set_jwt_cookies(response, tokens)
+        return response
+
+    def renew(self, request):
+        if request.path.startswith(self.exclude_paths):
+            return None
+
+        raw_access = request.COOKIES.get("access_token")
+        raw_refresh = request.COOKIES.get("refresh_token")
+        if not raw_access or not raw_refresh:
+            return None
+
+        try:
+            # Only the expiry is needed here, the new token is derived from
+            # the fully verified refresh token below
+            access_payload = token_backend.decode(raw_access, verify=False)
+        except TokenBackendError:
+            return None
+
+        remaining = int(access_payload.get("exp", 0)) - int(time.time())
+        if remaining > self.renew_before or remaining < -self.grace:
+            return None
+
+        try:
+            refresh = CachedRefreshToken(raw_refresh)
+        except TokenError:
+            return None
+
+        user_id_claim = api_settings.USER_ID_CLAIM
+        if access_payload.get(user_id_claim) != refresh.payload.get(user_id_claim):
+            return None
+
+        tokens = get_or_mint_access_token(refresh)
+        # Let this request authenticate with the renewed token
+        request.COOKIES["access_token"] = tokens["access"]
+        return tokens
+
+
+class ReplicaPinMiddleware:
+    """
+    Request scope for config.api.routers.ReplicaRouter: reads may go to a
+    replica until the request writes. Clients that wrote get the
+    DB_REPLICA_PIN_COOKIE cookie and read from the primary for
+    DB_REPLICA_PIN_SECONDS, longer than the expected replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie = settings.DB_REPLICA_PIN_COOKIE
+        self.pin_seconds = settings.DB_REPLICA_PIN_SECONDS
+
+    def __call__(self, request):
+        token = begin_request(pinned=self.cookie in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = end_request(token)
+
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                self.cookie,
+                "1",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class NonApiMiddleware:
+    """
+    Lean middleware profile (MIDDLEWARE_PROFILE="lean"): the API is stateless
+    and authenticates per view with JWTCookieAuthentication, so requests under
+    API_PATH_PREFIX skip the session, auth, CSRF and X-Frame-Options
+    middlewares (API_SKIPPED_MIDDLEWARE). Every other path still runs them,
+    in their original order.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.API_PATH_PREFIX
+
+        handler = get_response
+        self.view_middleware = []
+        for path in reversed(settings.API_SKIPPED_MIDDLEWARE):
+            handler = import_string(path)(handler)
+            if hasattr(handler, "process_view"):
+                self.view_middleware.insert(0, handler)
+        self.non_api_handler = handler
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+        return self.non_api_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Django only calls process_view of the top-level middlewares
+        if request.path_info.startswith(self.prefix):
+            return None
+        for middleware in self.view_middleware:
+            response = middleware.process_view(
+                request, view_func, view_args, view_kwargs
+            )
+            if response:
+                return response
+        return None
+
+
+class DoubleSubmitCsrfMiddleware:
+    """
+    CSRF protection for the cookie-JWT API in the lean middleware profile.
+
+    Login sets a random CSRF_COOKIE readable by the frontend next to the JWT
+    cookies (`set_jwt_cookies`). Unsafe requests under API_PATH_PREFIX that
+    carry a JWT cookie must echo it in the X-CSRFToken header, which a
+    cross-site form or script can't do. Requests without JWT cookies (header
+    authentication, anonymous) and API_CSRF_EXEMPT_PATHS (the login
+    endpoints, which issue the cookie) are not checked.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.API_PATH_PREFIX
+        self.exempt_paths = tuple(settings.API_CSRF_EXEMPT_PATHS)
+
+    def __call__(self, request):
+        if self.is_forged(request):
+            return JsonResponse(
+                {
+                    "success": False,
+                    "status": 403,
+                    "message": ResponseMessage.ACCESS_DENIED.value,
+                    "data": None,
+                }
+            )
+        return self.get_response(request)
+
+    def is_forged(self, request) -> bool:
+        if request.method in SAFE_METHODS:
+            return False
+        path = request.path_info
+        if not path.startswith(self.prefix) or path.startswith(self.exempt_paths):
+            return False
+        if (
+            "access_token" not in request.COOKIES
+            and "refresh_token" not in request.COOKIES
+        ):
+            return False
+
+        cookie = request.COOKIES.get(CSRF_COOKIE, "")
+        header = request.META.get(CSRF_HEADER, "")
+        return not (cookie and header and constant_time_compare(cookie, header))
@@ -0,0 +1,394 @@
+"""
+Performance Budget Harness
+
+Drives every route of `apps.account.urls.frontend` and
+`apps.sms_service.urls.frontend` through the Django test client against a
+seeded throwaway SQLite test database. For each endpoint it records:
+
+- queries: number of SQL queries executed by the request
+- db_ms: total time spent in the database
+- latency_ms: wall time of the request
+
+The numbers are compared against the budgets checked in at
+``config/api/perf_budgets.json``. Every scenario must also answer with its
+expected status, an error envelope usually runs fewer queries and would
+otherwise pass. Query counts are deterministic and gate the test suite
+(``config.api.tests.test_perf_budgets``). Timings depend on the machine,
+they are the median of several runs, written with headroom and only
+checked on request by the ``perf_budget`` management command:
+
+    python manage.py perf_budget             # fail if a query budget is exceeded
+    python manage.py perf_budget --timings   # also check db_ms and latency_ms
+    python manage.py perf_budget --update    # rewrite budgets from this run
+
+OTP codes are delivered through the local stub sender, so no network
+access is needed.
+"""
+
+import json
+import math
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from django.db import connections
+from rest_framework.test import APIClient
+
+BUDGETS_PATH = Path(__file__).resolve().parent / "perf_budgets.json"
+STUB_SMS_SENDER = "apps.sms_service.utils.stub.stub_send_otp"
+# Timing budgets are written as measured value * headroom (at least 5 ms)
+TIMING_HEADROOM = 3
+TIMING_FLOOR_MS = 5
+
+PASSWORD = "Perf1234"
+
+
+class QueryRecorder:
+    """
+    Counts queries and database time on every configured connection
+    using `connection.execute_wrapper`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._stack: Optional[ExitStack] = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - start
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._stack:
+            self._stack.close()
+
+
+@dataclass
+class Scenario:
+    """
+    A single measured request.
+    `setup` runs before the request (not measured) and may return extra
+    request data, e.g. a freshly created OTP code. `phone` is unique per
+    run so scenarios never see each other's rows. `status` is the expected
+    API status.
+    """
+
+    name: str
+    method: str
+    path: str
+    data: Callable[[str], Dict[str, Any]] = lambda phone: {"phone": phone}
+    setup: Optional[Callable[[APIClient, str], Optional[Dict[str, Any]]]] = None
+    status: int = 200
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    status: int
+    expected_status: int
+    queries: int
+    db_ms: float
+    latency_ms: float
+
+    def as_budget(self) -> Dict[str, int | float]:
+        return {
+            "queries": self.queries,
+            "db_ms": max(math.ceil(self.db_ms * TIMING_HEADROOM), TIMING_FLOOR_MS),
+            "latency_ms": max(
+                math.ceil(self.latency_ms * TIMING_HEADROOM), TIMING_FLOOR_MS
+            ),
+        }
+
+
+# Seed helpers
+
+
+def _create_user(phone: str, password: Optional[str] = None):
+    from apps.account.models import User
+
+    user = User.objects.create_user(phone=phone)
+    if password:
+        user.set_password(password)
+        user.save(update_fields=["password"])
+    return user
+
+
+def _create_otp(phone: str, usage: str) -> str:
+    from apps.sms_service.utils.backends import get_otp_backend
+
+    return get_otp_backend().issue(phone, usage)
+
+
+def _user_setup(password: Optional[str] = None):
+    def setup(client: APIClient, phone: str) -> None:
+        _create_user(phone, password)
+
+    return setup
+
+
+def _login_setup(client: APIClient, phone: str) -> None:
+    from config.api.response import CSRF_COOKIE
+
+    tokens = _create_user(phone).generate_jwt_token()
+    client.cookies["refresh_token"] = tokens["refresh"]
+    client.cookies["access_token"] = tokens["access"]
+    # Double-submit CSRF token of the lean middleware profile
+    client.cookies[CSRF_COOKIE] = phone
+    client.credentials(HTTP_X_CSRFTOKEN=phone)
+
+
+def _logout_setup(client: APIClient, phone: str) -> Dict[str, Any]:
+    _login_setup(client, phone)
+    return {"refresh": client.cookies["refresh_token"].value}
+
+
+def _otp_setup(usage: str, with_user: bool):
+    def setup(client: APIClient, phone: str) -> Dict[str, Any]:
+        if with_user:
+            _create_user(phone)
+        return {"otp": _create_otp(phone, usage)}
+
+    return setup
+
+
+def _reset_setup(client: APIClient, phone: str) -> Dict[str, Any]:
+    from apps.account.utils.password_reset import make_reset_token
+
+    return {"token": make_reset_token(_create_user(phone))}
+
+
+def get_scenarios() -> List[Scenario]:
+    authenticate = "AUTHENTICATE"
+    reset_password = "RESET_PASSWORD"
+    return [
+        Scenario(
+            name="authenticate_check_new_user",
+            method="post",
+            path="/api/account/authenticate/check/",
+        ),
+        Scenario(
+            name="authenticate_check_password_user",
+            method="post",
+            path="/api/account/authenticate/check/",
+            setup=_user_setup(PASSWORD),
+        ),
+        Scenario(
+            name="authenticate_password",
+            method="post",
+            path="/api/account/authenticate/password/",
+            data=lambda phone: {"phone": phone, "password": PASSWORD},
+            setup=_user_setup(PASSWORD),
+        ),
+        Scenario(
+            name="authenticate_otp_signup",
+            method="post",
+            path="/api/account/authenticate/otp/",
+            setup=_otp_setup(authenticate, with_user=False),
+        ),
+        Scenario(
+            name="authenticate_otp_existing_user",
+            method="post",
+            path="/api/account/authenticate/otp/",
+            setup=_otp_setup(authenticate, with_user=True),
+        ),
+        Scenario(
+            name="authenticate_token_refresh",
+            method="post",
+            path="/api/account/authenticate/token-refresh/",
+            data=lambda phone: {},
+            setup=_login_setup,
+        ),
+        Scenario(
+            name="authenticate_current",
+            method="get",
+            path="/api/account/authenticate/current/",
+            data=lambda phone: {},
+            setup=_login_setup,
+        ),
+        Scenario(
+            name="authenticate_logout",
+            method="post",
+            path="/api/account/authenticate/logout/",
+            data=lambda phone: {},
+            setup=_logout_setup,
+        ),
+        Scenario(
+            name="authenticate_logout_all",
+            method="post",
+            path="/api/account/authenticate/logout-all/",
+            data=lambda phone: {},
+            setup=_login_setup,
+        ),
+        Scenario(
+            name="forget_password_check",
+            method="post",
+            path="/api/account/authenticate/forget-password/check/",
+            setup=_user_setup(),
+        ),
+        Scenario(
+            name="forget_password_otp",
+            method="post",
+            path="/api/account/authenticate/forget-password/otp/",
+            setup=_otp_setup(reset_password, with_user=True),
+        ),
+        Scenario(
+            name="forget_password_reset",
+            method="post",
+            path="/api/account/authenticate/forget-password/reset/",
+            data=lambda phone: {
+                "phone": phone,
+                "password": PASSWORD,
+                "confirm_password": PASSWORD,
+            },
+            setup=_reset_setup,
+        ),
+        Scenario(
+            name="sms_service_request_otp",
+            method="post",
+            path="/api/sms-service/request/otp/",
+            data=lambda phone: {"phone": phone, "otp_usage": authenticate},
+        ),
+    ]
+
+
+# Runner
+
+_phone_counter = 0
+
+
+def _next_phone() -> str:
+    global _phone_counter
+    _phone_counter += 1
+    return f"0912{_phone_counter:07d}"
+
+
+def run_scenario(scenario: Scenario, repeat: int = 5) -> ScenarioResult:
+    """
+    Runs `scenario` `repeat` times, each with a fresh client and phone.
+    Reports the highest query count, the median timings and the first
+    unexpected status, if any.
+    """
+    queries, db_times, latencies, statuses = [], [], [], []
+    for _ in range(repeat):
+        client = APIClient()
+        phone = _next_phone()
+        data = scenario.data(phone)
+        if scenario.setup:
+            data.update(scenario.setup(client, phone) or {})
+
+        request = getattr(client, scenario.method)
+        with QueryRecorder() as recorder:
+            start = perf_counter()
+            response = request(scenario.path, data, format="json")
+            latencies.append(perf_counter() - start)
+
+        queries.append(recorder.count)
+        db_times.append(recorder.duration)
+        # BaseResponse carries the real status in its body
+        statuses.append(response.json().get("status", response.status_code))
+
+    unexpected = [status for status in statuses if status != scenario.status]
+    return ScenarioResult(
+        name=scenario.name,
+        status=unexpected[0] if unexpected else scenario.status,
+        expected_status=scenario.status,
+        queries=max(queries),
+        db_ms=round(median(db_times) * 1000, 3),
+        latency_ms=round(median(latencies) * 1000, 3),
+    )
+
+
+def load_budgets(path: Path = BUDGETS_PATH) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_budgets(
+    budgets: Dict[str, Dict[str, float]], path: Path = BUDGETS_PATH
+) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(budgets, file, indent=2)
+        file.write("\n")
+
+
+def check_budgets(
+    results: List[ScenarioResult],
+    budgets: Dict[str, Dict[str, float]],
+    timings: bool = False,
+) -> List[str]:
+    """
+    Returns a list of human readable budget violations. Only the status and
+    the query count are checked unless `timings` is set.
+    """
+    failures = []
+    metrics = ("queries", "db_ms", "latency_ms") if timings else ("queries",)
+    for result in results:
+        if result.status != result.expected_status:
+            failures.append(
+                f"{result.name}: status={result.status} "
+                f"(expected {result.expected_status})"
+            )
+        budget = budgets.get(result.name)
+        if budget is None:
+            failures.append(f"{result.name}: no budget defined")
+            continue
+        for metric in metrics:
+            value = getattr(result, metric)
+            if metric in budget and value > budget[metric]:
+                failures.append(
+                    f"{result.name}: {metric}={value} (budget {budget[metric]})"
+                )
+    return failures
+
+
+# Middleware benchmark
+
+# Requests that reach a view without touching the database, so the
+# difference between two middleware stacks is their own per-request cost
+MIDDLEWARE_BENCHMARK_REQUESTS = [
+    ("get", "/api/account/authenticate/current/"),
+    ("post", "/api/account/authenticate/token-refresh/"),
+]
+
+
+def benchmark_middleware(
+    middleware: List[str],
+    method: str,
+    path: str,
+    requests: int = 1000,
+    rounds: int = 5,
+) -> float:
+    """
+    Median time per request in microseconds of `method path` through a
+    request handler built with the `middleware` stack.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+
+    factory = RequestFactory()
+    with override_settings(MIDDLEWARE=middleware, ALLOWED_HOSTS=["testserver"]):
+        handler = WSGIHandler()
+        samples = []
+        for _ in range(rounds):
+            batch = [getattr(factory, method)(path) for _ in range(requests)]
+            start = perf_counter()
+            for request in batch:
+                handler.get_response(request)
+            samples.append((perf_counter() - start) / requests)
+    return round(median(samples) * 1_000_000, 1)
@@ -0,0 +1,204 @@
+"""
+On-demand Sampling Profiler
+
+Staff start a profile of a live worker through `ProfilingView`
+(``api/admin/profile/``), enabled with PROFILING["ENABLED"]. The worker
+serving that call samples the stacks of the threads running requests, and
+of the password hashing pool threads while they hash, every INTERVAL_MS
+(wall clock, so waits show up too) until it served `requests` more
+requests or `seconds` passed (capped at MAX_SECONDS).
+
+The result is in the collapsed stack format (one `frame;frame;frame count`
+line per stack, root first), readable by flamegraph.pl, speedscope and
+inferno. The last profile of the worker is returned by a GET on the same
+endpoint and written to PROFILING["DIR"] when set.
+
+While no profile runs, ProfilingMiddleware and `profiled_thread()` only
+read one attribute; there is no sampler thread.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+
+def collapse_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileSession:
+    def __init__(self, requests: Optional[int], seconds: float, interval: float):
+        self.max_requests = requests
+        self.seconds = seconds
+        self.interval = interval
+        self.started_at = datetime.now()
+        self.deadline = time.monotonic() + seconds
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._threads: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def enter(self, ident: int) -> None:
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def exit(self, ident: int) -> None:
+        with self._lock:
+            if self._threads.get(ident, 0) <= 1:
+                self._threads.pop(ident, None)
+            else:
+                self._threads[ident] -= 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self.requests += 1
+            if self.max_requests and self.requests >= self.max_requests:
+                self._stop.set()
+
+    def sample(self) -> None:
+        frames = sys._current_frames()
+        with self._lock:
+            idents = list(self._threads)
+        for ident in idents:
+            frame = frames.get(ident)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+                self.samples += 1
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= self.deadline:
+                break
+            self.sample()
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(),
+            "max_requests": self.max_requests,
+            "seconds": self.seconds,
+            "requests": self.requests,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+        }
+
+
+class SamplingProfiler:
+    """
+    Runs at most one ProfileSession per worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.session: Optional[ProfileSession] = None
+        self.last: Optional[ProfileSession] = None
+        self.last_path: Optional[Path] = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {
+            "ENABLED": False,
+            "INTERVAL_MS": 5,
+            "MAX_SECONDS": 60,
+            "DIR": None,
+            **getattr(settings, "PROFILING", {}),
+        }
+
+    def start(self, requests: Optional[int] = None, seconds: Optional[float] = None):
+        """
+        Starts a session, returns None when one is already running.
+        """
+        config = self.config
+        max_seconds = config["MAX_SECONDS"]
+        seconds = min(seconds or max_seconds, max_seconds)
+        with self._lock:
+            if self.session is not None:
+                return None
+            session = ProfileSession(requests, seconds, config["INTERVAL_MS"] / 1000)
+            self.session = session
+
+        def run():
+            try:
+                session.run()
+            finally:
+                self._finish(session)
+
+        threading.Thread(target=run, name="sampling-profiler", daemon=True).start()
+        return session
+
+    def _finish(self, session: ProfileSession) -> None:
+        with self._lock:
+            self.session = None
+            self.last = session
+        directory = self.config["DIR"]
+        if directory:
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            stamp = session.started_at.strftime("%Y%m%d-%H%M%S")
+            path = directory / f"profile-{os.getpid()}-{stamp}.folded"
+            path.write_text(session.collapsed(), encoding="utf-8")
+            self.last_path = path
+
+    @contextmanager
+    def profiled_thread(self):
+        """
+        Samples the current thread for the duration of the block if a
+        session is running.
+        """
+        session = self.session
+        if session is None:
+            yield
+            return
+        ident = threading.get_ident()
+        session.enter(ident)
+        try:
+            yield
+        finally:
+            session.exit(ident)
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """
+    Registers request threads with the running ProfileSession, installed
+    first when PROFILING["ENABLED"] so the other middlewares (e.g. sliding
+    access token renewal) are covered too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = profiler.session
+        if session is None:
+            return self.get_response(request)
+
+        ident = threading.get_ident()
+        session.enter(ident)
+        try:
+            return self.get_response(request)
+        finally:
+            session.exit(ident)
+            session.request_finished()
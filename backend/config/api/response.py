@@ -8,20 +8,30 @@ Cookie Settings:
 - refresh_token: HTTP-only, lifetime from SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'], secure (for production with HTTPS)
 - access_token: HTTP-only, lifetime from SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'], secure (for production with HTTPS)
 - access_exp: Regular cookie (readable by frontend), same lifetime as access_token, secure
+- csrf_token: Regular cookie set on login, echoed in the X-CSRFToken header
+  (config.api.middleware.DoubleSubmitCsrfMiddleware)
 
 Note: In production, ensure HTTPS is enabled and set secure=True for all cookies.
 For development over HTTP, you may need to set secure=False.
 """
 
+import secrets
+from base64 import b64encode
+from datetime import datetime
+from urllib import parse
+
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
-from datetime import datetime
 from django.conf import settings
 
+from config.api.count import CountStrategyPaginator, ExactCount, estimate_count
 from config.api.enums import ResponseMessage
 from django.core.paginator import EmptyPage
 
+CSRF_COOKIE = "csrf_token"
+CSRF_HEADER = "HTTP_X_CSRFTOKEN"
+
 
 def clear_jwt_cookies(response):
     """
@@ -35,6 +45,85 @@ def clear_jwt_cookies(response):
     response.delete_cookie("refresh_token", domain=cookie_domain)
     response.delete_cookie("access_token", domain=cookie_domain)
     response.delete_cookie("access_exp", domain=cookie_domain)
+    response.delete_cookie(CSRF_COOKIE, domain=cookie_domain)
+
+
+def set_jwt_cookies(response, jwt_tokens):
+    """
+    Utility function to set JWT-related cookies on a response.
+
+    Args:
+        response: Django Response object to set cookies on
+        jwt_tokens: dict with any of "refresh", "access" and "access_exp"
+    """
+    # Get cookie settings from Django settings
+    cookie_secure = getattr(settings, "JWT_COOKIE_SECURE", False)
+    cookie_samesite = getattr(settings, "JWT_COOKIE_SAMESITE", "Lax")
+    cookie_domain = getattr(settings, "JWT_COOKIE_DOMAIN", None)
+
+    # Get token lifetimes from SIMPLE_JWT settings
+    simple_jwt = getattr(settings, "SIMPLE_JWT", {})
+    access_token_lifetime = simple_jwt.get("ACCESS_TOKEN_LIFETIME")
+    refresh_token_lifetime = simple_jwt.get("REFRESH_TOKEN_LIFETIME")
+
+    # Convert timedelta to seconds, fallback to default values
+    access_max_age = (
+        int(access_token_lifetime.total_seconds())
+        if access_token_lifetime
+        else 60
+    )
+    refresh_max_age = (
+        int(refresh_token_lifetime.total_seconds())
+        if refresh_token_lifetime
+        else 365 * 24 * 60 * 60
+    )
+
+    # Set refresh token as HTTP-only cookie
+    if "refresh" in jwt_tokens:
+        response.set_cookie(
+            "refresh_token",
+            jwt_tokens["refresh"],
+            max_age=refresh_max_age,
+            httponly=True,
+            secure=cookie_secure,
+            samesite=cookie_samesite,
+            domain=cookie_domain,
+        )
+
+        # New double-submit CSRF token per login, readable by the frontend
+        response.set_cookie(
+            CSRF_COOKIE,
+            secrets.token_urlsafe(32),
+            max_age=refresh_max_age,
+            httponly=False,
+            secure=cookie_secure,
+            samesite=cookie_samesite,
+            domain=cookie_domain,
+        )
+
+    # Set access token as HTTP-only cookie
+    if "access" in jwt_tokens:
+        response.set_cookie(
+            "access_token",
+            jwt_tokens["access"],
+            max_age=refresh_max_age,
+            httponly=True,
+            secure=cookie_secure,
+            samesite=cookie_samesite,
+            domain=cookie_domain,
+        )
+
+    # Set access token expiration as regular cookie (not HTTP-only)
+    if "access_exp" in jwt_tokens:
+        response.set_cookie(
+            "access_exp",
+            str(jwt_tokens["access_exp"]),
+            max_age=access_max_age,  # Same as access token
+            httponly=False,  # Not HTTP-only so frontend can read it
+            secure=cookie_secure,
+            samesite=cookie_samesite,
+            domain=cookie_domain,
+        )
 
 
 class BaseResponse(Response):
@@ -68,78 +157,32 @@ class JWTCookieResponse(BaseResponse):
 
         # Set JWT tokens as cookies if provided
         if jwt_tokens:
-            # Get cookie settings from Django settings
-            cookie_secure = getattr(settings, "JWT_COOKIE_SECURE", False)
-            cookie_samesite = getattr(settings, "JWT_COOKIE_SAMESITE", "Lax")
-            cookie_domain = getattr(settings, "JWT_COOKIE_DOMAIN", None)
-
-            # Get token lifetimes from SIMPLE_JWT settings
-            simple_jwt = getattr(settings, "SIMPLE_JWT", {})
-            access_token_lifetime = simple_jwt.get("ACCESS_TOKEN_LIFETIME")
-            refresh_token_lifetime = simple_jwt.get("REFRESH_TOKEN_LIFETIME")
-
-            # Convert timedelta to seconds, fallback to default values
-            access_max_age = (
-                int(access_token_lifetime.total_seconds())
-                if access_token_lifetime
-                else 60
-            )
-            refresh_max_age = (
-                int(refresh_token_lifetime.total_seconds())
-                if refresh_token_lifetime
-                else 365 * 24 * 60 * 60
-            )
-
-            # Set refresh token as HTTP-only cookie
-            if "refresh" in jwt_tokens:
-                self.set_cookie(
-                    "refresh_token",
-                    jwt_tokens["refresh"],
-                    max_age=refresh_max_age,
-                    httponly=True,
-                    secure=cookie_secure,
-                    samesite=cookie_samesite,
-                    domain=cookie_domain,
-                )
-
-            # Set access token as HTTP-only cookie
-            if "access" in jwt_tokens:
-                self.set_cookie(
-                    "access_token",
-                    jwt_tokens["access"],
-                    max_age=refresh_max_age,
-                    httponly=True,
-                    secure=cookie_secure,
-                    samesite=cookie_samesite,
-                    domain=cookie_domain,
-                )
-
-            # Set access token expiration as regular cookie (not HTTP-only)
-            if "access_exp" in jwt_tokens:
-                self.set_cookie(
-                    "access_exp",
-                    str(jwt_tokens["access_exp"]),
-                    max_age=access_max_age,  # Same as access token
-                    httponly=False,  # Not HTTP-only so frontend can read it
-                    secure=cookie_secure,
-                    samesite=cookie_samesite,
-                    domain=cookie_domain,
-                )
+            set_jwt_cookies(self, jwt_tokens)
 
 
 class PaginationApiResponse(PageNumberPagination):
+    """
+    Offset pagination used by default for all list views.
+
+    The count strategy (see config.api.count) can be overridden per view
+    with a `pagination_count_strategy` attribute.
+    """
+
     page_size_query_param = "take"
     page_query_param = "page"
     page_size = 20
     max_page_size = 100
+    django_paginator_class = CountStrategyPaginator
+    count_strategy = ExactCount()
 
     def get_paginated_response(self, data) -> BaseResponse:
         current_page = self.page.number
         page_count = self.page.paginator.num_pages
         pagination = {
             "entity_count": self.page.paginator.count,
+            "entity_count_is_exact": self.page.paginator.count_is_exact,
             "current_page": self.page.number,
-            "page_count": self.page.paginator.num_pages,
+            "page_count": page_count,
             "start_page": max(current_page - 2, 1),
             "end_page": min(current_page + 2, page_count),
             "take": self.page.paginator.per_page,
@@ -167,7 +210,13 @@ class PaginationApiResponse(PageNumberPagination):
             page_size = page_size[0] if page_size else self.page_size
         page_size = int(page_size) if page_size else self.page_size
 
-        paginator = self.django_paginator_class(queryset, page_size)
+        paginator = self.django_paginator_class(
+            queryset,
+            page_size,
+            count_strategy=getattr(
+                view, "pagination_count_strategy", self.count_strategy
+            ),
+        )
         page_number = self.get_page_number(request, paginator)
 
         try:
@@ -181,3 +230,65 @@ class PaginationApiResponse(PageNumberPagination):
 
         self.request = request
         return list(self.page)
+
+
+class CursorPaginationApiResponse(CursorPagination):
+    """
+    Keyset pagination with the same response envelope as PaginationApiResponse.
+
+    Pages are fetched with ``WHERE <ordering> > <last value>`` on an indexed
+    column instead of an OFFSET, so the cost of a page does not grow with its
+    position. The client gets an opaque ``next_cursor`` / ``previous_cursor``
+    and sends it back through the ``cursor`` query parameter.
+
+    `entity_count` is only filled when `include_estimated_count` is enabled and
+    the database can provide a planner estimate (PostgreSQL), an exact
+    ``COUNT(*)`` is never executed.
+    """
+
+    page_size_query_param = "take"
+    cursor_query_param = "cursor"
+    page_size = 20
+    max_page_size = 100
+    ordering = "-id"
+    include_estimated_count = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.entity_count = None
+        if self.include_estimated_count or getattr(
+            view, "pagination_estimated_count", False
+        ):
+            self.entity_count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def encode_cursor(self, cursor):
+        """
+        Returns only the opaque cursor token instead of a full URL,
+        the frontend builds its own request URLs.
+        """
+        tokens = {}
+        if cursor.offset != 0:
+            tokens["o"] = str(cursor.offset)
+        if cursor.reverse:
+            tokens["r"] = "1"
+        if cursor.position is not None:
+            tokens["p"] = cursor.position
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        return b64encode(querystring.encode("ascii")).decode("ascii")
+
+    def get_paginated_response(self, data) -> BaseResponse:
+        pagination = {
+            "entity_count": self.entity_count,
+            "take": self.page_size,
+            "has_next": self.has_next,
+            "has_previous": self.has_previous,
+            "next_cursor": self.get_next_link(),
+            "previous_cursor": self.get_previous_link(),
+            "data": data,
+        }
+        return BaseResponse(
+            data=pagination,
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
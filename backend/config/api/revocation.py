@@ -0,0 +1,117 @@
+"""
+Token Revocation Cache
+
+Keeps the result of refresh-token blacklist lookups in the shared cache so
+that hot paths (token refresh, sliding renewal) do not query the
+`token_blacklist` tables on every request.
+
+It also serves per-user security stamps: every token carries the user's
+`security_stamp` in the SECURITY_STAMP_CLAIM claim and is rejected once the
+stamp was bumped (`User.revoke_all_sessions`), which logs out all devices
+without enumerating OutstandingToken rows. With the default per-process
+cache a bump only reaches the other workers once their cached stamp expires,
+so stamps are then cached for JWT_SECURITY_STAMP_LOCAL_CACHE_TTL seconds
+instead of JWT_SECURITY_STAMP_CACHE_TTL.
+
+Revocations are written to the cache when they happen (see
+`mark_refresh_token_revoked`), so with a shared cache backend (CACHE_URL) a
+logout is visible to every worker immediately. With the default per-process
+cache other workers may accept the token for up to
+JWT_REVOCATION_CACHE_TTL seconds.
+"""
+
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from config.api.cache import is_shared_cache
+
+REVOKED_KEY = "jwt:revoked:{jti}"
+SECURITY_STAMP_KEY = "user:security-stamp:{user_id}"
+SECURITY_STAMP_CLAIM = "sst"
+
+
+def _remaining(exp: Optional[int]) -> Optional[int]:
+    """
+    Seconds until `exp`, a revocation only has to be remembered that long.
+    """
+    if not exp:
+        return None
+    return max(int(exp - time.time()), 1)
+
+
+def is_refresh_token_revoked(jti: str, exp: Optional[int] = None) -> bool:
+    """
+    Returns True if the refresh token with `jti` is blacklisted.
+    """
+    key = REVOKED_KEY.format(jti=jti)
+    revoked = cache.get(key)
+    if revoked is None:
+        revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        ttl = _remaining(exp) if revoked else settings.JWT_REVOCATION_CACHE_TTL
+        cache.set(key, revoked, ttl)
+    return revoked
+
+
+def mark_refresh_token_revoked(jti: str, exp: Optional[int] = None) -> None:
+    """
+    Records a revocation in the cache, call after `token.blacklist()`.
+    """
+    cache.set(REVOKED_KEY.format(jti=jti), True, _remaining(exp))
+
+
+def _security_stamp_ttl() -> int:
+    ttl = settings.JWT_SECURITY_STAMP_CACHE_TTL
+    if is_shared_cache():
+        return ttl
+    return min(ttl, settings.JWT_SECURITY_STAMP_LOCAL_CACHE_TTL)
+
+
+def set_cached_security_stamp(user_id, stamp: int, overwrite: bool = True) -> None:
+    """
+    Stores the stamp in the cache. Use `overwrite=False` to only warm the
+    cache, so a stale user instance never hides a newer revocation.
+    """
+    store = cache.set if overwrite else cache.add
+    store(
+        SECURITY_STAMP_KEY.format(user_id=user_id),
+        stamp,
+        _security_stamp_ttl(),
+    )
+
+
+def get_security_stamp(user_id) -> Optional[int]:
+    """
+    Returns the user's current security stamp, `None` if the user is gone.
+    """
+    key = SECURITY_STAMP_KEY.format(user_id=user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        from django.contrib.auth import get_user_model
+
+        stamp = (
+            get_user_model()
+            .objects.filter(pk=user_id)
+            .values_list("security_stamp", flat=True)
+            .first()
+        )
+        if stamp is None:
+            return None
+        set_cached_security_stamp(user_id, stamp)
+    return stamp
+
+
+def is_security_stamp_valid(payload, stamp: Optional[int] = None) -> bool:
+    """
+    Compares a token payload against the user's security stamp. Pass `stamp`
+    when the user row is already loaded to skip the cache lookup.
+    """
+    if stamp is None:
+        stamp = get_security_stamp(payload.get(api_settings.USER_ID_CLAIM))
+        if stamp is None:
+            return False
+    return payload.get(SECURITY_STAMP_CLAIM, 0) == stamp
@@ -0,0 +1,174 @@
+"""
+Read Replica Router
+
+Sends reads of DB_REPLICA_MODELS (the user and token blacklist lookups on the
+auth hot path) to the replicas configured with DB_REPLICA_URLS, everything
+else goes to "default".
+
+Consistency rules:
+
+- reads only go to a replica inside a request (ReplicaPinMiddleware), never
+  in management commands or background threads.
+- once a request writes, or while it is in a transaction, the rest of the
+  request reads from the primary, so OTP consumption and signup read their
+  own writes.
+- a request that wrote also pins its client to the primary for
+  DB_REPLICA_PIN_SECONDS with a cookie, covering replication lag for the
+  follow-up requests (e.g. `current` right after signup).
+
+A request sticks to one replica, chosen round robin or by the fewest
+in-flight requests in this worker (DB_REPLICA_SELECTION).
+
+ShardRouter places the phone-keyed auth tables on the DB_SHARD_URLS shards,
+see `config.api.sharding`.
+"""
+
+import itertools
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from config.api.sharding import get_current_shard, shard_for_phone
+
+REPLICA_PREFIX = "replica_"
+
+# Sharded models routed by their own phone field
+PHONE_KEYED_MODELS = {
+    "account.user": "phone",
+    "sms_service.verifyotpservice": "to",
+}
+# Sharded models routed by the row they belong to
+PARENT_KEYED_MODELS = {
+    "account.userpasswordresettoken": "user",
+    "token_blacklist.outstandingtoken": "user",
+    "token_blacklist.blacklistedtoken": "token",
+}
+
+
+@dataclass
+class RequestDatabaseState:
+    pinned: bool = False
+    wrote: bool = False
+    replica: Optional[str] = None
+
+
+_request_state: ContextVar[Optional[RequestDatabaseState]] = ContextVar(
+    "request_database_state", default=None
+)
+
+
+def get_replica_aliases() -> List[str]:
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+class ReplicaSelector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cycle = None
+        self._in_flight: Dict[str, int] = {}
+
+    def acquire(self, replicas: List[str]) -> str:
+        with self._lock:
+            if getattr(settings, "DB_REPLICA_SELECTION", "round_robin") == "least_loaded":
+                alias = min(replicas, key=lambda a: self._in_flight.get(a, 0))
+            else:
+                if self._cycle is None:
+                    self._cycle = itertools.cycle(replicas)
+                alias = next(self._cycle)
+            self._in_flight[alias] = self._in_flight.get(alias, 0) + 1
+            return alias
+
+    def release(self, alias: str) -> None:
+        with self._lock:
+            self._in_flight[alias] = max(self._in_flight.get(alias, 0) - 1, 0)
+
+    def in_flight(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._in_flight)
+
+
+replica_selector = ReplicaSelector()
+
+
+def begin_request(pinned: bool = False):
+    return _request_state.set(RequestDatabaseState(pinned=pinned))
+
+
+def end_request(token) -> RequestDatabaseState:
+    state = _request_state.get()
+    _request_state.reset(token)
+    if state.replica:
+        replica_selector.release(state.replica)
+    return state
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state.pinned or state.wrote:
+            return None
+        if model._meta.label_lower not in settings.DB_REPLICA_MODELS:
+            return None
+        if connections["default"].in_atomic_block:
+            return None
+        if state.replica is None:
+            replicas = get_replica_aliases()
+            if not replicas:
+                return None
+            state.replica = replica_selector.acquire(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return not db.startswith(REPLICA_PREFIX)
+
+
+class ShardRouter:
+    def _db_for_model(self, model, instance=None) -> Optional[str]:
+        label = model._meta.label_lower
+        if label not in PHONE_KEYED_MODELS and label not in PARENT_KEYED_MODELS:
+            return None
+
+        if instance is not None:
+            if instance._state.db:
+                return instance._state.db
+            if label in PHONE_KEYED_MODELS:
+                phone = getattr(instance, PHONE_KEYED_MODELS[label])
+                if phone:
+                    return shard_for_phone(phone)
+            else:
+                # Only a parent that is already loaded, never query for it
+                field = model._meta.get_field(PARENT_KEYED_MODELS[label])
+                parent = field.get_cached_value(instance, default=None)
+                if parent is not None and parent._state.db:
+                    return parent._state.db
+
+        return get_current_shard()
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, hints.get("instance"))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, hints.get("instance"))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db and obj2._state.db:
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Every shard has the full schema
+        return None
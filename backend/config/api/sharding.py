@@ -0,0 +1,171 @@
+"""
+Phone Sharding
+
+Optional horizontal partitioning of the auth tables across the databases
+configured with DB_SHARD_URLS (aliases "shard_0", "shard_1", ...). The phone
+number is the partition key:
+
+- `User` and `VerifyOTPService` rows live on the shard of their phone (`to`).
+- rows that belong to a user (`UserPasswordResetToken`, simplejwt's
+  outstanding / blacklisted tokens) live on their user's shard.
+
+Phones are mapped to shards with a consistent hash ring (DB_SHARD_VNODES
+virtual nodes per shard), so adding a shard only moves about 1/N of the
+users. The ``rebalance_shards`` command moves them.
+
+Rows are routed by `config.api.routers.ShardRouter`:
+
+- new rows by their phone or parent row,
+- loaded rows stay on the database they were loaded from,
+- lookups through the shard-aware managers (`User.objects.for_phone(phone)`,
+  `VerifyOTPService.objects.for_phone(phone)`, ...),
+- any other query inside a `use_shard(alias)` block goes to that shard.
+
+JWTs carry the phone's ring position in SHARD_KEY_CLAIM, so token checks
+find the user's shard without a lookup (`shard_for_token`). User ids are
+generated (`generate_id`) instead of auto-incremented, so they stay unique
+across shards and when users are moved. Unique fields other than the primary
+key (phone, referral_code) are only enforced per shard.
+"""
+
+import bisect
+import hashlib
+import secrets
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SHARD_PREFIX = "shard_"
+SHARD_KEY_CLAIM = "shk"
+# Generated ids: 41 bits of milliseconds since 2025-01-01 + 22 random bits
+ID_EPOCH_MS = 1735689600000
+ID_RANDOM_BITS = 22
+
+_current_shard: ContextVar[Optional[str]] = ContextVar("current_shard", default=None)
+
+
+def get_shard_aliases() -> List[str]:
+    return [alias for alias in settings.DATABASES if alias.startswith(SHARD_PREFIX)]
+
+
+def is_sharding_enabled() -> bool:
+    return bool(get_shard_aliases())
+
+
+def shard_key(value: str) -> int:
+    """
+    Position of `value` on the ring, a stable unsigned 63-bit integer.
+    """
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+class HashRing:
+    def __init__(self, aliases: Iterable[str], vnodes: int):
+        points: List[Tuple[int, str]] = sorted(
+            (shard_key(f"{alias}#{index}"), alias)
+            for alias in aliases
+            for index in range(vnodes)
+        )
+        self._keys = [key for key, _ in points]
+        self._aliases = [alias for _, alias in points]
+
+    def shard_for_key(self, key: int) -> str:
+        index = bisect.bisect(self._keys, key) % len(self._keys)
+        return self._aliases[index]
+
+
+@lru_cache(maxsize=8)
+def _get_ring(aliases: Tuple[str, ...], vnodes: int) -> HashRing:
+    return HashRing(aliases, vnodes)
+
+
+def get_ring() -> Optional[HashRing]:
+    aliases = get_shard_aliases()
+    if not aliases:
+        return None
+    return _get_ring(tuple(aliases), getattr(settings, "DB_SHARD_VNODES", 64))
+
+
+def shard_for_phone(phone: str) -> Optional[str]:
+    """
+    Shard alias of `phone`, None when sharding is disabled.
+    """
+    ring = get_ring()
+    if ring is None:
+        return None
+    return ring.shard_for_key(shard_key(phone))
+
+
+def db_for_phone(phone: str) -> str:
+    """
+    Database holding `phone`'s rows, e.g. for `transaction.atomic(using=...)`.
+    """
+    return shard_for_phone(phone) or DEFAULT_DB_ALIAS
+
+
+def shard_for_token(payload) -> Optional[str]:
+    """
+    Shard alias of the user a JWT was issued to.
+    """
+    ring = get_ring()
+    key = payload.get(SHARD_KEY_CLAIM)
+    if ring is None or key is None:
+        return None
+    return ring.shard_for_key(int(key))
+
+
+def group_by_shard(phones: Iterable[str]) -> Dict[Optional[str], List[str]]:
+    groups: Dict[Optional[str], List[str]] = defaultdict(list)
+    for phone in phones:
+        groups[shard_for_phone(phone)].append(phone)
+    return groups
+
+
+def get_current_shard() -> Optional[str]:
+    return _current_shard.get()
+
+
+@contextmanager
+def use_shard(alias: Optional[str]):
+    """
+    Routes queries of sharded models without a routing hint to `alias`
+    (e.g. inside simplejwt). A no-op for None.
+    """
+    if alias is None:
+        yield
+        return
+    token = _current_shard.set(alias)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+def shard_of(instance) -> Optional[str]:
+    """
+    Shard `instance` was loaded from or saved to, None outside of shards.
+    """
+    db = instance._state.db
+    return db if db and db.startswith(SHARD_PREFIX) else None
+
+
+def use_shard_of(instance):
+    """
+    `use_shard` for the shard of `instance`.
+    """
+    return use_shard(shard_of(instance))
+
+
+def generate_id() -> int:
+    """
+    Time ordered 63-bit id, unique across shards without coordination.
+    """
+    milliseconds = int(time.time() * 1000) - ID_EPOCH_MS
+    return (milliseconds << ID_RANDOM_BITS) | secrets.randbits(ID_RANDOM_BITS)
@@ -0,0 +1,132 @@
+"""
+Cold Start Profiler
+
+Measures what a fresh process (e.g. a serverless cold start of
+``config/wsgi.py``) pays before it can answer the first request: importing
+the WSGI app (``django.setup()``) and building the URLconf, which imports
+every view.
+
+Each run starts a new interpreter with ``python -X importtime`` and reports
+the total boot time, the slowest modules and the import time per top-level
+package. Used through the ``startup_profile`` management command, which also
+checks the total against the "cold_start" budget in
+``config/api/perf_budgets.json``. The lean budget is also asserted by
+``apps.account.tests.test_startup``.
+
+Budgets are the measured median boot time * STARTUP_HEADROOM, tight enough
+for a regression that makes the boot much slower to fail.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+# Installed here for development but left out of requirements-serverless.txt.
+# rest_framework.compat imports them when present (~130ms), so the lean
+# profile hides them to measure what the serverless function really loads
+SERVERLESS_ABSENT_MODULES = (
+    "coreapi",
+    "inflection",
+    "markdown",
+    "pygments",
+    "requests",
+    "uritemplate",
+    "yaml",
+)
+
+# Environment of the serverless function (vercel.json)
+LEAN_BOOT_ENV = {
+    "LEAN_BOOT": "True",
+    # Profiled without a shared cache, which lockouts refuse
+    "AUTH_LOCKOUT_REQUIRE_SHARED_CACHE": "False",
+    "STARTUP_HIDDEN_MODULES": ",".join(SERVERLESS_ABSENT_MODULES),
+}
+STARTUP_HEADROOM = 1.5
+
+BOOT_SCRIPT = """
+import json, os, sys, time
+hidden = set(filter(None, os.environ.get("STARTUP_HIDDEN_MODULES", "").split(",")))
+class HiddenModules:
+    def find_spec(self, name, path=None, target=None):
+        if name.partition(".")[0] in hidden:
+            raise ModuleNotFoundError(name)
+sys.meta_path.insert(0, HiddenModules())
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+from config.wsgi import app
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({"boot_ms": (time.perf_counter() - start) * 1000}))
+"""
+
+# "import time:       self [us] |  cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+@dataclass
+class StartupProfile:
+    boot_ms: float
+    modules: List[Tuple[str, float, float]] = field(default_factory=list)
+
+    def slowest(self, limit: int = 20) -> List[Tuple[str, float, float]]:
+        """
+        `(module, self ms, cumulative ms)` sorted by self time.
+        """
+        return sorted(self.modules, key=lambda row: row[1], reverse=True)[:limit]
+
+    def by_package(self) -> Dict[str, float]:
+        """
+        Self import time summed per top-level package, in ms.
+        """
+        packages: Dict[str, float] = defaultdict(float)
+        for module, self_ms, _ in self.modules:
+            packages[module.split(".")[0]] += self_ms
+        return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+
+
+def profile_startup(env: Optional[Dict[str, str]] = None) -> StartupProfile:
+    """
+    Boots the app in a fresh interpreter and returns its import profile.
+    `env` is added to the current environment, e.g. {"LEAN_BOOT": "True"};
+    STARTUP_HIDDEN_MODULES lists top-level modules the boot can't import.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            modules.append(
+                (match[4], int(match[1]) / 1000, int(match[2]) / 1000)
+            )
+    boot_ms = json.loads(result.stdout.strip().splitlines()[-1])["boot_ms"]
+    return StartupProfile(boot_ms=round(boot_ms, 3), modules=modules)
+
+
+def profile_startup_median(
+    repeat: int = 3, env: Optional[Dict[str, str]] = None
+) -> StartupProfile:
+    """
+    Runs `repeat` cold boots and returns the one with the median boot time.
+    """
+    profiles = sorted(
+        (profile_startup(env) for _ in range(repeat)), key=lambda p: p.boot_ms
+    )
+    boot_ms = median(p.boot_ms for p in profiles)
+    return min(profiles, key=lambda p: abs(p.boot_ms - boot_ms))
@@ -0,0 +1,39 @@
+from django.test import TransactionTestCase, override_settings
+
+from config.api.bans import banned_users
+from config.api.perf import (
+    STUB_SMS_SENDER,
+    check_budgets,
+    get_scenarios,
+    load_budgets,
+    run_scenario,
+)
+
+
+# Same settings as the perf_budget command, the ban registry reload is left out
+@override_settings(SMS_SERVICE_SENDER=STUB_SMS_SENDER, USER_BAN_SYNC_INTERVAL=3600)
+class PerfBudgetTest(TransactionTestCase):
+    """
+    Status and query count of every endpoint against perf_budgets.json.
+    A TransactionTestCase, so the counts carry no test savepoints.
+    """
+
+    def setUp(self):
+        banned_users.sync(force=True)
+
+    def test_endpoints_within_query_budget(self):
+        budgets = load_budgets()
+        for scenario in get_scenarios():
+            with self.subTest(scenario.name):
+                result = run_scenario(scenario, repeat=2)
+                self.assertEqual(check_budgets([result], budgets), [])
+
+    def test_unexpected_status_fails_the_budget(self):
+        [scenario] = [s for s in get_scenarios() if s.name == "authenticate_current"]
+        # Not logged in, answers with an error envelope and fewer queries
+        scenario.setup = None
+
+        failures = check_budgets([run_scenario(scenario, repeat=1)], load_budgets())
+
+        self.assertEqual(len(failures), 1)
+        self.assertIn("expected 200", failures[0])
@@ -0,0 +1,178 @@
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from apps.account.models import User, UserPasswordResetToken
+from apps.sms_service.models import VerifyOTPService
+from config.api.hashing import check_user_password
+from config.api.sharding import shard_for_phone
+
+SHARDS = ("shard_0", "shard_1", "shard_2")
+PHONES = [f"0912{index:07d}" for index in range(30)]
+
+
+def _add_database(alias: str, name: str) -> None:
+    config = {"ENGINE": "django.db.backends.sqlite3", "NAME": name}
+    settings.DATABASES[alias] = config
+    connections.settings[alias] = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS], alias: config}
+    )[alias]
+
+
+def _remove_database(alias: str) -> None:
+    connections[alias].close()
+    del connections[alias]
+    # Usually the same dict
+    connections.settings.pop(alias, None)
+    settings.DATABASES.pop(alias, None)
+
+
+@override_settings(DATABASE_ROUTERS=["config.api.routers.ShardRouter"])
+class ShardingTest(TransactionTestCase):
+    """
+    Routing, cross-shard lookups and rebalancing on three SQLite shards.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # The shards are temporary files registered for this class only, so
+        # they are left out of `databases` until the test runner set up the
+        # test database and sharding stays disabled for every other test
+        cls.directory = tempfile.mkdtemp()
+        for alias in SHARDS:
+            _add_database(alias, f"{cls.directory}/{alias}.sqlite3")
+            call_command("migrate", database=alias, verbosity=0)
+        cls.databases = {DEFAULT_DB_ALIAS, *SHARDS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            _remove_database(alias)
+        shutil.rmtree(cls.directory)
+
+    def test_rows_are_routed_to_the_phone_shard(self):
+        for phone in PHONES:
+            user = User.objects.create_user(phone=phone)
+            otp = VerifyOTPService.objects.for_phone(phone).create(
+                to=phone, usage="AUTHENTICATE"
+            )
+            reset_token = UserPasswordResetToken.objects.for_user(user).create(
+                user=user
+            )
+
+            shard = shard_for_phone(phone)
+            self.assertEqual(user._state.db, shard)
+            self.assertEqual(otp._state.db, shard)
+            self.assertEqual(reset_token._state.db, shard)
+            self.assertTrue(User.objects.for_phone(phone).filter(phone=phone).exists())
+
+        counts = [User.objects.using(alias).count() for alias in SHARDS]
+        self.assertEqual(sum(counts), len(PHONES))
+        self.assertEqual(User.objects.using(DEFAULT_DB_ALIAS).count(), 0)
+        self.assertTrue(all(counts), "every shard should hold some users")
+
+    def test_locate_searches_every_shard(self):
+        users = [User.objects.create_user(phone=phone) for phone in PHONES[:6]]
+
+        for user in users:
+            located = User.objects.locate("id", "phone", pk=user.pk)
+            self.assertEqual(located.phone, user.phone)
+            self.assertEqual(located._state.db, shard_for_phone(user.phone))
+        self.assertIsNone(User.objects.locate(pk=0))
+
+    def test_rebalance_moves_misplaced_users(self):
+        misplaced = {}
+        for phone in PHONES[:9]:
+            home = shard_for_phone(phone)
+            # Written to the next shard, as if the ring had changed
+            source = SHARDS[(SHARDS.index(home) + 1) % len(SHARDS)]
+            user = User.objects.db_manager(source).create_user(phone=phone)
+            VerifyOTPService.objects.using(source).create(
+                to=phone, usage="AUTHENTICATE"
+            )
+            token = OutstandingToken.objects.using(source).create(
+                user=user,
+                jti=f"jti-{phone}",
+                token="token",
+                expires_at=now() + timedelta(days=1),
+            )
+            BlacklistedToken.objects.using(source).create(token=token)
+            misplaced[phone] = (user.pk, source, home)
+
+        call_command("rebalance_shards", stdout=io.StringIO())
+
+        for phone, (user_id, source, home) in misplaced.items():
+            self.assertFalse(User.objects.using(source).filter(pk=user_id).exists())
+            user = User.objects.using(home).get(pk=user_id)
+            self.assertEqual(user.phone, phone)
+            self.assertTrue(
+                VerifyOTPService.objects.using(home).filter(to=phone).exists()
+            )
+            self.assertFalse(
+                VerifyOTPService.objects.using(source).filter(to=phone).exists()
+            )
+            self.assertTrue(
+                BlacklistedToken.objects.using(home)
+                .filter(token__jti=f"jti-{phone}", token__user_id=user_id)
+                .exists()
+            )
+            self.assertFalse(
+                OutstandingToken.objects.using(source).filter(user_id=user_id).exists()
+            )
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ],
+        PASSWORD_HASHING={"WORKERS": 0},
+    )
+    def test_outdated_hash_is_upgraded_on_the_user_shard(self):
+        user = User.objects.create_user(phone=PHONES[0])
+        user.password = make_password("Pass12345", hasher="md5")
+        user.save(update_fields=["password"])
+
+        self.assertTrue(check_user_password(user, "Pass12345"))
+
+        password = User.objects.using(user._state.db).get(pk=user.pk).password
+        self.assertEqual(identify_hasher(password).algorithm, "pbkdf2_sha256")
+
+    def test_user_export_merges_every_shard(self):
+        users = [User.objects.create_user(phone=phone) for phone in PHONES[:12]]
+        staff = User.objects.create_user(phone="09129999999", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        response = client.get("/api/admin/account/export/users/")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+
+        ids = [row["id"] for row in rows]
+        self.assertEqual(ids, sorted(user.pk for user in [*users, staff]))
+
+        resumed = client.get(f"/api/admin/account/export/users/?after_id={ids[5]}")
+        self.assertEqual(
+            [
+                json.loads(line)["id"]
+                for line in b"".join(resumed.streaming_content).decode().splitlines()
+            ],
+            ids[6:],
+        )
@@ -0,0 +1,169 @@
+"""
+Request Phase Timings
+
+Sampled per-request instrumentation for production. ServerTimingMiddleware
+picks SERVER_TIMING["SAMPLE_RATE"] of the requests under
+SERVER_TIMING["PATHS"] and times their phases:
+
+- auth: JWTCookieAuthentication
+- validate: serializer `is_valid()` (TimedValidationMixin), for the token
+  refresh serializer this includes minting
+- hash: password checks and hashing on the hashing pool
+- mint: JWT minting (`generate_jwt_token`, access token refresh)
+- db: every SQL query on every connection, with the query count
+- render: rendering the DRF response
+- total: the whole request below the middleware
+
+The timings are logged as one JSON line on the "config.api.timing" logger
+and, with SERVER_TIMING["HEADER"], sent as a `Server-Timing` header
+(readable in the browser's network panel). Requests that are not sampled
+pay a single context variable lookup per `timed()` block or decorated call.
+"""
+
+import json
+import logging
+import random
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("config.api.timing")
+
+
+class RequestTimings:
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.queries = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add("db", perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Phase durations in ms.
+        """
+        return {
+            phase: round(seconds * 1000, 3) for phase, seconds in self.durations.items()
+        }
+
+    def header(self) -> str:
+        entries = []
+        for phase, ms in self.as_dict().items():
+            if phase == "db":
+                entries.append(f'db;dur={ms};desc="{self.queries} queries"')
+            else:
+                entries.append(f"{phase};dur={ms}")
+        return ", ".join(entries)
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Adds the duration of the block, or of every call when used as a
+    decorator, to `phase` if the request is sampled.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, perf_counter() - start)
+
+
+class TimedValidationMixin:
+    """
+    Serializer mixin timing `is_valid()` as the "validate" phase.
+    """
+
+    def is_valid(self, *args, **kwargs):
+        with timed("validate"):
+            return super().is_valid(*args, **kwargs)
+
+
+class ServerTimingMiddleware:
+    """
+    Samples requests and reports their RequestTimings, enabled when
+    SERVER_TIMING["SAMPLE_RATE"] is above 0.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.SERVER_TIMING
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.paths = tuple(config["PATHS"])
+        self.emit_header = config["HEADER"]
+
+    def __call__(self, request):
+        if not self.is_sampled(request):
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        timings.add("total", perf_counter() - start)
+
+        if self.emit_header:
+            response["Server-Timing"] = timings.header()
+        # BaseResponse carries the real status in its body
+        data = getattr(response, "data", None)
+        api_status = data.get("status") if isinstance(data, dict) else None
+        logger.info(
+            json.dumps(
+                {
+                    "event": "request_timing",
+                    "method": request.method,
+                    "path": request.path_info,
+                    "status": response.status_code,
+                    "api_status": api_status,
+                    "queries": timings.queries,
+                    "timings_ms": timings.as_dict(),
+                }
+            )
+        )
+        return response
+
+    def is_sampled(self, request) -> bool:
+        if not request.path_info.startswith(self.paths):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view, below this middleware
+        timings = _timings.get()
+        if timings is not None:
+            start = perf_counter()
+
+            def record_render(rendered):
+                timings.add("render", perf_counter() - start)
+
+            response.add_post_render_callback(record_render)
+        return response
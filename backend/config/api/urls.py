@@ -1,6 +1,19 @@
 from django.urls import include, path
 
+from apps.sms_service.views.export import OTPExportView
+from config.api.views import DatabaseStatsView, MetricsView, ProfilingView
+
 urlpatterns = [
     path("account/", include("apps.account.urls.frontend")),
     path("sms-service/", include("apps.sms_service.urls.frontend")),
+    path("admin/account/", include("apps.account.urls.admin")),
+    # apps.sms_service.urls.admin is not mounted, its views need Telegram
+    path(
+        "admin/sms-service/export/otp/",
+        OTPExportView.as_view(),
+        name="admin_sms_service_export_otp",
+    ),
+    path("admin/db-stats/", DatabaseStatsView.as_view(), name="admin_db_stats"),
+    path("admin/metrics/", MetricsView.as_view(), name="admin_metrics"),
+    path("admin/profile/", ProfilingView.as_view(), name="admin_profile"),
 ]
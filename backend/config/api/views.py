@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import serializers, status
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.views import APIView
+
+from config.api.database import get_connection_stats
+from config.api.enums import ResponseMessage
+from config.api.metrics import registry
+from config.api.profiling import profiler
+from config.api.response import BaseResponse
+
+
+class DatabaseStatsView(APIView):
+    """
+    Staff-only endpoint with the database connection stats of the worker
+    that served the request.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return BaseResponse(
+            data=get_connection_stats(),
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
+
+
+class IsStaffOrMetricsToken(BasePermission):
+    """
+    Staff users, or scrapers sending METRICS_TOKEN in the X-Metrics-Token
+    header.
+    """
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        header = request.META.get("HTTP_X_METRICS_TOKEN")
+        if token and header and constant_time_compare(header, token):
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    """
+    Auth and OTP counters in the Prometheus text format, summed over every
+    worker sharing METRICS_DIR.
+    """
+
+    permission_classes = [IsStaffOrMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+class ProfileStartSerializer(serializers.Serializer):
+    requests = serializers.IntegerField(min_value=1, required=False)
+    seconds = serializers.FloatField(min_value=0.1, required=False)
+
+
+class ProfilingView(APIView):
+    """
+    Staff-only sampling profiler of the worker serving the request.
+
+    POST starts a session over the next `requests` requests or `seconds`,
+    GET returns the running session's status, or the last finished profile
+    as collapsed stacks with `?output=folded`.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = ProfileStartSerializer
+
+    def get(self, request):
+        if request.query_params.get("output") == "folded":
+            if profiler.last is None:
+                return BaseResponse(
+                    status=status.HTTP_404_NOT_FOUND,
+                    message=ResponseMessage.NOT_FOUND.value,
+                )
+            return HttpResponse(
+                profiler.last.collapsed(), content_type="text/plain; charset=utf-8"
+            )
+
+        session = profiler.session
+        return BaseResponse(
+            data={
+                "running": session.status() if session else None,
+                "last": profiler.last.status() if profiler.last else None,
+                "last_path": str(profiler.last_path) if profiler.last_path else None,
+            },
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
+
+    def post(self, request):
+        if not profiler.config["ENABLED"]:
+            return BaseResponse(
+                status=status.HTTP_403_FORBIDDEN,
+                message=ResponseMessage.ACTION_NOT_ALLOWED.value,
+            )
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return BaseResponse(
+                status=status.HTTP_400_BAD_REQUEST, message=ResponseMessage.FAILED.value
+            )
+
+        session = profiler.start(
+            requests=serializer.validated_data.get("requests"),  # type: ignore
+            seconds=serializer.validated_data.get("seconds"),  # type: ignore
+        )
+        if session is None:
+            return BaseResponse(
+                status=status.HTTP_409_CONFLICT,
+                message=ResponseMessage.ALREADY_DONE.value,
+            )
+        return BaseResponse(
+            data=session.status(),
+            status=status.HTTP_200_OK,
+            message=ResponseMessage.SUCCESS.value,
+        )
@@ -1,5 +1,3 @@
-import jdatetime
-
 def get_formatted_persian_time(format_type="full"):
     """
     Get current time in various formats
@@ -20,6 +18,9 @@ def get_formatted_persian_time(format_type="full"):
     Returns:
         str or int: Formatted time string or timestamp
     """
+    # Imported on use, keeps jdatetime out of the boot path
+    import jdatetime
+
     jdatetime.set_locale(jdatetime.FA_LOCALE)
     now = jdatetime.datetime.now()
     
@@ -0,0 +1,195 @@
+"""
+Production Server
+
+Runs `config.wsgi.app` or `config.asgi.app` on gunicorn's preforking master.
+ASGI runs on uvicorn workers. Used through the ``serve`` management command:
+
+    python manage.py serve                  # settings.SERVER
+    python manage.py serve --interface asgi --workers 8
+
+- The app, URLconf and views are imported in the master before forking
+  (PRELOAD), so workers share that memory copy-on-write. Database
+  connections opened while preloading are closed before the fork, sockets
+  must never be shared between processes.
+- Every worker opens its database connections and cache client and loads
+  the banned users registry before taking traffic (`warm_worker`).
+- Workers are recycled after MAX_REQUESTS (+ random jitter) requests.
+- More than one worker needs a shared cache (CACHE_URL): lockout counters,
+  bans and token revocations kept in a per-process cache would differ
+  between workers. Without one `serve` runs a single worker unless WORKERS
+  is set, and refuses to start several.
+- METRICS_DIR is cleared when the master starts. An exiting worker folds its
+  metrics into the exited workers' snapshot (config.api.metrics) and writes
+  its buffered audit events (config.api.audit).
+- `kill -HUP <master pid>` gracefully replaces the workers, each finishing
+  its in-flight requests within GRACEFUL_TIMEOUT. With PRELOAD the master
+  keeps the loaded code, so deploying new code needs a master restart
+  (or PRELOAD=False, which makes HUP reload the code too).
+"""
+
+import logging
+import os
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from gunicorn.app.base import BaseApplication
+
+logger = logging.getLogger("django")
+
+WORKER_CLASSES = {
+    "wsgi": "sync",
+    "asgi": "uvicorn_worker.UvicornWorker",
+}
+
+
+def load_application(interface: str):
+    """
+    Imports the app together with everything a request touches, so that it
+    is done once in the master instead of in every worker.
+    """
+    from django.urls import get_resolver
+
+    if interface == "asgi":
+        from config.asgi import app
+    else:
+        from config.wsgi import app
+
+    # Imports every view module and builds the URL patterns
+    get_resolver().url_patterns
+    return app
+
+
+def warm_worker() -> None:
+    """
+    Opens the connections a request needs, run in every new worker.
+    """
+    from django.core.cache import cache
+    from django.db import connections
+
+    from config.api.bans import banned_users
+
+    for connection in connections.all():
+        connection.ensure_connection()
+    cache.get("server:warmup")
+    banned_users.sync(force=True)
+
+
+def _on_starting(server) -> None:
+    from config.api.cache import is_shared_cache
+    from config.api.metrics import registry
+
+    registry.clear()
+    if not is_shared_cache():
+        # In gunicorn's log, the django logger is silent without DEBUG
+        server.log.warning(
+            "No shared cache configured (CACHE_URL), serving a single worker"
+        )
+
+
+def _pre_fork(server, worker) -> None:
+    from django.db import connections
+
+    connections.close_all()
+    for connection in connections.all():
+        # psycopg pools own threads and sockets, each worker opens its own
+        close_pool = getattr(connection, "close_pool", None)
+        if close_pool:
+            close_pool()
+
+
+def _post_worker_init(worker) -> None:
+    try:
+        warm_worker()
+    except Exception as e:
+        # A cold worker still serves requests, a crashing one does not
+        logger.warning("Worker warm-up failed: %s", e)
+
+
+def _worker_exit(server, worker) -> None:
+    from config.api.audit import audit_log
+    from config.api.metrics import registry
+
+    try:
+        registry.retire()
+    except OSError as e:
+        logger.warning("Metrics retire failed: %s", e)
+    audit_log.close()
+
+
+class DjangoServer(BaseApplication):
+    def __init__(self, interface: str, options: Dict[str, Any]):
+        if interface not in WORKER_CLASSES:
+            raise ValueError(f"Unsupported interface: {interface}")
+        self.interface = interface
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        config = {
+            "worker_class": WORKER_CLASSES[self.interface],
+            "on_starting": _on_starting,
+            "pre_fork": _pre_fork,
+            "post_worker_init": _post_worker_init,
+            "worker_exit": _worker_exit,
+            **self.options,
+        }
+        for key, value in config.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return load_application(self.interface)
+
+
+def get_server_options(**overrides) -> Dict[str, Any]:
+    """
+    gunicorn options from settings.SERVER, `overrides` win when not None.
+    """
+    server = {
+        "BIND": "0.0.0.0:8000",
+        "INTERFACE": "wsgi",
+        "WORKERS": None,
+        "THREADS": 1,
+        "MAX_REQUESTS": 0,
+        "MAX_REQUESTS_JITTER": 0,
+        "TIMEOUT": 30,
+        "GRACEFUL_TIMEOUT": 30,
+        "KEEPALIVE": 2,
+        "PRELOAD": True,
+        **getattr(settings, "SERVER", {}),
+    }
+    server.update({k: v for k, v in overrides.items() if v is not None})
+    return {
+        "interface": server["INTERFACE"],
+        "options": {
+            "bind": server["BIND"],
+            "workers": server["WORKERS"],
+            "threads": server["THREADS"],
+            "max_requests": server["MAX_REQUESTS"],
+            "max_requests_jitter": server["MAX_REQUESTS_JITTER"],
+            "timeout": server["TIMEOUT"],
+            "graceful_timeout": server["GRACEFUL_TIMEOUT"],
+            "keepalive": server["KEEPALIVE"],
+            "preload_app": server["PRELOAD"],
+            "proc_name": "backend",
+        },
+    }
+
+
+def serve(**overrides) -> None:
+    from config.api.cache import is_shared_cache
+
+    server_options = get_server_options(**overrides)
+    options = server_options["options"]
+    if options["workers"] is None:
+        if is_shared_cache():
+            options["workers"] = 2 * (os.cpu_count() or 1) + 1
+        else:
+            options["workers"] = 1
+    elif options["workers"] > 1 and not is_shared_cache():
+        raise ImproperlyConfigured(
+            "Several workers need a shared cache for lockouts, bans and token "
+            "revocations, set CACHE_URL or run a single worker (--workers 1)."
+        )
+    DjangoServer(**server_options).run()
@@ -3,9 +3,15 @@ from datetime import timedelta
 from pathlib import Path
 
 import dj_database_url
-from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
-load_dotenv()
+# Serverless profile (vercel.json): env comes from the platform and optional
+# apps / renderers are left out to keep cold starts short
+LEAN_BOOT = os.environ.get("LEAN_BOOT", "False") == "True"
+if not LEAN_BOOT:
+    from dotenv import load_dotenv
+
+    load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -15,6 +21,21 @@ SITE_URL = os.environ.get("SITE_URL", "http://localhost:8000")
 SMS_SERVICE_API_URL = os.environ.get("SMS_SERVICE_API_URL")
 SMS_SERVICE_SECRET_KEY = os.environ.get("SMS_SERVICE_SECRET_KEY")
 SMS_SERVICE_OTP_PATTERN = os.environ.get("SMS_SERVICE_OTP_PATTERN")
+# Optional dotted path overriding the OTP sender (e.g. the local stub)
+SMS_SERVICE_SENDER = os.environ.get("SMS_SERVICE_SENDER")
+# Directory the stub sender writes codes to, read by the loadtest command
+SMS_SERVICE_STUB_OUTBOX = os.environ.get("SMS_SERVICE_STUB_OUTBOX")
+
+# OTP engine (apps.sms_service.utils.backends): DatabaseOTPBackend stores
+# codes in VerifyOTPService, HMACOTPBackend derives them statelessly and
+# needs a shared cache (CACHE_URL)
+OTP_BACKEND = os.environ.get(
+    "OTP_BACKEND", "apps.sms_service.utils.backends.DatabaseOTPBackend"
+)
+OTP_HMAC_SECRET = os.environ.get("OTP_HMAC_SECRET")
+OTP_HMAC_STEP = int(os.environ.get("OTP_HMAC_STEP", 240))
+OTP_HMAC_WINDOW = int(os.environ.get("OTP_HMAC_WINDOW", 1))
+OTP_HMAC_MAX_ATTEMPTS = int(os.environ.get("OTP_HMAC_MAX_ATTEMPTS", 5))
 
 
 SECRET_KEY = os.environ.get("SECRET_KEY")
@@ -56,11 +77,35 @@ INTERNAL_APPS = [
     "apps.account",
     "apps.sms_service",
 ]
+if LEAN_BOOT:
+    # API only, static files are never served by the function
+    DJANGO_APPS.remove("django.contrib.staticfiles")
 INSTALLED_APPS = DJANGO_APPS + EXTERNAL_APPS + INTERNAL_APPS
 
 AUTH_USER_MODEL = "account.User"
 
-MIDDLEWARE = [
+# "full": every request runs Django's session, auth, CSRF and X-Frame-Options
+# middlewares. "lean": requests under API_PATH_PREFIX skip them (the API
+# authenticates per view with JWTs and has no sessions) and cookie-JWT
+# requests are CSRF checked with a double-submit token instead, clients
+# must echo the csrf_token cookie in the X-CSRFToken header
+# (config.api.middleware). Compare with `manage.py middleware_benchmark`.
+MIDDLEWARE_PROFILE = os.environ.get("MIDDLEWARE_PROFILE", "full")
+API_PATH_PREFIX = "/api/"
+API_SKIPPED_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+# Login endpoints issue the CSRF cookie, they can't require it
+API_CSRF_EXEMPT_PATHS = [
+    "/api/account/authenticate/check/",
+    "/api/account/authenticate/otp/",
+    "/api/account/authenticate/password/",
+    "/api/account/authenticate/forget-password/",
+]
+FULL_MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -69,6 +114,23 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+LEAN_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "config.api.middleware.NonApiMiddleware",
+    "config.api.middleware.DoubleSubmitCsrfMiddleware",
+]
+MIDDLEWARE = list(
+    LEAN_MIDDLEWARE if MIDDLEWARE_PROFILE == "lean" else FULL_MIDDLEWARE
+)
+
+# Opt-in transparent access token renewal (see config.api.middleware)
+JWT_SLIDING_RENEWAL_ENABLED = (
+    os.environ.get("JWT_SLIDING_RENEWAL_ENABLED", "False") == "True"
+)
+if JWT_SLIDING_RENEWAL_ENABLED:
+    MIDDLEWARE += ["config.api.middleware.JWTSlidingRenewalMiddleware"]
 
 if DEBUG:
     INSTALLED_APPS = [
@@ -95,15 +157,98 @@ if DEBUG:
         },
     }
 
+# Sampled per-request phase timings (config.api.timing): one JSON log line
+# per sampled request. 0 disables, 1 samples every request under
+# SERVER_TIMING_PATHS (comma separated prefixes). The Server-Timing header
+# exposes them (and the query count) to every client, so it is opt-in.
+SERVER_TIMING = {
+    "SAMPLE_RATE": float(os.environ.get("SERVER_TIMING_SAMPLE_RATE", 0)),
+    "PATHS": os.environ.get("SERVER_TIMING_PATHS", "/api/").split(","),
+    "HEADER": os.environ.get("SERVER_TIMING_HEADER", "False") == "True",
+}
+if SERVER_TIMING["SAMPLE_RATE"] > 0:
+    LOGGING = LOGGING if DEBUG else {"version": 1, "disable_existing_loggers": False}
+    LOGGING.setdefault("formatters", {})["message"] = {"format": "%(message)s"}
+    LOGGING.setdefault("handlers", {})["timing"] = {
+        "class": "logging.StreamHandler",
+        "formatter": "message",
+    }
+    LOGGING.setdefault("loggers", {})["config.api.timing"] = {
+        "handlers": ["timing"],
+        "level": "INFO",
+        "propagate": False,
+    }
+
+# Auth and OTP counters (config.api.metrics), scraped from api/admin/metrics/
+# by staff or with METRICS_TOKEN in the X-Metrics-Token header. Workers share
+# their counters through METRICS_DIR, written every METRICS_FLUSH_INTERVAL
+# seconds; without it a scrape only sees the worker that served it.
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 10))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+# On-demand sampling profiler (config.api.profiling), started by staff on
+# api/admin/profile/. Sessions sample every INTERVAL_MS and stop after at
+# most MAX_SECONDS, their collapsed stacks are also written to DIR if set.
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED", "False") == "True",
+    "INTERVAL_MS": float(os.environ.get("PROFILING_INTERVAL_MS", 5)),
+    "MAX_SECONDS": float(os.environ.get("PROFILING_MAX_SECONDS", 60)),
+    "DIR": os.environ.get("PROFILING_DIR") or None,
+}
+if PROFILING["ENABLED"]:
+    MIDDLEWARE = ["config.api.profiling.ProfilingMiddleware"] + MIDDLEWARE
+
 ROOT_URLCONF = "config.urls"
 
 
 WSGI_APPLICATION = "config.wsgi.app"
 ASGI_APPLICATION = "config.asgi.app"
 
+# Database connection management (see config.api.database):
+# - "persistent": connections are reused for DB_CONN_MAX_AGE seconds
+# - "pool": per-worker psycopg 3 pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+#   connections, Django requires CONN_MAX_AGE=0 with it
+# - "serverless": connections live as long as the warm function instance
+# Reused connections are health checked before every request.
+DB_CONN_MODE = os.environ.get(
+    "DB_CONN_MODE", "serverless" if LEAN_BOOT else "persistent"
+)
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+DB_POOL = {
+    "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+    "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+    # Seconds a request waits for a free pooled connection
+    "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+}
+# Required behind PgBouncer in transaction mode (breaks streaming exports'
+# server-side cursors otherwise)
+DB_DISABLE_SERVER_SIDE_CURSORS = (
+    os.environ.get("DB_DISABLE_SERVER_SIDE_CURSORS", "False") == "True"
+)
+
+
+def database_from_url(url: str) -> dict:
+    """
+    DATABASES entry for `url` with the DB_CONN_MODE connection settings.
+    """
+    config = dj_database_url.parse(
+        url,
+        conn_max_age={"pool": 0, "serverless": None}.get(
+            DB_CONN_MODE, DB_CONN_MAX_AGE
+        ),
+        conn_health_checks=DB_CONN_MODE != "pool",
+        disable_server_side_cursors=DB_DISABLE_SERVER_SIDE_CURSORS,
+    )
+    if DB_CONN_MODE == "pool" and "postgresql" in config["ENGINE"]:
+        # The pool hands out healthy connections only
+        config.setdefault("OPTIONS", {})["pool"] = DB_POOL
+    return config
+
+
 DB_URL = os.environ.get("DB_URL")
 if DB_URL:
-    DATABASES = {"default": dj_database_url.config(default=os.environ.get("DB_URL"))}
+    DATABASES = {"default": database_from_url(DB_URL)}
 else:
     DATABASES = {
         "default": {
@@ -112,6 +257,63 @@ else:
         }
     }
 
+# Read replicas (config.api.routers.ReplicaRouter), comma separated URLs.
+# Only reads of DB_REPLICA_MODELS inside requests go to a replica.
+DB_REPLICA_URLS = [
+    url for url in os.environ.get("DB_REPLICA_URLS", "").split(",") if url
+]
+for index, url in enumerate(DB_REPLICA_URLS):
+    DATABASES[f"replica_{index}"] = {
+        **database_from_url(url),
+        # Tests read the primary's test database through the replica alias
+        "TEST": {"MIRROR": "default"},
+    }
+# "round_robin" or "least_loaded" (fewest in-flight requests in this worker)
+DB_REPLICA_SELECTION = os.environ.get("DB_REPLICA_SELECTION", "round_robin")
+DB_REPLICA_MODELS = [
+    "account.user",
+    "token_blacklist.outstandingtoken",
+    "token_blacklist.blacklistedtoken",
+]
+# Clients read from the primary this long after a request of theirs wrote
+DB_REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", 5))
+DB_REPLICA_PIN_COOKIE = "db_pin"
+if DB_REPLICA_URLS:
+    DATABASE_ROUTERS = ["config.api.routers.ReplicaRouter"]
+    MIDDLEWARE = ["config.api.middleware.ReplicaPinMiddleware"] + MIDDLEWARE
+
+# Phone sharding (config.api.sharding), comma separated URLs. Users, their
+# OTPs, reset tokens and JWTs are spread over the shards by phone, every
+# other table stays on "default". Run `migrate --database shard_<n>` for
+# each shard and `rebalance_shards` after adding one.
+DB_SHARD_URLS = [url for url in os.environ.get("DB_SHARD_URLS", "").split(",") if url]
+# Virtual nodes per shard on the consistent hash ring
+DB_SHARD_VNODES = int(os.environ.get("DB_SHARD_VNODES", 64))
+for index, url in enumerate(DB_SHARD_URLS):
+    DATABASES[f"shard_{index}"] = database_from_url(url)
+if DB_SHARD_URLS:
+    if DB_REPLICA_URLS:
+        raise ImproperlyConfigured(
+            "DB_SHARD_URLS and DB_REPLICA_URLS can't be combined."
+        )
+    DATABASE_ROUTERS = ["config.api.routers.ShardRouter"]
+
+if SERVER_TIMING["SAMPLE_RATE"] > 0:
+    # Prepended last so it is outermost and the total covers every other
+    # middleware
+    MIDDLEWARE = ["config.api.timing.ServerTimingMiddleware"] + MIDDLEWARE
+
+CACHE_URL = os.environ.get("CACHE_URL")
+if CACHE_URL:
+    # Shared cache (e.g. redis://localhost:6379/0) used for token revocation
+    # lookups so every worker sees revocations immediately
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+
 STATIC_URL = "/static/"
 MEDIA_ROOT = "/data/web/media/"
 MEDIA_URL = "media/"
@@ -170,6 +372,11 @@ REST_FRAMEWORK = {
         "2perday": "2/day",
     },
 }
+if LEAN_BOOT:
+    # JSON only, the browsable API renderer pulls in templates on first use
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "rest_framework.renderers.JSONRenderer",
+    ]
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=1),
@@ -211,6 +418,112 @@ JWT_COOKIE_SECURE = (
 JWT_COOKIE_SAMESITE = os.environ.get("JWT_COOKIE_SAMESITE", "Lax")
 JWT_COOKIE_DOMAIN = os.environ.get("JWT_COOKIE_DOMAIN", None)
 
+# Forgot-password reset tokens (apps.account.utils.password_reset):
+# "database" stores UserPasswordResetToken rows, "signed" is stateless
+PASSWORD_RESET_TOKEN_MODE = os.environ.get("PASSWORD_RESET_TOKEN_MODE", "database")
+PASSWORD_RESET_TOKEN_MAX_AGE = int(os.environ.get("PASSWORD_RESET_TOKEN_MAX_AGE", 300))
+
+# Seconds a "not revoked" refresh token lookup is cached (config.api.revocation)
+JWT_REVOCATION_CACHE_TTL = int(os.environ.get("JWT_REVOCATION_CACHE_TTL", 60))
+# Seconds a user's security stamp is cached, bumps update the cache directly
+JWT_SECURITY_STAMP_CACHE_TTL = int(
+    os.environ.get("JWT_SECURITY_STAMP_CACHE_TTL", 300)
+)
+# Used instead without CACHE_URL, other workers see a bump only after this
+JWT_SECURITY_STAMP_LOCAL_CACHE_TTL = int(
+    os.environ.get("JWT_SECURITY_STAMP_LOCAL_CACHE_TTL", 5)
+)
+
+# Bounded pool for password checks and hashing (config.api.hashing), requests
+# get a 503 when every worker is busy and QUEUE_SIZE more are already waiting
+PASSWORD_HASHING = {
+    "WORKERS": int(os.environ.get("PASSWORD_HASHING_WORKERS", os.cpu_count() or 2)),
+    "QUEUE_SIZE": int(os.environ.get("PASSWORD_HASHING_QUEUE_SIZE", 32)),
+    "ACQUIRE_TIMEOUT": float(os.environ.get("PASSWORD_HASHING_ACQUIRE_TIMEOUT", 0.05)),
+}
+
+# Failed OTP / password attempts before a phone or IP is locked out, the lock
+# doubles with every further failure (config.api.lockout)
+AUTH_LOCKOUT = {
+    "PHONE_THRESHOLD": int(os.environ.get("AUTH_LOCKOUT_PHONE_THRESHOLD", 5)),
+    "IP_THRESHOLD": int(os.environ.get("AUTH_LOCKOUT_IP_THRESHOLD", 20)),
+    "BASE_SECONDS": int(os.environ.get("AUTH_LOCKOUT_BASE_SECONDS", 30)),
+    "MAX_SECONDS": int(os.environ.get("AUTH_LOCKOUT_MAX_SECONDS", 3600)),
+    # Failures are forgotten after this many seconds without a new one
+    "WINDOW": int(os.environ.get("AUTH_LOCKOUT_WINDOW", 3600)),
+    # Refuse per-process counters, on by default for serverless instances
+    "REQUIRE_SHARED_CACHE": os.environ.get(
+        "AUTH_LOCKOUT_REQUIRE_SHARED_CACHE", str(LEAN_BOOT)
+    )
+    == "True",
+}
+
+# Buffered auth audit log (config.api.audit): events are written in batches
+# by a background thread to the AuthAuditEvent table ("database") or to a
+# rotating, gzipped NDJSON file ("file"). `compact_audit_log` applies the
+# retention.
+AUTH_AUDIT = {
+    "ENABLED": os.environ.get("AUTH_AUDIT_ENABLED", "True") == "True",
+    "SINK": os.environ.get("AUTH_AUDIT_SINK", "database"),
+    "FILE": os.environ.get(
+        "AUTH_AUDIT_FILE", str(BASE_DIR / "logs" / "auth-audit.ndjson")
+    ),
+    "FILE_MAX_BYTES": int(
+        os.environ.get("AUTH_AUDIT_FILE_MAX_BYTES", 50 * 1024 * 1024)
+    ),
+    "FILE_BACKUP_COUNT": int(os.environ.get("AUTH_AUDIT_FILE_BACKUP_COUNT", 10)),
+    # Oldest events are dropped beyond this many buffered ones
+    "BUFFER_SIZE": int(os.environ.get("AUTH_AUDIT_BUFFER_SIZE", 10000)),
+    "BATCH_SIZE": int(os.environ.get("AUTH_AUDIT_BATCH_SIZE", 500)),
+    "FLUSH_INTERVAL": float(os.environ.get("AUTH_AUDIT_FLUSH_INTERVAL", 2)),
+    # Raw events are compacted into daily counts after this many days
+    "RETENTION_DAYS": int(os.environ.get("AUTH_AUDIT_RETENTION_DAYS", 90)),
+    "SUMMARY_RETENTION_DAYS": int(
+        os.environ.get("AUTH_AUDIT_SUMMARY_RETENTION_DAYS", 730)
+    ),
+}
+
+# Seconds between checks of the banned users version (config.api.bans)
+USER_BAN_SYNC_INTERVAL = int(os.environ.get("USER_BAN_SYNC_INTERVAL", 5))
+# Seconds between database reloads catching bans written without save()
+USER_BAN_RELOAD_INTERVAL = int(os.environ.get("USER_BAN_RELOAD_INTERVAL", 60))
+
+# Concurrent refreshes of one refresh token within this many seconds share a
+# single minted access token (config.api.jwt.get_or_mint_access_token), 0 disables
+JWT_REFRESH_COALESCE_WINDOW = int(os.environ.get("JWT_REFRESH_COALESCE_WINDOW", 10))
+
+JWT_SLIDING_RENEWAL = {
+    # Renew when the access token expires within this window
+    "RENEW_BEFORE": timedelta(
+        seconds=int(os.environ.get("JWT_SLIDING_RENEWAL_BEFORE", 20))
+    ),
+    # Still renew access tokens that expired less than this ago
+    "GRACE": timedelta(seconds=int(os.environ.get("JWT_SLIDING_RENEWAL_GRACE", 60))),
+    "EXCLUDE_PATHS": [
+        "/api/account/authenticate/token-refresh/",
+        "/api/account/authenticate/logout/",
+    ],
+}
+
+# Production server (config.server, `python manage.py serve`)
+SERVER = {
+    "BIND": os.environ.get("SERVER_BIND", "0.0.0.0:8000"),
+    # "wsgi" (sync workers) or "asgi" (uvicorn workers)
+    "INTERFACE": os.environ.get("SERVER_INTERFACE", "wsgi"),
+    # Defaults to 2 * CPUs + 1 with a shared cache (CACHE_URL), otherwise 1
+    "WORKERS": int(os.environ.get("SERVER_WORKERS", 0)) or None,
+    "THREADS": int(os.environ.get("SERVER_THREADS", 1)),
+    # Recycle workers after this many requests (+ random jitter), 0 disables
+    "MAX_REQUESTS": int(os.environ.get("SERVER_MAX_REQUESTS", 1000)),
+    "MAX_REQUESTS_JITTER": int(os.environ.get("SERVER_MAX_REQUESTS_JITTER", 100)),
+    "TIMEOUT": int(os.environ.get("SERVER_TIMEOUT", 30)),
+    # Seconds workers get to finish in-flight requests on reload / shutdown
+    "GRACEFUL_TIMEOUT": int(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30)),
+    "KEEPALIVE": int(os.environ.get("SERVER_KEEPALIVE", 2)),
+    # Import the app before forking, workers share its memory copy-on-write
+    "PRELOAD": os.environ.get("SERVER_PRELOAD", "True") == "True",
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
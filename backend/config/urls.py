@@ -1,6 +1,5 @@
 from django.conf import settings
 from django.urls import path, include
-import debug_toolbar
 
 
 urlpatterns = [
@@ -8,6 +7,9 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
+    # Only installed for development, keeps it out of production boots
+    import debug_toolbar
+
     urlpatterns += [
         path("__debug__/", include(debug_toolbar.urls)),
     ]
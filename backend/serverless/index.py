@@ -0,0 +1,7 @@
+"""
+Vercel entrypoint (see vercel.json). @vercel/python installs the
+requirements.txt next to the entrypoint, which pulls in the trimmed
+requirements-serverless.txt instead of the full requirements.txt.
+"""
+
+from config.wsgi import app  # noqa: F401